@@ -4,12 +4,16 @@ import re
 import random
 import sys
 import os
+import time
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(current_dir)
 sys.path.append(os.path.join(current_dir, 'src'))
 
 from llm import process_query, check_greeting
 
+# 스트리밍 중 답변을 다시 그리는 최소 간격 (초)
+STREAM_RENDER_INTERVAL = float(os.getenv("STREAM_RENDER_INTERVAL", "0.05"))
+
 # 페이지 설정
 st.set_page_config(page_title="🐶우리개 어디가?🐶", layout="wide")
 
@@ -251,9 +255,10 @@ with chat_container:
                 </div>
             """, unsafe_allow_html=True)
 
-    # 타이핑 표시기
+    # 타이핑 표시기 (답변이 스트리밍되기 시작하면 같은 자리에 답변을 그림)
+    bot_placeholder = st.empty()
     if st.session_state.pending_bot:
-        st.markdown(f"""
+        bot_placeholder.markdown(f"""
             <div class="chat-line">
                 <div class="profile-container left">
                     <img src="data:image/png;base64,{bot_profile_b64}" class="profile-img">
@@ -285,20 +290,40 @@ if user_input:
         st.session_state.pending_bot = user_input
         st.rerun()
 
+def clean_bot_answer(text):
+    text = re.sub(r'\n{3,}', '\n\n', text)  # 3개 이상 연속된 줄바꿈을 2개로 제한
+    return text.strip()  # 앞뒤 공백 제거
+
+def render_streaming_answer(placeholder, content):
+    placeholder.markdown(f"""
+        <div class="chat-line">
+            <div class="profile-container left">
+                <img src="data:image/png;base64,{bot_profile_b64}" class="profile-img">
+                <img src="data:image/png;base64,{bot_dog_b64}" class="character left">
+            </div>
+            <div class="markdown-body">{content}</div>
+        </div>
+    """, unsafe_allow_html=True)
+
 if st.session_state.pending_bot:
     try:
-        with st.spinner(''):
-            bot_answer = process_query(st.session_state.pending_bot, stream=False)
-            # 연속된 줄바꿈 제어
-            bot_answer = re.sub(r'\n{3,}', '\n\n', bot_answer)  # 3개 이상 연속된 줄바꿈을 2개로 제한
-            bot_answer = bot_answer.strip()  # 앞뒤 공백 제거
-            
-            # 마크다운 형식 메시지 추가
-            st.session_state.messages.append({
-                "role": "bot",
-                "content": bot_answer,
-                "is_markdown": True  # 마크다운 형식임을 표시
-            })
+        # 청크가 도착할 때마다 누적된 답변을 다시 그림 (너무 잦은 갱신은 STREAM_RENDER_INTERVAL 로 제한)
+        bot_answer = ""
+        last_render = 0.0
+        for chunk in process_query(st.session_state.pending_bot, stream=True):
+            bot_answer += chunk
+            if time.monotonic() - last_render >= STREAM_RENDER_INTERVAL:
+                render_streaming_answer(bot_placeholder, clean_bot_answer(bot_answer))
+                last_render = time.monotonic()
+        bot_answer = clean_bot_answer(bot_answer)
+        render_streaming_answer(bot_placeholder, bot_answer)
+
+        # 완성된 답변만 대화 기록에 추가
+        st.session_state.messages.append({
+            "role": "bot",
+            "content": bot_answer,
+            "is_markdown": True  # 마크다운 형식임을 표시
+        })
     except Exception as e:
         error_message = f"죄송합니다. 응답 생성 중 오류가 발생했습니다. 다시 시도해주세요.\n\n오류: {str(e)}"
         st.session_state.messages.append({"role": "bot", "content": error_message})
@@ -307,13 +332,6 @@ if st.session_state.pending_bot:
         st.session_state.pending_bot = None
         st.rerun()
 
-transport_keywords = {
-    "기차": ["기차", "ktx", "열차", "철도", "korail", "코레일"],
-    "버스": ["버스", "시내버스", "시외버스", "고속버스"],
-    "지하철": ["지하철", "전철", "metro"],
-    "택시": ["택시", "call", "콜택시"]
-}
-
 # ### 🚄 기차 이용 안내
 
 # #### KTX/일반열차 이용 규정
@@ -0,0 +1,693 @@
+"""
+외부 API 호출 공통 레이어
+
+Tour API(fetch_pt_places), 기상청(weather), 네이버 검색(naver_map_utils)이 모두 이 모듈을 통해
+호출됩니다. 호출마다 다음을 적용합니다.
+
+- API 키별 토큰 버킷 rate limit
+- 지터(jitter)가 섞인 지수 백오프 재시도 + 재시도 예산(retry budget)
+- 서비스별 서킷 브레이커 (장애 시 즉시 실패, 기본은 호스트 단위 - 같은 호스트의 다른 API 는 service 로 구분)
+- 로그/예외 메시지의 URL 쿼리 값은 가림 (serviceKey 등 API 키가 로그에 남지 않도록)
+- open / half-open 상태 전환 메트릭
+
+비동기 호출(arequest/aget)은 httpx.AsyncClient 로 같은 정책(rate limit/재시도 예산/서킷)을 공유합니다.
+"""
+import asyncio
+import hashlib
+import logging
+import random
+import re
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# 서킷 브레이커 상태
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# 재시도 대상 HTTP 상태 코드
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+
+_QUERY_VALUE = re.compile(r"([?&][^=&\s'\"]+=)[^&\s'\")]*")
+
+
+def redact_url(text: str) -> str:
+    """
+    URL 쿼리 파라미터 값을 가린 문자열 (로그/오류 메시지용)
+
+    Example:
+        "https://apis.data.go.kr/x?serviceKey=abc&nx=60" → "https://apis.data.go.kr/x?serviceKey=***&nx=***"
+    """
+    return _QUERY_VALUE.sub(r"\1***", text)
+
+
+def _redacted(error: requests.RequestException) -> requests.RequestException:
+    # 같은 타입으로 메시지만 가려서 다시 만듦 (호출부의 except 절은 그대로 동작)
+    return type(error)(redact_url(str(error)), request=error.request, response=error.response)
+
+
+class CircuitOpenError(requests.RequestException):
+    """서킷이 열려 있어 요청을 보내지 않고 즉시 실패한 경우"""
+
+
+class RateLimitExceeded(requests.RequestException):
+    """토큰 버킷에서 대기 시간 안에 토큰을 얻지 못한 경우"""
+
+
+class TokenBucket:
+    """
+    토큰 버킷 rate limiter
+
+    Args:
+        rate: 초당 충전되는 토큰 수
+        capacity: 버킷 최대 크기 (버스트 허용량)
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout: float = 0.0) -> bool:
+        """
+        토큰 하나를 꺼냅니다. 부족하면 최대 timeout 초까지 기다립니다.
+
+        Returns:
+            bool: 토큰을 얻었으면 True
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class RetryBudget:
+    """
+    재시도 예산
+
+    최근 window 초 동안의 요청 수 대비 ratio 비율까지만 재시도를 허용합니다.
+    장애 상황에서 재시도가 트래픽을 몇 배로 불리는 것을 막기 위한 장치입니다.
+    min_retries 만큼은 트래픽이 적어도 항상 허용됩니다.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 3, window: float = 10.0):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._requests = deque()
+        self._retries = deque()
+        self._lock = threading.Lock()
+
+    def _trim(self, now: float):
+        for q in (self._requests, self._retries):
+            while q and now - q[0] > self.window:
+                q.popleft()
+
+    def record_request(self):
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            self._requests.append(now)
+
+    def try_spend(self) -> bool:
+        """재시도 1회를 예산에서 차감합니다. 예산이 없으면 False"""
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            allowed = max(self.min_retries, int(len(self._requests) * self.ratio))
+            if len(self._retries) >= allowed:
+                return False
+            self._retries.append(now)
+            return True
+
+
+class CircuitBreaker:
+    """
+    호스트 단위 서킷 브레이커
+
+    연속 실패가 failure_threshold 에 도달하면 open 되어 recovery_timeout 동안 즉시 실패합니다.
+    이후 half-open 상태에서 시험 요청을 허용하고, 성공하면 closed, 실패하면 다시 open 됩니다.
+    """
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0, half_open_max_calls: int = 1):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._lock = threading.Lock()
+        self.stats = {
+            "opened": 0,
+            "half_opened": 0,
+            "closed": 0,
+            "short_circuited": 0,
+            "successes": 0,
+            "failures": 0,
+        }
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = HALF_OPEN
+            self._half_open_calls = 0
+            self.stats["half_opened"] += 1
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+                self._half_open_calls += 1
+                return True
+            self.stats["short_circuited"] += 1
+            return False
+
+    def release(self):
+        """
+        결과를 판정하지 못하고 끝난 요청(취소 등)의 half-open 시험 슬롯을 반환합니다.
+        성공/실패로 기록하지 않으므로 다음 요청이 다시 시험 요청이 됩니다.
+        """
+        with self._lock:
+            if self._state == HALF_OPEN and self._half_open_calls > 0:
+                self._half_open_calls -= 1
+
+    def record_success(self):
+        with self._lock:
+            self.stats["successes"] += 1
+            self._failures = 0
+            if self._state != CLOSED:
+                self._state = CLOSED
+                self.stats["closed"] += 1
+
+    def record_failure(self):
+        with self._lock:
+            self.stats["failures"] += 1
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.stats["opened"] += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+
+class SingleFlight:
+    """
+    동일 키에 대한 동시 호출을 하나로 합칩니다.
+
+    먼저 들어온 호출만 fn 을 실행하고, 같은 키로 기다리던 나머지 호출은 그 결과(또는 예외)를 공유합니다.
+    """
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error: Optional[BaseException] = None
+
+    def __init__(self):
+        self._calls: Dict[Hashable, "SingleFlight._Call"] = {}
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "shared": 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            self.stats["calls"] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = SingleFlight._Call()
+            else:
+                self.stats["shared"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+
+class AsyncSingleFlight:
+    """
+    SingleFlight 의 asyncio 버전
+
+    같은 이벤트 루프 안에서 같은 키로 동시에 들어온 코루틴은 먼저 시작한 호출의 결과를 함께 기다립니다.
+    호출은 루프의 태스크로 실행되므로, 먼저 부른 쪽이 취소돼도(Deadline.acall 시간 초과 등)
+    같은 키를 기다리는 다른 호출은 결과를 받습니다.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, "asyncio.Task"] = {}
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "shared": 0}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+
+        async def run():
+            try:
+                return await fn()
+            finally:
+                with self._lock:
+                    if self._calls.get(flight_key) is asyncio.current_task():
+                        del self._calls[flight_key]
+
+        with self._lock:
+            self.stats["calls"] += 1
+            task = self._calls.get(flight_key)
+            if task is not None:
+                self.stats["shared"] += 1
+            else:
+                task = self._calls[flight_key] = loop.create_task(run())
+                # 기다리던 쪽이 모두 취소된 뒤 실패해도 'never retrieved' 경고가 남지 않도록
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return await asyncio.shield(task)
+
+
+class RequestMemo:
+    """
+    요청(질문) 하나 동안 같은 키의 외부 호출 결과를 재사용합니다.
+
+    SingleFlight 는 동시에 진행 중인 호출만 합치지만, RequestMemo 는 끝난 호출의 결과도
+    요청이 끝날 때까지 보관합니다. 요청마다 새로 만들어 쓰고 버리므로 만료 처리는 없습니다.
+    실패한 호출은 보관하지 않습니다.
+    """
+
+    def __init__(self):
+        self._results: Dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        # 비동기 호출은 태스크로 실행해, 먼저 부른 쪽이 취소돼도 같은 키를 기다리는 쪽은 결과를 받음
+        self._tasks: Dict[Hashable, "asyncio.Task"] = {}
+        self.stats = {"calls": 0, "executed": 0}
+
+    def _lookup(self, key: Hashable) -> Tuple[bool, Any]:
+        with self._lock:
+            if key in self._results:
+                return True, self._results[key]
+        return False, None
+
+    def _store(self, key: Hashable, result: Any) -> Any:
+        with self._lock:
+            self._results[key] = result
+        return result
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def get(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        self._count("calls")
+
+        def run():
+            found, result = self._lookup(key)
+            if found:
+                return result
+            self._count("executed")
+            return self._store(key, fn())
+
+        found, result = self._lookup(key)
+        if not found:
+            result = self._flight.do(key, run)
+        return result
+
+    async def aget(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self._count("calls")
+        found, result = self._lookup(key)
+        if found:
+            return result
+
+        loop = asyncio.get_running_loop()
+        task_key = (id(loop), key)
+
+        async def run():
+            self._count("executed")
+            try:
+                return self._store(key, await fn())
+            finally:
+                with self._lock:
+                    self._tasks.pop(task_key, None)
+
+        with self._lock:
+            task = self._tasks.get(task_key)
+            if task is None:
+                task = self._tasks[task_key] = loop.create_task(run())
+        return await asyncio.shield(task)
+
+    def get_stats(self) -> Dict[str, int]:
+        """calls: 전체 요청 수, executed: 실제 호출 수, hits: 보관된 결과나 진행 중인 호출을 재사용한 수"""
+        with self._lock:
+            stats = dict(self.stats)
+        stats["hits"] = stats["calls"] - stats["executed"]
+        return stats
+
+
+class ApiClient:
+    """
+    외부 API 호출 클라이언트
+
+    Args:
+        max_retries: 최초 요청 이후 최대 재시도 횟수
+        backoff_base: 백오프 기본 시간(초)
+        backoff_max: 백오프 최대 시간(초)
+        timeout: 기본 (connect, read) 타임아웃
+        default_rate: API 키별 기본 초당 요청 수
+        default_burst: API 키별 기본 버스트 크기
+        rate_limit_wait: 토큰을 기다리는 최대 시간(초)
+        failure_threshold: 서킷이 열리는 연속 실패 횟수
+        recovery_timeout: 서킷이 열린 뒤 half-open 으로 전환되기까지의 시간(초)
+        pool_maxsize: 호스트별 커넥션 풀 크기
+    """
+
+    def __init__(self,
+                max_retries: int = 2,
+                backoff_base: float = 0.3,
+                backoff_max: float = 3.0,
+                timeout: Tuple[float, float] = (3.05, 10.0),
+                default_rate: float = 10.0,
+                default_burst: int = 20,
+                rate_limit_wait: float = 5.0,
+                failure_threshold: int = 5,
+                recovery_timeout: float = 30.0,
+                retry_budget: Optional[RetryBudget] = None,
+                pool_maxsize: int = 20):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.default_rate = default_rate
+        self.default_burst = default_burst
+        self.rate_limit_wait = rate_limit_wait
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.retry_budget = retry_budget or RetryBudget()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=pool_maxsize)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._async_limits = httpx.Limits(max_connections=pool_maxsize, max_keepalive_connections=pool_maxsize)
+        # httpx.AsyncClient 는 생성된 이벤트 루프에서만 쓸 수 있으므로 루프별로 하나씩
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = \
+            weakref.WeakKeyDictionary()
+
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            "requests": 0,
+            "retries": 0,
+            "retry_budget_exhausted": 0,
+            "rate_limited": 0,
+        }
+
+    @staticmethod
+    def _key_id(api_key: str) -> str:
+        # API 키 원문은 메트릭/로그에 남기지 않음
+        return hashlib.sha1(api_key.encode("utf-8")).hexdigest()[:10]
+
+    def set_rate_limit(self, api_key: str, rate: float, burst: int):
+        """특정 API 키의 rate limit 설정"""
+        with self._lock:
+            self._buckets[self._key_id(api_key)] = TokenBucket(rate, burst)
+
+    def _get_bucket(self, api_key: str) -> TokenBucket:
+        key_id = self._key_id(api_key)
+        with self._lock:
+            if key_id not in self._buckets:
+                self._buckets[key_id] = TokenBucket(self.default_rate, self.default_burst)
+            return self._buckets[key_id]
+
+    def get_breaker(self, service: str) -> CircuitBreaker:
+        """서비스(기본은 호스트)별 서킷 브레이커"""
+        with self._lock:
+            if service not in self._breakers:
+                self._breakers[service] = CircuitBreaker(self.failure_threshold, self.recovery_timeout)
+            return self._breakers[service]
+
+    def _backoff(self, attempt: int) -> float:
+        # full jitter
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _bump(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def request(self, method: str, url: str, *,
+                api_key: Optional[str] = None,
+                timeout: Optional[Any] = None,
+                service: Optional[str] = None,
+                **kwargs) -> requests.Response:
+        """
+        재시도/rate limit/서킷 브레이커가 적용된 HTTP 요청
+
+        Args:
+            method: HTTP 메서드
+            url: 요청 URL
+            api_key: rate limit 을 적용할 API 키 (None 이면 미적용)
+            timeout: 요청 타임아웃 (None 이면 기본값)
+            service: 서킷 브레이커 키 (None 이면 호스트). 같은 호스트의 서로 다른 API 를 구분할 때 사용
+            **kwargs: requests.Session.request 에 그대로 전달
+
+        Returns:
+            requests.Response: 마지막 응답 (재시도 대상 상태 코드가 계속되면 그 응답 그대로)
+
+        Raises:
+            CircuitOpenError: 호스트 서킷이 열려 있을 때
+            RateLimitExceeded: rate limit 대기 시간을 초과했을 때
+            requests.RequestException: 재시도 후에도 연결/타임아웃 오류가 계속될 때
+        """
+        host = urlsplit(url).netloc
+        breaker = self.get_breaker(service or host)
+        timeout = timeout if timeout is not None else self.timeout
+        self._bump("requests")
+        self.retry_budget.record_request()
+
+        attempt = 0
+        while True:
+            # 토큰을 먼저 얻어야 rate limit 으로 실패해도 half-open 시험 슬롯을 잡고 있지 않음
+            if api_key and not self._get_bucket(api_key).acquire(self.rate_limit_wait):
+                self._bump("rate_limited")
+                raise RateLimitExceeded(f"Rate limit exceeded for host: {host}")
+            if not breaker.allow_request():
+                raise CircuitOpenError(f"Circuit open for: {service or host}")
+
+            error: Optional[requests.RequestException] = None
+            response: Optional[requests.Response] = None
+            try:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                # 오류 메시지의 URL 에 serviceKey 가 들어 있을 수 있음
+                error = _redacted(e)
+            except Exception:
+                # 재시도하지 않는 오류(InvalidURL, ChunkedEncodingError 등)도 결과는 서킷에 기록
+                breaker.record_failure()
+                raise
+            except BaseException:
+                breaker.release()
+                raise
+
+            if error is None and response.status_code not in RETRYABLE_STATUS:
+                breaker.record_success()
+                return response
+
+            breaker.record_failure()
+            reason = str(error) if error is not None else f"HTTP {response.status_code}"
+
+            if attempt >= self.max_retries:
+                logger.warning(f"Request to {host} failed after {attempt + 1} attempts: {reason}")
+                break
+            if not self.retry_budget.try_spend():
+                self._bump("retry_budget_exhausted")
+                logger.warning(f"Retry budget exhausted, giving up on {host}: {reason}")
+                break
+
+            attempt += 1
+            self._bump("retries")
+            delay = self._backoff(attempt)
+            logger.info(f"Retrying {host} (attempt {attempt}/{self.max_retries}) in {delay:.2f}s: {reason}")
+            time.sleep(delay)
+
+        if error is not None:
+            raise error from None
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def _async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = self._async_clients[loop] = httpx.AsyncClient(limits=self._async_limits)
+            return client
+
+    @staticmethod
+    def _httpx_timeout(timeout: Any) -> httpx.Timeout:
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return httpx.Timeout(read, connect=connect)
+        return httpx.Timeout(timeout)
+
+    async def _aacquire(self, bucket: TokenBucket) -> bool:
+        # 이벤트 루프를 막지 않도록 토큰이 생길 때까지 짧게 양보하며 재시도
+        deadline = time.monotonic() + self.rate_limit_wait
+        while not bucket.acquire(0.0):
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(min(0.05, 1.0 / bucket.rate))
+        return True
+
+    async def arequest(self, method: str, url: str, *,
+                       api_key: Optional[str] = None,
+                       timeout: Optional[Any] = None,
+                       service: Optional[str] = None,
+                       **kwargs) -> httpx.Response:
+        """
+        request 의 비동기 버전 (httpx.AsyncClient)
+
+        연결/타임아웃 오류는 동기 버전과 같은 requests.ConnectionError / requests.Timeout 으로 올립니다.
+
+        Args:
+            method: HTTP 메서드
+            url: 요청 URL
+            api_key: rate limit 을 적용할 API 키 (None 이면 미적용)
+            timeout: 요청 타임아웃 (None 이면 기본값)
+            service: 서킷 브레이커 키 (None 이면 호스트)
+            **kwargs: httpx.AsyncClient.request 에 그대로 전달
+
+        Returns:
+            httpx.Response: 마지막 응답
+        """
+        host = urlsplit(url).netloc
+        breaker = self.get_breaker(service or host)
+        timeout = self._httpx_timeout(timeout if timeout is not None else self.timeout)
+        client = self._async_client()
+        self._bump("requests")
+        self.retry_budget.record_request()
+
+        attempt = 0
+        while True:
+            if api_key and not await self._aacquire(self._get_bucket(api_key)):
+                self._bump("rate_limited")
+                raise RateLimitExceeded(f"Rate limit exceeded for host: {host}")
+            if not breaker.allow_request():
+                raise CircuitOpenError(f"Circuit open for: {service or host}")
+
+            error: Optional[requests.RequestException] = None
+            response: Optional[httpx.Response] = None
+            try:
+                response = await client.request(method, url, timeout=timeout, **kwargs)
+            except httpx.TimeoutException as e:
+                error = requests.Timeout(redact_url(str(e)))
+            except httpx.TransportError as e:
+                error = requests.ConnectionError(redact_url(str(e)))
+            except Exception:
+                breaker.record_failure()
+                raise
+            except BaseException:
+                # Deadline.acall 시간 초과 등으로 취소되면 판정 없이 시험 슬롯만 반환
+                breaker.release()
+                raise
+
+            if error is None and response.status_code not in RETRYABLE_STATUS:
+                breaker.record_success()
+                return response
+
+            breaker.record_failure()
+            reason = str(error) if error is not None else f"HTTP {response.status_code}"
+
+            if attempt >= self.max_retries:
+                logger.warning(f"Request to {host} failed after {attempt + 1} attempts: {reason}")
+                break
+            if not self.retry_budget.try_spend():
+                self._bump("retry_budget_exhausted")
+                logger.warning(f"Retry budget exhausted, giving up on {host}: {reason}")
+                break
+
+            attempt += 1
+            self._bump("retries")
+            delay = self._backoff(attempt)
+            logger.info(f"Retrying {host} (attempt {attempt}/{self.max_retries}) in {delay:.2f}s: {reason}")
+            await asyncio.sleep(delay)
+
+        if error is not None:
+            raise error from None
+        return response
+
+    async def aget(self, url: str, **kwargs) -> httpx.Response:
+        return await self.arequest("GET", url, **kwargs)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        호출 메트릭 조회
+
+        Returns:
+            Dict: 전체 카운터와 서비스(호스트)별 서킷 상태/전환 횟수
+        """
+        with self._lock:
+            breakers = dict(self._breakers)
+            stats = dict(self.stats)
+        hosts = {host: {"state": b.state, **b.stats} for host, b in breakers.items()}
+        stats["hosts"] = hosts
+        stats["open_hosts"] = [h for h, s in hosts.items() if s["state"] == OPEN]
+        stats["half_open_hosts"] = [h for h, s in hosts.items() if s["state"] == HALF_OPEN]
+        return stats
+
+
+# Global instance
+_client: Optional[ApiClient] = None
+_client_lock = threading.Lock()
+
+
+def get_api_client() -> ApiClient:
+    """프로세스 공용 ApiClient 인스턴스"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ApiClient()
+    return _client
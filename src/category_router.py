@@ -0,0 +1,174 @@
+"""
+임베딩 기반 카테고리 라우터
+
+검색용으로 이미 로드되어 있는 KURE-v1 임베딩으로 질문 카테고리를 결정합니다.
+카테고리별 예시 질문 임베딩의 평균(프로토타입)과 질문 임베딩의 코사인 유사도가
+임계값 이상인 카테고리를 모두 반환합니다 (복수 선택).
+
+검색에 쓰는 질문 임베딩(vm.embed_query)을 그대로 재사용하므로 추가 네트워크 호출이 없습니다.
+"""
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import vector_manger as vm
+
+logger = logging.getLogger(__name__)
+
+CATEGORIES = ["관광지", "숙박", "대중교통", "날씨"]
+
+# 테스트 케이스 CSV 외에 카테고리별로 추가하는 예시 질문
+SEED_EXAMPLES: Dict[str, List[str]] = {
+    "관광지": [
+        "강아지랑 갈 만한 관광지 추천해줘",
+        "반려견 동반 가능한 여행 코스 알려줘",
+        "고양이랑 가볼 만한 곳 있어?",
+        "반려동물 동반 가능한 카페나 식당 알려줘",
+        "속초 여행 추천해줘",
+    ],
+    "숙박": [
+        "반려견 동반 가능한 숙소 추천해줘",
+        "강아지랑 묵을 수 있는 펜션 있어?",
+        "제주도 반려동물 동반 가능한 호텔 추천해줘",
+        "고양이랑 1박 할 수 있는 숙박 시설 알려줘",
+    ],
+    "대중교통": [
+        "KTX 기차 반려동물 탑승 관련해서 알려줘",
+        "부산에서 기차나 버스에 반려견 태울 수 있어?",
+        "지하철에 강아지 데리고 타도 돼?",
+        "비행기에 고양이 데리고 탈 때 규정 알려줘",
+        "반려동물 이동장 크기 규정이 어떻게 돼?",
+    ],
+    "날씨": [
+        "서울 날씨 어때?",
+        "강릉으로 여행 가려고하는데 날씨가 괜찮을까?",
+        "내일 부산에 비 와?",
+        "이번 주말 제주도 기온 알려줘",
+    ],
+}
+
+# 이 유사도 이상인 카테고리를 선택
+ROUTER_THRESHOLD = float(os.getenv("CATEGORY_ROUTER_THRESHOLD", "0.55"))
+# 최고 유사도와의 차이가 이 값 이내인 카테고리만 함께 선택
+ROUTER_MARGIN = float(os.getenv("CATEGORY_ROUTER_MARGIN", "0.08"))
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+class EmbeddingCategoryRouter:
+    """
+    카테고리 프로토타입(센트로이드) 기반 라우터
+
+    Args:
+        embeddings: embed_documents / embed_query 를 제공하는 임베딩 객체 (None 이면 vm.get_embedding())
+        threshold: 카테고리 선택 최소 유사도
+        margin: 최고 유사도 대비 허용 차이
+    """
+
+    def __init__(self, embeddings: Optional[Any] = None,
+                 threshold: float = ROUTER_THRESHOLD, margin: float = ROUTER_MARGIN):
+        self._embeddings = embeddings
+        # 주입된 임베딩이 없으면 질문 임베딩은 검색과 같은 캐시(vm.embed_query)를 사용
+        self._injected = embeddings is not None
+        self.threshold = threshold
+        self.margin = margin
+        self.categories: List[str] = []
+        self.prototypes: Optional[np.ndarray] = None
+
+    @property
+    def embeddings(self):
+        if self._embeddings is None:
+            self._embeddings = vm.get_embedding()
+        return self._embeddings
+
+    def fit(self, samples: Sequence[Tuple[str, List[str]]]) -> "EmbeddingCategoryRouter":
+        """
+        (질문, [카테고리]) 목록으로 카테고리별 프로토타입 계산
+        복수 라벨 질문은 각 카테고리 프로토타입에 모두 반영됩니다.
+        """
+        queries = [q for q, _ in samples]
+        vectors = _normalize(np.asarray(self.embeddings.embed_documents(queries), dtype=np.float32))
+        categories, prototypes = [], []
+        for category in CATEGORIES:
+            rows = [i for i, (_, labels) in enumerate(samples) if category in labels]
+            if rows:
+                categories.append(category)
+                prototypes.append(vectors[rows].mean(axis=0))
+        self.categories = categories
+        self.prototypes = _normalize(np.vstack(prototypes)) if prototypes else None
+        logger.info(f"Category router prototypes built from {len(samples)} examples: {categories}")
+        return self
+
+    def similarities(self, query_vector: Sequence[float]) -> Dict[str, float]:
+        """질문 임베딩과 각 카테고리 프로토타입의 코사인 유사도"""
+        if self.prototypes is None:
+            raise ValueError("Router is not fitted")
+        vector = _normalize(np.asarray(query_vector, dtype=np.float32))
+        scores = self.prototypes @ vector
+        return {c: float(s) for c, s in zip(self.categories, scores)}
+
+    def route_vector(self, query_vector: Sequence[float]) -> List[str]:
+        """
+        이미 계산된 질문 임베딩으로 카테고리 결정
+
+        Returns:
+            List[str]: 임계값을 넘는 카테고리 (없으면 가장 유사한 카테고리 1개)
+        """
+        scores = self.similarities(query_vector)
+        best = max(scores.values())
+        selected = [c for c, s in scores.items() if s >= self.threshold and s >= best - self.margin]
+        return selected or [max(scores, key=scores.get)]
+
+    def route(self, query: str) -> List[str]:
+        """질문 → 카테고리 목록 (검색과 같은 캐시된 쿼리 임베딩 사용)"""
+        if not self._injected:
+            return self.route_vector(vm.embed_query(query))
+        return self.route_vector(self.embeddings.embed_query(query))
+
+    def evaluate(self, samples: Sequence[Tuple[str, List[str]]]) -> Dict[str, Any]:
+        """라벨링된 질문 기준 정확도 (임계값/마진 튜닝용)"""
+        vectors = self.embeddings.embed_documents([q for q, _ in samples])
+        predictions = [self.route_vector(v) for v in vectors]
+        correct = [set(p) == set(labels) for p, (_, labels) in zip(predictions, samples)]
+        return {
+            "samples": len(samples),
+            "exact_match_accuracy": sum(correct) / len(correct) if correct else None,
+            "predictions": [
+                {"query": q, "expected": labels, "predicted": p, "correct": c}
+                for (q, labels), p, c in zip(samples, predictions, correct)
+            ],
+        }
+
+
+def default_training_samples() -> List[Tuple[str, List[str]]]:
+    """테스트 케이스 CSV + SEED_EXAMPLES"""
+    from module import load_labelled_queries
+
+    samples: List[Tuple[str, List[str]]] = []
+    try:
+        samples.extend(load_labelled_queries())
+    except OSError as e:
+        logger.warning(f"Labelled queries not loaded: {str(e)}")
+    for category, queries in SEED_EXAMPLES.items():
+        samples.extend((q, [category]) for q in queries)
+    return samples
+
+
+_router: Optional[EmbeddingCategoryRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_category_router() -> EmbeddingCategoryRouter:
+    """프로세스 공용 라우터 (최초 호출 시 프로토타입 계산)"""
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = EmbeddingCategoryRouter().fit(default_training_samples())
+    return _router
@@ -0,0 +1,231 @@
+"""
+응답 프롬프트용 컨텍스트 빌더
+
+_generate_response 에 넘기는 검색 결과를 토큰 예산 안으로 줄입니다.
+
+1. page_content 정리: 숙박 데이터의 반복 문구("… 반려동물 동반 가능한 숙박업소입니다.")와
+   리스트 문자열("['a', 'b']") 등 정보가 없는 텍스트 제거
+2. 중복 제거: 같은 장소명(공백/괄호 제외) 또는 내용이 거의 같은 문서는 하나만 사용
+3. 우선순위 패킹: 날씨 → 카테고리별 순위 번갈아(1위끼리, 2위끼리 …) 순서로 예산까지 채움
+
+토큰 수는 tiktoken 으로 계산하며, 인코딩 파일을 받을 수 없는 환경에서는 글자 수 기반 추정치를 사용합니다.
+"""
+import logging
+import os
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import tiktoken
+from langchain.schema import Document
+
+logger = logging.getLogger(__name__)
+
+# 검색 결과(content)에 쓸 최대 토큰 수
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "2500"))
+# 이 값 이상이면 같은 장소로 판단 (문자 3-gram Jaccard)
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("CONTEXT_DUPLICATE_THRESHOLD", "0.85"))
+# 항상 먼저 넣는 카테고리
+PRIORITY_CATEGORIES = ("날씨",)
+
+# (정규식, 치환 문자열) - 위에서부터 순서대로 적용
+BOILERPLATE_RULES = [
+    # "부산광역시 해운대구에 위치한 '신라스테이 해운대'은(는) 반려동물 동반 가능한 숙박업소입니다."
+    (re.compile(r"^.*?에 위치한 '.*?'은\(는\) 반려동물 동반 가능한 숙박업소입니다\.\s*"), ""),
+    # "주소는 '…'이고, 반려동물 조건은 '…'입니다."
+    (re.compile(r"주소는 '(.*?)'이고, 반려동물 조건은 '(.*)'입니다\.?"), r"주소: \1\n반려동물 조건: \2"),
+    # "['반려 동물 불가능', '보조 동물 허용']" → "반려 동물 불가능, 보조 동물 허용"
+    (re.compile(r"\[((?:'[^']*'(?:,\s*)?)+)\]"), lambda m: ", ".join(re.findall(r"'([^']*)'", m.group(1)))),
+    (re.compile(r"[ \t]+"), " "),
+    (re.compile(r"\n\s*\n+"), "\n"),
+]
+
+_TITLE_NOISE = re.compile(r"[\s\(\)\[\]·・,.\-_'\"]+")
+
+
+def clean_content(text: str) -> str:
+    """page_content 에서 반복 문구/형식 잡음 제거"""
+    for pattern, replacement in BOILERPLATE_RULES:
+        text = pattern.sub(replacement, text)
+    return text.strip()
+
+
+def place_title(doc: Document) -> Optional[str]:
+    """문서의 장소명 (Tour API: title, 숙박 CSV: facility_name)"""
+    return doc.metadata.get("title") or doc.metadata.get("facility_name")
+
+
+def place_key(doc: Document) -> Optional[str]:
+    """중복 판정용 장소명 키 (공백/괄호/구두점 제거, 장소명이 없으면 None)"""
+    title = place_title(doc)
+    return _TITLE_NOISE.sub("", title) if title else None
+
+
+def _shingles(text: str, n: int = 3) -> Set[str]:
+    text = _TITLE_NOISE.sub("", text)
+    return {text[i:i + n] for i in range(max(1, len(text) - n + 1))}
+
+
+def _jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class TokenCounter:
+    """
+    tiktoken 기반 토큰 수 계산
+
+    인코딩을 로드할 수 없으면(오프라인 등) 한글 1자 = 1토큰, 그 외 4자 = 1토큰으로 추정합니다.
+    """
+
+    def __init__(self, model: str = "gpt-4o-mini"):
+        self.model = model
+        self._encoding = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def exact(self) -> bool:
+        self._load()
+        return self._encoding is not None
+
+    def _load(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            try:
+                self._encoding = tiktoken.encoding_for_model(self.model)
+            except Exception as e:
+                logger.warning(f"tiktoken encoding unavailable, using estimates: {str(e)}")
+            self._loaded = True
+
+    def count(self, text: str) -> int:
+        self._load()
+        if self._encoding is not None:
+            return len(self._encoding.encode(text))
+        hangul = sum(1 for ch in text if "가" <= ch <= "힣")
+        return hangul + (len(text) - hangul + 3) // 4
+
+
+class ContextBuilder:
+    """
+    토큰 예산 기반 컨텍스트 구성
+
+    Args:
+        budget: content 최대 토큰 수
+        duplicate_threshold: 내용 기반 중복 판단 기준
+        counter: TokenCounter (None 이면 공용 인스턴스)
+    """
+
+    def __init__(self, budget: int = CONTEXT_TOKEN_BUDGET,
+                 duplicate_threshold: float = NEAR_DUPLICATE_THRESHOLD,
+                 counter: Optional[TokenCounter] = None):
+        self.budget = budget
+        self.duplicate_threshold = duplicate_threshold
+        self.counter = counter or get_token_counter()
+
+    def _dedupe(self, results: Dict[str, List[Document]]) -> Tuple[Dict[str, List[Document]], int]:
+        seen_titles: Set[str] = set()
+        seen_shingles: List[Set[str]] = []
+        unique: Dict[str, List[Document]] = {}
+        duplicates = 0
+        for category, docs in results.items():
+            kept = []
+            for doc in docs:
+                title_key = place_key(doc)
+                shingles = _shingles(doc.page_content)
+                if (title_key and title_key in seen_titles) or any(
+                        _jaccard(shingles, s) >= self.duplicate_threshold for s in seen_shingles):
+                    duplicates += 1
+                    continue
+                if title_key:
+                    seen_titles.add(title_key)
+                seen_shingles.append(shingles)
+                kept.append(doc)
+            unique[category] = kept
+        return unique, duplicates
+
+    @staticmethod
+    def _priority_order(results: Dict[str, List[Document]]) -> List[Tuple[str, int]]:
+        """(카테고리, 인덱스) 목록: 우선 카테고리 전체 → 나머지 카테고리 순위 번갈아"""
+        order = [(c, i) for c in PRIORITY_CATEGORIES if c in results for i in range(len(results[c]))]
+        others = [c for c in results if c not in PRIORITY_CATEGORIES]
+        depth = max((len(results[c]) for c in others), default=0)
+        for rank in range(depth):
+            order.extend((c, rank) for c in others if rank < len(results[c]))
+        return order
+
+    def build(self, results: Dict[str, List[Document]],
+              format_doc: Callable[[int, Document], str]) -> Tuple[str, Dict[str, Any]]:
+        """
+        검색 결과 → 프롬프트용 content 문자열
+
+        Args:
+            results: {카테고리: [Document]} (카테고리 내부는 검색 순위 순)
+            format_doc: (카테고리 내 번호, 문서) → 문서 한 개의 텍스트
+
+        Returns:
+            Tuple[str, Dict]: (content, 보고서: tokens_before/tokens_after/docs_before/docs_after/
+                               duplicates/dropped/budget/exact_tokens)
+        """
+        results = {c: docs for c, docs in results.items() if docs}
+        before = _render(results, format_doc)
+        docs_before = sum(len(docs) for docs in results.values())
+
+        # 반복 문구를 먼저 지워야 템플릿이 같은 서로 다른 장소가 중복으로 판단되지 않음
+        cleaned, duplicates = self._dedupe({
+            c: [Document(page_content=clean_content(d.page_content), metadata=d.metadata) for d in docs]
+            for c, docs in results.items()
+        })
+
+        selected: Dict[str, List[int]] = {c: [] for c in cleaned}
+        used = 0
+        dropped = 0
+        for category, index in self._priority_order(cleaned):
+            # 번호는 최종 순서와 다를 수 있으므로 여기서는 비용만 계산
+            cost = self.counter.count(format_doc(len(selected[category]) + 1, cleaned[category][index]))
+            if category not in PRIORITY_CATEGORIES and used + cost > self.budget:
+                dropped += 1
+                continue
+            selected[category].append(index)
+            used += cost
+
+        packed = {c: [cleaned[c][i] for i in sorted(idx)] for c, idx in selected.items() if idx}
+        content = _render(packed, format_doc)
+        report = {
+            "tokens_before": self.counter.count(before),
+            "tokens_after": self.counter.count(content),
+            "docs_before": docs_before,
+            "docs_after": sum(len(docs) for docs in packed.values()),
+            "duplicates": duplicates,
+            "dropped": dropped,
+            "budget": self.budget,
+            "exact_tokens": self.counter.exact,
+        }
+        return content, report
+
+
+def _render(results: Dict[str, List[Document]], format_doc: Callable[[int, Document], str]) -> str:
+    sections = []
+    for category, docs in results.items():
+        if not docs:
+            continue
+        sections.append(f"### {category} 정보\n" + "".join(format_doc(i, doc) for i, doc in enumerate(docs, 1)))
+    return "\n".join(sections)
+
+
+_counter: Optional[TokenCounter] = None
+_counter_lock = threading.Lock()
+
+
+def get_token_counter() -> TokenCounter:
+    """프로세스 공용 TokenCounter"""
+    global _counter
+    if _counter is None:
+        with _counter_lock:
+            if _counter is None:
+                _counter = TokenCounter()
+    return _counter
@@ -0,0 +1,204 @@
+"""
+요청 단위 응답 시간 예산 (deadline)
+
+질문 하나를 처리하는 동안 LLM, Tour API, 기상청, VectorDB 저장이 모두 같은 예산을 나눠 씁니다.
+
+- 단계별 허용 시간: min(단계 상한, 남은 시간 - 답변 생성용 예약 시간)
+- 선택 단계(외부 보강, 날씨, DB 저장)는 허용 시간이 최소치보다 작으면 건너뜀
+- 시간 안에 끝나지 않은 단계는 기본값으로 대체하고 계속 진행 (스레드는 백그라운드에서 마저 실행)
+- 건너뛴 단계는 답변 끝에 안내 문구로 표시
+- 답변 생성은 예약 시간과 남은 시간 중 큰 값까지 기다린 뒤 지연 안내로 대체
+  (스트리밍이면 그 시각까지 받은 청크를 보내고 지연 안내로 끝냄)
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Executor, Future, TimeoutError as FutureTimeoutError
+from queue import Empty, Queue
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 요청 전체 예산 (초)
+REQUEST_DEADLINE = float(os.getenv("REQUEST_DEADLINE", "30"))
+# 답변 생성(LLM)을 위해 항상 남겨 두는 시간 (초)
+GENERATION_RESERVE = float(os.getenv("GENERATION_RESERVE", "15"))
+
+# 단계별 허용 시간 상한 (초)
+STAGE_ALLOWANCES: Dict[str, float] = {
+    "categories": 5.0,
+    "user_info": 5.0,
+    "weather": 3.0,
+    "augment": 8.0,
+    "db_write": 5.0,
+}
+# 선택 단계를 시작하기 위한 최소 허용 시간 (초) - 이보다 적게 남으면 건너뜀
+OPTIONAL_MINIMUMS: Dict[str, float] = {
+    "weather": 0.5,
+    "augment": 2.0,
+    "db_write": 1.0,
+}
+# 답변에 표시할 건너뛴 단계 이름 (None 이면 표시하지 않음)
+SKIP_LABELS: Dict[str, Optional[str]] = {
+    "categories": "질문 유형 분석",
+    "user_info": "지역/일정 분석",
+    "weather": "날씨 정보",
+    "augment": "외부 API 최신 장소 정보",
+    "db_write": None,
+}
+GENERATION_TIMEOUT_MESSAGE = "죄송합니다. 답변 생성이 지연되고 있습니다. 잠시 후 다시 시도해 주세요."
+WEATHER_SKIPPED_MESSAGE = "응답 시간 제한으로 날씨 정보를 조회하지 못했습니다."
+
+
+class Deadline:
+    """
+    요청 하나의 시간 예산
+
+    Args:
+        budget: 전체 예산 (초)
+        reserve: 답변 생성용으로 남겨 둘 시간 (초)
+        clock: 시간 함수 (테스트용)
+    """
+
+    def __init__(self, budget: float = REQUEST_DEADLINE, reserve: float = GENERATION_RESERVE,
+                 clock: Callable[[], float] = time.monotonic):
+        self.budget = budget
+        self.reserve = reserve
+        self._clock = clock
+        self._expires_at = clock() + budget
+        self._lock = threading.Lock()
+        self.skipped: List[str] = []
+
+    def remaining(self) -> float:
+        return max(0.0, self._expires_at - self._clock())
+
+    def allowance(self, stage: str) -> float:
+        """단계에 줄 수 있는 시간 (상한과 '남은 시간 - 예약 시간' 중 작은 값)"""
+        return max(0.0, min(STAGE_ALLOWANCES.get(stage, self.budget), self.remaining() - self.reserve))
+
+    def generation_allowance(self) -> float:
+        """답변 생성에 줄 시간 (앞 단계가 늦어져도 예약 시간은 보장)"""
+        return max(self.reserve, self.remaining())
+
+    def allows(self, stage: str, record: bool = True) -> bool:
+        """
+        선택 단계를 시작해도 되는지 (허용 시간이 최소치 이상)
+
+        record=False 이면 제외 항목으로 기록하지 않습니다 (사용자가 묻지 않은 정보를 미리 가져오는 경우).
+        """
+        if self.allowance(stage) >= OPTIONAL_MINIMUMS.get(stage, 0.0):
+            return True
+        if record:
+            self.skip(stage, "budget exhausted")
+        return False
+
+    def skip(self, stage: str, reason: str):
+        with self._lock:
+            if stage not in self.skipped:
+                self.skipped.append(stage)
+        logger.warning(f"Skipped stage '{stage}' ({reason}, {self.remaining():.1f}s left)")
+
+    def note(self) -> str:
+        """건너뛴 단계 안내 문구 (표시할 것이 없으면 빈 문자열)"""
+        labels = [SKIP_LABELS.get(s, s) for s in self.skipped]
+        labels = [label for label in labels if label]
+        if not labels:
+            return ""
+        return f"\n\n> ⏱️ 빠른 응답을 위해 다음 정보는 제외되었습니다: {', '.join(labels)}"
+
+    def timeout_for(self, stage: str) -> float:
+        return self.generation_allowance() if stage == "generate" else self.allowance(stage)
+
+    def call(self, stage: str, fn: Callable[[], Any], fallback: Callable[[], Any],
+             executor: Optional[Executor] = None) -> Any:
+        """
+        허용 시간 안에서 fn 실행 (초과하면 fallback() 결과를 반환하고 fn 은 백그라운드에서 계속 실행)
+
+        기본은 호출마다 전용 데몬 스레드에서 실행합니다. 공용 풀을 쓰면 시간 초과로 버려진 호출이
+        워커를 붙잡아, 뒤의 요청이 대기열에서 허용 시간을 다 쓰고 기본값으로 대체되기 때문입니다.
+        executor 를 주면 그 풀에서 실행하고, 허용 시간은 fn 이 실제로 시작된 시점부터 잽니다.
+        """
+        if executor is None:
+            future: Future = Future()
+
+            def run():
+                try:
+                    future.set_result(fn())
+                except BaseException as e:
+                    future.set_exception(e)
+
+            threading.Thread(target=run, name=f"deadline-{stage}", daemon=True).start()
+        else:
+            started = threading.Event()
+
+            def run():
+                started.set()
+                return fn()
+
+            future = executor.submit(run)
+            started.wait()
+        try:
+            return future.result(timeout=self.timeout_for(stage))
+        except FutureTimeoutError:
+            self.skip(stage, "timed out")
+            return fallback()
+
+    def stream(self, chunks: Iterable[Any], stage: str = "generate") -> Iterator[Any]:
+        """
+        스트리밍 답변을 생성 허용 시간 안에서 전달
+
+        첫 청크를 기다리기 시작할 때 generation_allowance() 로 생성 마감 시각을 정하고, 그 시각이 지나면
+        원본 스트림을 닫고(LLM 동시성 슬롯 반환) GENERATION_TIMEOUT_MESSAGE 로 끝냅니다.
+        청크는 전용 데몬 스레드에서 받아 오므로 멈춘 LLM 호출도 마감 시각에 끊깁니다.
+        """
+        queue: "Queue[Tuple[str, Any]]" = Queue()
+        stop = threading.Event()
+
+        def produce():
+            iterator = iter(chunks)
+            try:
+                for chunk in iterator:
+                    queue.put(("chunk", chunk))
+                    if stop.is_set():
+                        break
+                else:
+                    queue.put(("done", None))
+            except BaseException as e:
+                queue.put(("error", e))
+            finally:
+                close = getattr(iterator, "close", None)
+                if close is not None:
+                    close()
+
+        threading.Thread(target=produce, name=f"deadline-{stage}", daemon=True).start()
+        ends_at = self._clock() + self.generation_allowance()
+        sent = False
+        try:
+            while True:
+                try:
+                    remaining = ends_at - self._clock()
+                    if remaining <= 0:
+                        raise Empty
+                    kind, value = queue.get(timeout=remaining)
+                except Empty:
+                    self.skip(stage, "timed out")
+                    yield f"\n\n{GENERATION_TIMEOUT_MESSAGE}" if sent else GENERATION_TIMEOUT_MESSAGE
+                    return
+                if kind == "done":
+                    return
+                if kind == "error":
+                    raise value
+                sent = sent or bool(value)
+                yield value
+        finally:
+            stop.set()
+
+    async def acall(self, stage: str, awaitable: Awaitable[Any], fallback: Callable[[], Any]) -> Any:
+        """call 의 비동기 버전 (초과하면 awaitable 을 취소)"""
+        try:
+            return await asyncio.wait_for(awaitable, timeout=self.timeout_for(stage))
+        except asyncio.TimeoutError:
+            self.skip(stage, "timed out")
+            return fallback()
@@ -0,0 +1,125 @@
+"""
+질문 임베딩 마이크로 배칭
+
+여러 Streamlit 세션이 동시에 질문을 임베딩하면 배치 크기 1 인 forward 가 CPU 스레드를 두고 경쟁합니다.
+EmbeddingBatcher 는 짧은 시간(max_wait_ms) 안에 들어온 질문을 모아 한 번의 embed_documents 로 계산하고,
+호출한 스레드마다 자기 벡터를 돌려줍니다.
+
+- 배치는 첫 질문이 들어온 뒤 max_wait_ms 가 지나거나 batch_size 개가 모이면 바로 실행
+- 같은 배치 안의 같은 질문은 한 번만 계산
+- 대기열 시간(queue_wait)과 계산 시간(compute)을 따로 기록
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# 한 번의 forward 에 넣을 최대 질문 수
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "16"))
+# 첫 질문 이후 다른 질문을 기다리는 최대 시간 (ms)
+EMBED_BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "5"))
+
+
+class _Request:
+    def __init__(self, text: str):
+        self.text = text
+        self.enqueued = time.perf_counter()
+        self.done = threading.Event()
+        self.vector: Optional[List[float]] = None
+        self.error: Optional[BaseException] = None
+
+
+class EmbeddingBatcher:
+    """
+    질문 임베딩을 모아서 계산하는 디스패처 (전용 스레드 하나)
+
+    Args:
+        embed_documents: 문장 목록 → 벡터 목록 (예: HuggingFaceEmbeddings.embed_documents)
+        batch_size: 배치 최대 크기
+        max_wait_ms: 첫 질문이 들어온 뒤 배치를 채우려고 기다리는 최대 시간 (ms)
+    """
+
+    def __init__(self, embed_documents: Callable[[List[str]], Sequence[Sequence[float]]],
+                 batch_size: int = EMBED_BATCH_SIZE, max_wait_ms: float = EMBED_BATCH_WAIT_MS):
+        self._embed_documents = embed_documents
+        self.batch_size = max(1, batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: "deque[_Request]" = deque()
+        self._cond = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self.stats = {"requests": 0, "batches": 0, "batched": 0, "computed": 0, "max_batch": 0, "errors": 0}
+        # 대기열에 들어온 뒤 배치 계산이 시작될 때까지
+        self.queue_wait = LatencyHistogram()
+        # 배치 한 번의 embed_documents 시간
+        self.compute = LatencyHistogram()
+
+    def embed(self, text: str) -> List[float]:
+        """질문 하나의 벡터 (같은 시점의 다른 질문과 한 배치로 계산될 때까지 대기)"""
+        request = _Request(text)
+        with self._cond:
+            self.stats["requests"] += 1
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._worker.start()
+            self._queue.append(request)
+            self._cond.notify()
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.vector
+
+    def _next_batch(self) -> List[_Request]:
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            deadline = self._queue[0].enqueued + self.max_wait
+            while len(self._queue) < self.batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            started = time.perf_counter()
+            for request in batch:
+                self.queue_wait.observe(started - request.enqueued)
+            texts = list(dict.fromkeys(request.text for request in batch))
+            try:
+                vectors = dict(zip(texts, self._embed_documents(texts)))
+                for request in batch:
+                    request.vector = list(vectors[request.text])
+            except Exception as e:
+                logger.error(f"Embedding batch of {len(texts)} failed: {str(e)}")
+                for request in batch:
+                    request.error = e
+            finally:
+                self.compute.observe(time.perf_counter() - started)
+                with self._cond:
+                    self.stats["batches"] += 1
+                    self.stats["batched"] += len(batch)
+                    self.stats["computed"] += len(texts)
+                    self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+                    if batch[0].error is not None:
+                        self.stats["errors"] += 1
+                for request in batch:
+                    request.done.set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            stats = dict(self.stats)
+            stats["pending"] = len(self._queue)
+        stats["mean_batch"] = stats["batched"] / stats["batches"] if stats["batches"] else None
+        stats["batch_size"] = self.batch_size
+        stats["max_wait_ms"] = self.max_wait * 1000.0
+        stats["queue_wait"] = self.queue_wait.snapshot()
+        stats["compute"] = self.compute.snapshot()
+        return stats
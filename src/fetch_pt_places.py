@@ -1,22 +1,46 @@
-import subprocess
-import json
+import asyncio
+import logging
 import os 
 from typing import List, Dict, Optional
 from dotenv import load_dotenv 
+from api_client import get_api_client
 
 # load key 
 load_dotenv()
 service_key = os.getenv('TOUR_API_KEY')
 
-def fetch_area_items(area_code: Optional[int] = None) -> List[Dict]:
+logger = logging.getLogger(__name__)
+
+# 기상청 API 와 같은 apis.data.go.kr 호스트이므로 서킷 브레이커는 서비스 이름으로 구분
+TOUR_SERVICE = "tour"
+
+def _get_json(url: str, api_key: Optional[str]) -> Dict:
+    """Tour API 호출 (serviceKey 가 이미 URL 에 인코딩되어 포함된 상태)"""
+    response = get_api_client().get(url, api_key=api_key, service=TOUR_SERVICE)
+    response.raise_for_status()
+    return response.json()
+
+async def _aget_json(url: str, api_key: Optional[str]) -> Dict:
+    """_get_json 의 비동기 버전"""
+    response = await get_api_client().aget(url, api_key=api_key, service=TOUR_SERVICE)
+    response.raise_for_status()
+    return response.json()
+
+def _area_items_url(area_code: Optional[int] = None) -> str:
     url = (
         f"https://apis.data.go.kr/B551011/KorPetTourService/areaCode"
         f"?serviceKey={service_key}&MobileOS=ETC&MobileApp=TestApp&_type=json&numOfRows=100"
     )
     if area_code:
         url += f"&areaCode={area_code}"
-    result = subprocess.run(['curl', '-s', url], capture_output=True, text=True, check=True)
-    data = json.loads(result.stdout)
+    return url
+
+def fetch_area_items(area_code: Optional[int] = None) -> List[Dict]:
+    data = _get_json(_area_items_url(area_code), service_key)
+    return data["response"]["body"]["items"]["item"]
+
+async def afetch_area_items(area_code: Optional[int] = None) -> List[Dict]:
+    data = await _aget_json(_area_items_url(area_code), service_key)
     return data["response"]["body"]["items"]["item"]
 
 def match_region_to_codes(region: str) -> (Optional[int], Optional[int]):
@@ -37,11 +61,28 @@ def match_region_to_codes(region: str) -> (Optional[int], Optional[int]):
                     return area_code, sigungu["code"]
                 
     except Exception as e:
-        print("❌ 지역 매핑 실패:", e)
+        logger.error(f"지역 매핑 실패: {e}")
     return None, None
 
-def fetch_area_based_places(area_code: int, service_key: str, sigungu_code: Optional[int] = None, limit: int = 5) -> List[Dict]:
-    """지역 기반 관광지 검색"""
+async def amatch_region_to_codes(region: str) -> (Optional[int], Optional[int]):
+    """match_region_to_codes 의 비동기 버전 (시/도별 시군구 목록을 동시에 조회)"""
+    try:
+        area_items = await afetch_area_items()
+        for item in area_items:
+            if region in item["name"] or item["name"] in region:
+                return item["code"], None
+
+        sigungu_lists = await asyncio.gather(*(afetch_area_items(area_code=a["code"]) for a in area_items))
+        for area_item, sigungu_items in zip(area_items, sigungu_lists):
+            for sigungu in sigungu_items:
+                if region in sigungu["name"] or sigungu["name"] in region:
+                    return area_item["code"], sigungu["code"]
+
+    except Exception as e:
+        logger.error(f"지역 매핑 실패: {e}")
+    return None, None
+
+def _area_based_url(area_code: int, service_key: str, sigungu_code: Optional[int], limit: int) -> str:
     url = (
         f"https://apis.data.go.kr/B551011/KorPetTourService/areaBasedList"
         f"?serviceKey={service_key}&MobileOS=ETC&MobileApp=TestApp&_type=json"
@@ -49,34 +90,57 @@ def fetch_area_based_places(area_code: int, service_key: str, sigungu_code: Opti
     )
     if sigungu_code:
         url += f"&sigunguCode={sigungu_code}"
+    return url
+
+def fetch_area_based_places(area_code: int, service_key: str, sigungu_code: Optional[int] = None, limit: int = 5) -> List[Dict]:
+    """지역 기반 관광지 검색"""
     try:
-        result = subprocess.run(['curl', '-s', url], capture_output=True, text=True, check=True)
-        data = json.loads(result.stdout)
+        data = _get_json(_area_based_url(area_code, service_key, sigungu_code, limit), service_key)
         return data.get("response", {}).get("body", {}).get("items", {}).get("item", [])
     except Exception as e:
-        print("❌ 관광지 목록 조회 실패:", e)
+        logger.error(f"관광지 목록 조회 실패: {e}")
     return []
 
-def get_pet_tour_detail(contentid: int, service_key: str) -> str:
-    url = (
+async def afetch_area_based_places(area_code: int, service_key: str, sigungu_code: Optional[int] = None, limit: int = 5) -> List[Dict]:
+    """fetch_area_based_places 의 비동기 버전"""
+    try:
+        data = await _aget_json(_area_based_url(area_code, service_key, sigungu_code, limit), service_key)
+        return data.get("response", {}).get("body", {}).get("items", {}).get("item", [])
+    except Exception as e:
+        logger.error(f"관광지 목록 조회 실패: {e}")
+    return []
+
+def _pet_detail_url(contentid: int, service_key: str) -> str:
+    return (
         f"https://apis.data.go.kr/B551011/KorPetTourService/detailPetTour"
         f"?serviceKey={service_key}&MobileOS=ETC&MobileApp=TestApp&_type=json&contentId={contentid}"
     )
+
+def _parse_pet_detail(data: Dict) -> str:
+    items = data.get("response", {}).get("body", {}).get("items", {}).get("item", {})
+    if isinstance(items, list):
+        return items[0].get("acmpyPsblCpam", "정보 없음")
+    elif isinstance(items, dict):
+        return items.get("acmpyPsblCpam", "정보 없음")
+    return "정보 없음"
+
+def get_pet_tour_detail(contentid: int, service_key: str) -> str:
+    try:
+        return _parse_pet_detail(_get_json(_pet_detail_url(contentid, service_key), service_key))
+    except Exception as e:
+        logger.error(f"상세 정보 조회 실패(contentid={contentid}): {e}")
+    return "정보 없음"
+
+async def aget_pet_tour_detail(contentid: int, service_key: str) -> str:
     try:
-        result = subprocess.run(['curl', '-s', url], capture_output=True, text=True, check=True)
-        data = json.loads(result.stdout)
-        items = data.get("response", {}).get("body", {}).get("items", {}).get("item", {})
-        if isinstance(items, list):
-            return items[0].get("acmpyPsblCpam", "정보 없음")
-        elif isinstance(items, dict):
-            return items.get("acmpyPsblCpam", "정보 없음")
+        return _parse_pet_detail(await _aget_json(_pet_detail_url(contentid, service_key), service_key))
     except Exception as e:
-        print(f"❌ 상세 정보 조회 실패(contentid={contentid}):", e)
+        logger.error(f"상세 정보 조회 실패(contentid={contentid}): {e}")
     return "정보 없음"
 
 def fetch_pet_friendly_places_only(user_input: Dict, limit: int = 5) -> List[Dict]:
     region = user_input["region"]
-    print(region)
+    logger.info(f"Fetching pet friendly places for region: {region}")
     area_code, sigungu_code = match_region_to_codes(region)
     if not area_code:
         return []
@@ -86,6 +150,20 @@ def fetch_pet_friendly_places_only(user_input: Dict, limit: int = 5) -> List[Dic
 
     return api_results
 
+async def afetch_pet_friendly_places_only(user_input: Dict, limit: int = 5) -> List[Dict]:
+    """fetch_pet_friendly_places_only 의 비동기 버전 (장소별 상세 조회를 동시에)"""
+    region = user_input["region"]
+    logger.info(f"Fetching pet friendly places for region: {region}")
+    area_code, sigungu_code = await amatch_region_to_codes(region)
+    if not area_code:
+        return []
+    api_results = await afetch_area_based_places(area_code, service_key, sigungu_code=sigungu_code, limit=limit)
+    details = await asyncio.gather(*(aget_pet_tour_detail(place["contentid"], service_key) for place in api_results))
+    for place, pet_info in zip(api_results, details):
+        place["pet_info"] = pet_info
+
+    return api_results
+
 
 # if __name__ == '__main__':
 #     user_input = {
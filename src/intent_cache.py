@@ -0,0 +1,237 @@
+"""
+질문 의도 분석(LLM) 결과 캐시
+
+사이드바 예시 질문처럼 같은(또는 공백/문장부호만 다른) 질문이 반복되면
+get_category / get_user_parser 의 LLM 호출 결과를 재사용합니다.
+
+- 키: 정규화된 질문 + 프롬프트 버전 해시 (module.py 의 프롬프트 템플릿이 바뀌면 자동으로 새 키 사용)
+- 메모리 캐시: LRU + TTL
+- 디스크 캐시(선택): INTENT_CACHE_DIR/<프롬프트 버전>/ 아래 JSON 파일 (프로세스 재시작/워커 간 공유)
+- single-flight: 같은 질문에 대한 동시 캐시 미스는 한 번만 호출 (동기/비동기 각각)
+- 다른 프롬프트 버전 디렉토리는 TTL 동안 쓰이지 않은 것만 삭제 (롤링 배포 중인 이전 워커의 캐시 보존)
+"""
+import copy
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from api_client import AsyncSingleFlight, SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# 기본 유효 기간 (초) - 의도 분석 결과는 프롬프트가 같으면 거의 바뀌지 않음
+DEFAULT_TTL = float(os.getenv("INTENT_CACHE_TTL", str(7 * 24 * 3600)))
+DEFAULT_MAX_ENTRIES = int(os.getenv("INTENT_CACHE_MAX_ENTRIES", "2048"))
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCT = re.compile(r"[\s.,!?~…]+$")
+_VERSION_DIR = re.compile(r"^[0-9a-f]{12}$")
+
+
+def normalize_query(query: str) -> str:
+    """
+    캐시 키용 질문 정규화 (NFKC, 소문자, 공백 압축, 끝 문장부호 제거)
+
+    Example:
+        "  서울   날씨 어때?? " → "서울 날씨 어때"
+    """
+    text = unicodedata.normalize("NFKC", query).lower()
+    text = _WHITESPACE.sub(" ", text).strip()
+    return _TRAILING_PUNCT.sub("", text)
+
+
+def prompt_version(*parts: Any) -> str:
+    """프롬프트 템플릿/스키마/모델 이름 등으로 만든 버전 해시 (12자리)"""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(repr(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()[:12]
+
+
+class IntentCache:
+    """
+    의도 분석 결과 캐시
+
+    Args:
+        version: 프롬프트 버전 해시 (키와 디스크 경로에 포함)
+        cache_dir: 디스크 캐시 디렉토리 (None 이면 메모리 캐시만 사용)
+        max_entries: 메모리 캐시 최대 항목 수 (LRU)
+        ttl: 유효 기간 (초)
+    """
+
+    def __init__(self, version: str, cache_dir: Optional[str] = None,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL):
+        self.version = version
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.cache_dir = Path(cache_dir) / version if cache_dir else None
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._async_flight = AsyncSingleFlight()
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        self._kind_stats: Dict[str, Dict[str, int]] = {}
+
+    def key(self, kind: str, query: str) -> str:
+        raw = f"{self.version}\x00{kind}\x00{normalize_query(query)}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _bump(self, kind: str, name: str):
+        with self._lock:
+            self.stats[name] += 1
+            per_kind = self._kind_stats.setdefault(kind, {"hits": 0, "misses": 0})
+            if name in per_kind:
+                per_kind[name] += 1
+            elif name == "disk_hits":
+                per_kind["hits"] += 1
+
+    def _get_memory(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if time.time() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _set_memory(self, key: str, value: Any, expires_at: float):
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def _disk_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _get_disk(self, key: str) -> Optional[Tuple[float, Any]]:
+        try:
+            with open(self._disk_path(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if time.time() >= entry["expires_at"]:
+            return None
+        return entry["expires_at"], entry["value"]
+
+    def _set_disk(self, key: str, kind: str, query: str, value: Any, expires_at: float):
+        path = self._disk_path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"expires_at": expires_at, "kind": kind, "query": normalize_query(query),
+                           "value": value}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError) as e:
+            logger.warning(f"Failed to write intent cache: {e}")
+
+    def get(self, kind: str, query: str) -> Optional[Any]:
+        """캐시된 값 (없으면 None). 반환값은 복사본입니다."""
+        key = self.key(kind, query)
+        value = self._get_memory(key)
+        if value is not None:
+            self._bump(kind, "hits")
+            return copy.deepcopy(value)
+        if self.cache_dir:
+            entry = self._get_disk(key)
+            if entry is not None:
+                self._bump(kind, "disk_hits")
+                self._set_memory(key, entry[1], entry[0])
+                return copy.deepcopy(entry[1])
+        self._bump(kind, "misses")
+        return None
+
+    def set(self, kind: str, query: str, value: Any):
+        key = self.key(kind, query)
+        expires_at = time.time() + self.ttl
+        self._set_memory(key, copy.deepcopy(value), expires_at)
+        if self.cache_dir:
+            self._set_disk(key, kind, query, value, expires_at)
+
+    def get_or_compute(self, kind: str, query: str, compute: Callable[[], Any]) -> Any:
+        """
+        캐시된 값을 반환하거나, 없으면 compute() 결과를 저장 후 반환합니다.
+        같은 질문에 대한 동시 미스는 compute() 를 한 번만 실행합니다.
+        """
+        value = self.get(kind, query)
+        if value is not None:
+            return value
+
+        def load():
+            result = compute()
+            if result is not None:
+                self.set(kind, query, result)
+            return result
+
+        return copy.deepcopy(self._flight.do(self.key(kind, query), load))
+
+    async def aget_or_compute(self, kind: str, query: str, acompute: Callable[[], Awaitable[Any]]) -> Any:
+        """get_or_compute 의 비동기 버전 (acompute 는 코루틴 함수, 같은 루프의 동시 미스는 한 번만 실행)"""
+        value = self.get(kind, query)
+        if value is not None:
+            return value
+
+        async def load():
+            result = await acompute()
+            if result is not None:
+                self.set(kind, query, result)
+            return result
+
+        return copy.deepcopy(await self._async_flight.do(self.key(kind, query), load))
+
+    def prune_stale_versions(self, max_age: Optional[float] = None) -> int:
+        """
+        다른 프롬프트 버전의 디스크 캐시 디렉토리 중 max_age(기본 ttl) 초 넘게 쓰이지 않은 것만 삭제
+
+        롤링 배포 중에는 이전 버전 워커가 아직 자기 디렉토리를 쓰고 있으므로, 최근에 항목이 추가된
+        디렉토리(mtime 기준)는 남겨 둡니다.
+
+        Returns:
+            int: 삭제한 디렉토리 수
+        """
+        if not self.cache_dir:
+            return 0
+        cutoff = time.time() - (self.ttl if max_age is None else max_age)
+        removed = 0
+        for path in self.cache_dir.parent.iterdir():
+            if path.is_dir() and _VERSION_DIR.match(path.name) and path.name != self.version \
+                    and path.stat().st_mtime < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """hits / disk_hits / misses / hit_rate (+ 종류별 hit_rate)"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+            kinds = {k: dict(v) for k, v in self._kind_stats.items()}
+        stats["version"] = self.version
+        stats["coalesced"] = self._flight.stats["shared"] + self._async_flight.stats["shared"]
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        for kind_stats in kinds.values():
+            total = kind_stats["hits"] + kind_stats["misses"]
+            kind_stats["hit_rate"] = kind_stats["hits"] / total if total else 0.0
+        stats["kinds"] = kinds
+        return stats
@@ -1,7 +1,10 @@
 """ Pet Travel Chatbot System"""
 import logging
+import asyncio
+import re
+import time
 import traceback
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any, Tuple, Union
 from langchain.schema import Document
 from langchain_openai import ChatOpenAI
 from langchain.prompts import PromptTemplate
@@ -15,8 +18,15 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 import vector_manger as vm
-from module import get_category, get_user_parser, get_naver_map_link
-from weather import get_weather, get_current_time
+from module import get_user_parser, get_naver_map_link, analyze_query, aanalyze_query, local_intent
+from weather import (get_weather, get_current_time, get_weather_batch, format_daily_forecast,
+                     aget_weather, aget_weather_batch)
+from query_extractor import get_query_extractor
+from llm_gateway import get_llm_gateway, build_response_prompt
+from context_builder import ContextBuilder, place_title
+from response_cache import get_response_cache
+from metrics import LatencyHistogram
+from deadline import Deadline, GENERATION_TIMEOUT_MESSAGE, WEATHER_SKIPPED_MESSAGE
 
 # Load environment variables
 load_dotenv()
@@ -28,6 +38,87 @@ os.makedirs(log_dir, exist_ok=True)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Common weather keywords and modifiers to exclude
+WEATHER_KEYWORDS = ["날씨", "기온", "온도", "비", "눈", "바람", "습도", "맑", "흐림", "현재", "지금", "오늘", "내일", "어때"]
+# Simple region extraction patterns - prioritize patterns that come before weather keywords
+WEATHER_CITY_PATTERNS = [
+    re.compile(r'([가-힣]+(?:시|구|군|도))\s*(?:의\s*)?(?:날씨|기온|온도|현재)'),  # 서울시 날씨, 강남구 날씨
+    re.compile(r'([가-힣]+)\s*(?:의\s*)?(?:날씨|기온|온도)'),      # 서울 날씨, 서울의 날씨
+    re.compile(r'([가-힣]+)\s+(?:현재|지금)'),                    # 서울 현재, 부산 지금
+]
+HANGUL_WORD_PATTERN = re.compile(r'[가-힣]+')
+
+# 응답 프롬프트: 고정 지침(system)을 앞에, 요청마다 바뀌는 값(human)을 뒤에 두어 프롬프트 prefix 캐시가 적용되도록 구성
+RESPONSE_SYSTEM_PROMPT = """
+                당신은 반려동물과의 여행을 도와주는 감성적인 여행 플래너, 가이드 입니다.  
+                사용자 메시지의 정보에 따라 **정확히 날씨 응답인지, 여행 코스 요청인지 구분하여 답변**하세요.
+
+                🎯 작성 지침:
+
+                1. **사용자가 '날씨'만 요청한 경우에는**,  
+                    - 해당지역 기온/날씨/풍속/습도 + 반려동물 외출시 유의사항 포함하여 작성해주세요
+                    - 날씨 이외에는 정보를 작성하지 마세요 
+                    - 외출 시 주의사항은 아래의 예시를 참고하여 애완동물과 함께 외출 시 주의사항을 작성해주세요.
+                    [예시]
+                    안녕하세요! 😊  
+                    서울의 현재 날씨를 알려드릴게요.
+
+                    🌤️ **오늘의 서울 날씨**  
+                    - 🌡️ 기온: **18.5°C**  
+                    - 💧 습도: **55%**  
+                    - 🌬️ 바람: **1.5 m/s**  
+                    - 🌤️ 날씨 상태: **맑음**
+
+                    맑고 산뜻한 날씨네요!  
+                    반려동물과 외출하시기 좋은 날이에요. 🐶💕
+
+                    **🐾 외출 시 주의사항**  
+                    - 햇빛이 강할 수 있으니 **그늘에서 쉬는 시간**을 자주 주세요.  
+                    - **수분 보충**을 위해 물을 꼭 챙겨주세요.  
+                    - **뜨거운 아스팔트**로부터 발바닥을 보호해 주세요.
+
+                    오늘도 반려동물과 함께 행복한 하루 보내세요! 🌈✨
+                    
+                    
+                2. 반대로, **'여행 코스' 요청일 경우에는** `🐾 1일차, 2일차` 등으로 일정을 구성하세요.
+                    - 일정 구성: 오전 → 점심 → 오후 → 저녁
+                    - 각 장소는 이름 + 설명 + 반려동물 동반 여부 
+                    
+                
+                3. **날씨 + 여행**이 모두 포함된 질문이라면,  
+                    👉 먼저 날씨 정보를 출력하고 → 아래에 여행 일정을 이어서 작성하세요.
+                
+                
+                4. 숙소 추천은 마지막 또는 별도 섹션에 `🏨 숙소 추천` 제목으로 정리해주세요.
+                    - 숙소명, 위치, 반려동물 동반 여부, 특징, 추가요금 여부
+                
+                5. 전체 말투는 따뜻하고 친근하게. 여행을 함께 준비하는 친구처럼 작성해주세요.
+                
+                6. 🐾, 🌳, 🍽️, 🐶, ✨ 등의 이모지를 적절히 활용해 가독성과 감성을 살려주세요.
+                7. 마지막에는 감성적인 인사로 마무리해주세요.
+                    - 예: “반려견과 함께하는 이번 여행이 오래도록 기억에 남기를 바랍니다! 🐕💕”
+                """
+
+RESPONSE_USER_TEMPLATE = """
+                ---
+                🧾 사용자 질문: {query}  
+                📍 지역: {region}  
+                🐕 반려동물: {pet_type}  
+                🗓️ 여행 기간: {days}일  
+                🔍 제공된 정보:  
+                {content}
+                ---
+                """
+
+# 비슷한 질문의 전체 응답 재사용 여부 ("0" 이면 사용 안 함)
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE", "1") != "0"
+
+# 벡터 검색: 카테고리별 최대 10개, 유사도 분포를 보고 ADAPTIVE_MIN_K 개까지 줄임 (중복 장소 제거 여유분으로 후보 15개)
+SEARCH_KWARGS = {"k_each": 15, "top_k": 10, "min_k": vm.ADAPTIVE_MIN_K, "dedupe": True}
+
+ERROR_MESSAGE = "죄송합니다. 요청을 처리하는 중 오류가 발생했습니다."
+WEATHER_REGION_MISSING = "지역을 명시해주세요. (예: 서울 날씨, 부산 날씨)"
+
 # 후보 장소 개수 설정
 candiate_num = None
 
@@ -35,42 +126,201 @@ class Chatbot: # 챗봇 클래스
     """ Pet Travel Chatbot"""
     
     def __init__(self):
-        self.llm = ChatOpenAI(model="gpt-4o-mini", api_key=openai_api_key, temperature=0.3)
+        self.llm = get_llm_gateway().get_llm("gpt-4o-mini", temperature=0.3)
+        self.last_context_report: Optional[Dict[str, Any]] = None
+        # 요청 시작 → 첫 답변 청크 (스트리밍)
+        self.ttft = LatencyHistogram()
+        self.response_chain = get_llm_gateway().chain(
+            "chatbot_response",
+            lambda: build_response_prompt(RESPONSE_SYSTEM_PROMPT, RESPONSE_USER_TEMPLATE) | self.llm | StrOutputParser(),
+        )
         logger.info(" Chatbot initialized")
     
-    def process_query(self, query: str, stream: bool = False) -> str:
-        """Main processing pipeline"""
+    def process_query(self, query: str, stream: bool = False) -> Union[str, Iterator[str]]:
+        """
+        Main processing pipeline (stream=True returns a generator of answer chunks)
+
+        Each request runs under a Deadline: slow analysis falls back to local extraction,
+        weather is skipped when the budget runs low, and the answer notes what was left out.
+        """
+        if stream:
+            return self._stream_query(query)
         try:
-            # Check greetings first
-            greeting_response = self.check_greeting(query)
-            if greeting_response:
-                return greeting_response
+            deadline = Deadline()
+            answer, prepared = self._prepare(query, deadline)
+            if answer is not None:
+                return answer
             
-            # Analyze query
-            categories = get_category(query)
-            user_parsed = get_user_parser(query)
+            # Generate response
+            response = deadline.call(
+                "generate", lambda: self._generate_response(query, prepared["user_parsed"], prepared["results"]),
+                lambda: GENERATION_TIMEOUT_MESSAGE)
+            if response == GENERATION_TIMEOUT_MESSAGE:
+                return response
+            self._store_response(query, prepared, response)
+            return response + deadline.note()
             
-            # Search VectorDB
-            results = vm.multiretrieve_by_category(query=query, categories=categories, k_each=10, top_k=10)
+        except Exception as e:
+            logger.error(f"Error: {str(e)}")
+            return ERROR_MESSAGE
+
+    def _stream_query(self, query: str) -> Iterator[str]:
+        """Streaming pipeline: yields chunks as the LLM produces them and logs time-to-first-token"""
+        started = time.perf_counter()
+        chunks: List[str] = []
+        try:
+            deadline = Deadline()
+            answer, prepared = self._prepare(query, deadline)
+            if answer is not None:
+                self._record_ttft(started)
+                yield answer
+                return
             
-            # Handle weather separately
-            if "날씨" in categories:
-                region = user_parsed.get("region")
-                # If the travel parser didn't find a region, try weather-specific parsing
-                if not region or region == "" or region == "null":
-                    region = self._extract_weather_region(query)
-                
-                if region:
-                    results["날씨"] = self._get_weather_info(region)
-                else:
-                    results["날씨"] = [Document(page_content="지역을 명시해주세요. (예: 서울 날씨, 부산 날씨)", metadata={})]
+            response_chunks = self._generate_response(query, prepared["user_parsed"], prepared["results"], stream=True)
+            for chunk in deadline.stream(response_chunks):
+                if not chunk:
+                    continue
+                if not chunks:
+                    self._record_ttft(started)
+                chunks.append(chunk)
+                yield chunk
+            if "generate" in deadline.skipped:
+                return
             
-            # Generate response
-            return self._generate_response(query, user_parsed, results)
+            response = "".join(chunks)
+            logger.info(f"Stream finished: {len(response)} chars in {(time.perf_counter() - started) * 1000:.0f} ms")
+            self._store_response(query, prepared, response)
+            note = deadline.note()
+            if note:
+                yield note
             
         except Exception as e:
             logger.error(f"Error: {str(e)}")
-            return "죄송합니다. 요청을 처리하는 중 오류가 발생했습니다."
+            yield f"\n\n{ERROR_MESSAGE}" if chunks else ERROR_MESSAGE
+
+    def _record_ttft(self, started: float):
+        elapsed = time.perf_counter() - started
+        self.ttft.observe(elapsed)
+        logger.info(f"TTFT: {elapsed * 1000:.0f} ms")
+
+    def _prepare(self, query: str, deadline: Optional[Deadline] = None) -> Tuple[Optional[str], Dict[str, Any]]:
+        """
+        Everything before the LLM call
+
+        Returns:
+            (answer, {}) for greetings and cache hits,
+            otherwise (None, {"categories", "user_parsed", "results", "query_vector", "deadline"})
+        """
+        deadline = deadline or Deadline()
+        # Check greetings first
+        greeting_response = self.check_greeting(query)
+        if greeting_response:
+            return greeting_response, {}
+        
+        # Analyze query (category + user info calls run concurrently)
+        categories, user_parsed = deadline.call("categories", lambda: analyze_query(query), lambda: local_intent(query))
+        
+        # Reuse the answer to a near-identical earlier question with the same region/pet/categories
+        query_vector = vm.embed_query(query) if RESPONSE_CACHE_ENABLED else None
+        if query_vector is not None:
+            cached = get_response_cache().lookup(query_vector, categories, user_parsed)
+            if cached is not None:
+                return cached, {}
+        
+        # Search VectorDB
+        results = vm.multiretrieve_by_category(query=query, categories=categories, **SEARCH_KWARGS)
+        
+        # Handle weather separately
+        if "날씨" in categories:
+            region = self._weather_region(query, user_parsed)
+            if not region:
+                results["날씨"] = [Document(page_content=WEATHER_REGION_MISSING, metadata={})]
+            elif deadline.allows("weather"):
+                days = self._get_trip_days(user_parsed.get("days"))
+                results["날씨"] = deadline.call("weather", lambda: self._get_weather_info(region, days),
+                                                self._weather_skipped)
+            else:
+                results["날씨"] = self._weather_skipped()
+        
+        return None, {"categories": categories, "user_parsed": user_parsed,
+                      "results": results, "query_vector": query_vector, "deadline": deadline}
+
+    async def aprocess_query(self, query: str) -> str:
+        """
+        Async version of process_query
+
+        LLM calls use ainvoke, weather uses async HTTP, and embedding/FAISS search run in
+        the bounded vector executor, so one worker can serve many conversations at once.
+        """
+        try:
+            deadline = Deadline()
+            answer, prepared = await self._aprepare(query, deadline)
+            if answer is not None:
+                return answer
+            response = await deadline.acall(
+                "generate", self._agenerate_response(query, prepared["user_parsed"], prepared["results"]),
+                lambda: GENERATION_TIMEOUT_MESSAGE)
+            if response == GENERATION_TIMEOUT_MESSAGE:
+                return response
+            self._store_response(query, prepared, response)
+            return response + deadline.note()
+        except Exception as e:
+            logger.error(f"Error: {str(e)}")
+            return ERROR_MESSAGE
+
+    async def _aprepare(self, query: str, deadline: Optional[Deadline] = None) -> Tuple[Optional[str], Dict[str, Any]]:
+        """Async version of _prepare"""
+        deadline = deadline or Deadline()
+        greeting_response = self.check_greeting(query)
+        if greeting_response:
+            return greeting_response, {}
+        
+        # Query analysis and query embedding are independent
+        (categories, user_parsed), query_vector = await asyncio.gather(
+            deadline.acall("categories", aanalyze_query(query), lambda: local_intent(query)),
+            vm.aembed_query(query) if RESPONSE_CACHE_ENABLED else asyncio.sleep(0, result=None),
+        )
+        if query_vector is not None:
+            cached = get_response_cache().lookup(query_vector, categories, user_parsed)
+            if cached is not None:
+                return cached, {}
+        
+        # Vector search and weather only need the analysis result, so run them together
+        search = vm.amultiretrieve_by_category(query=query, categories=categories, **SEARCH_KWARGS)
+        region = self._weather_region(query, user_parsed) if "날씨" in categories else None
+        if region and deadline.allows("weather"):
+            results, weather_docs = await asyncio.gather(search, deadline.acall(
+                "weather", self._aget_weather_info(region, self._get_trip_days(user_parsed.get("days"))),
+                self._weather_skipped))
+            results["날씨"] = weather_docs
+        else:
+            results = await search
+            if "날씨" in categories:
+                results["날씨"] = (self._weather_skipped() if region else
+                                   [Document(page_content=WEATHER_REGION_MISSING, metadata={})])
+        
+        return None, {"categories": categories, "user_parsed": user_parsed,
+                      "results": results, "query_vector": query_vector, "deadline": deadline}
+
+    def _weather_region(self, query: str, user_parsed: Dict[str, Any]) -> Optional[str]:
+        region = user_parsed.get("region")
+        # If the travel parser didn't find a region, try weather-specific parsing
+        if not region or region == "" or region == "null":
+            region = self._extract_weather_region(query)
+        return region
+
+    @staticmethod
+    def _weather_skipped() -> List[Document]:
+        return [Document(page_content=WEATHER_SKIPPED_MESSAGE, metadata={})]
+
+    @staticmethod
+    def _store_response(query: str, prepared: Dict[str, Any], response: str):
+        # Answers built without skipped stages are not cached (the next request may have time for them)
+        if prepared["deadline"].skipped:
+            return
+        if prepared["query_vector"] is not None and response:
+            get_response_cache().store(query, prepared["query_vector"], prepared["categories"],
+                                       prepared["user_parsed"], response)
     
     def check_greeting(self, query: str) -> Optional[str]:
         """Check for greetings"""
@@ -92,166 +342,118 @@ class Chatbot: # 챗봇 클래스
                         어떤 여행을 계획하고 계신가요? 😊"""
         return None
     
-    def _get_weather_info(self, region: str) -> List[Document]:
-        """Get weather information"""
+    @staticmethod
+    def _get_trip_days(days: Any) -> int:
+        """Trip length as an int (non-numeric values such as '주말' count as 1 day)"""
+        try:
+            return max(1, int(days))
+        except (TypeError, ValueError):
+            return 1
+
+    def _get_weather_info(self, region: str, days: int = 1) -> List[Document]:
+        """Get weather information (with a per-day forecast for multi-day trips)"""
         try:
             weather_data = get_weather(region)
-            current_time = get_current_time()
-            
-            if "error" not in weather_data:
-                content = f"""현재 시간: {current_time['full_datetime']}
-                                            도시: {weather_data['city']}
-                                            기온: {weather_data['temperature']}°C
-                                            습도: {weather_data['humidity']}%
-                                            강수형태: {weather_data['precipitation_type']}
-                                            풍속: {weather_data['wind_speed']} m/s"""
-                return [Document(page_content=content, metadata=weather_data)]
-            else:
-                return [Document(page_content=f"날씨 정보 조회 실패: {weather_data['error']}", metadata={})]
+            forecast = get_weather_batch([region], days=days).get(region, {}) if days > 1 else None
+            return self._weather_documents(weather_data, forecast)
         except Exception as e:
             logger.error(f"Weather error: {str(e)}")
             return [Document(page_content="날씨 정보를 가져오는데 실패했습니다.", metadata={})]
-    
-    def _analyze_query_categories(self, query: str) -> List[str]:
-        """Analyze query and detect relevant categories"""
-        try:
-            return get_category(query)
-        except Exception as e:
-            logger.error(f"Error analyzing categories: {str(e)}")
-            return ["관광지"]
-    
-    def _search_vector_db(self, query: str, categories: List[str]) -> Dict[str, List[Document]]:
-        """Search vector database for each category"""
+
+    async def _aget_weather_info(self, region: str, days: int = 1) -> List[Document]:
+        """Async version of _get_weather_info (current weather and forecast fetched concurrently)"""
         try:
-            return vm.multiretrieve_by_category(query=query, categories=categories, k_each=10, top_k=10)
+            if days > 1:
+                weather_data, batch = await asyncio.gather(aget_weather(region), aget_weather_batch([region], days=days))
+                forecast = batch.get(region, {})
+            else:
+                weather_data, forecast = await aget_weather(region), None
+            return self._weather_documents(weather_data, forecast)
         except Exception as e:
-            logger.error(f"Error searching vector DB: {str(e)}")
-            return {}
-    
-    def _generate_response(self, query: str, user_parsed: Dict[str, Any], 
-                        results: Dict[str, List[Document]]) -> str:
-        """Generate final response"""
-        content_sections = []
-        
-        for category, docs in results.items():
-            if not docs:
-                continue
-                
-            category_content = f"### {category} 정보\n"
-            
-            for i, doc in enumerate(docs, 1):
-                metadata = doc.metadata
-                place_name = metadata.get("title", f"장소 {i}")
-                map_link = get_naver_map_link(place_name) if place_name != f"장소 {i}" else "#"
-                
-                place_info = f"**{i}. [{place_name}]({map_link})**\n"
-                place_info += doc.page_content + "\n\n"
-                category_content += place_info
-            
-            content_sections.append(category_content)
-        
-        content = "\n".join(content_sections)
-        
-        template ="""
-                당신은 반려동물과의 여행을 도와주는 감성적인 여행 플래너, 가이드 입니다.  
-                아래 정보에 따라 **정확히 날씨 응답인지, 여행 코스 요청인지 구분하여 답변**하세요.
-                
-                ---
-                🧾 사용자 질문: {query}  
-                📍 지역: {region}  
-                🐕 반려동물: {pet_type}  
-                🗓️ 여행 기간: {days}일  
-                🔍 제공된 정보:  
-                {content}
-                ---
-
-                🎯 작성 지침:
-
-                1. **사용자가 '날씨'만 요청한 경우에는**,  
-                    - 해당지역 기온/날씨/풍속/습도 + 반려동물 외출시 유의사항 포함하여 작성해주세요
-                    - 날씨 이외에는 정보를 작성하지 마세요 
-                    - 외출 시 주의사항은 아래의 예시를 참고하여 애완동물과 함께 외출 시 주의사항을 작성해주세요.
-                    [예시]
-                    안녕하세요! 😊  
-                    서울의 현재 날씨를 알려드릴게요.
+            logger.error(f"Weather error: {str(e)}")
+            return [Document(page_content="날씨 정보를 가져오는데 실패했습니다.", metadata={})]
 
-                    🌤️ **오늘의 서울 날씨**  
-                    - 🌡️ 기온: **18.5°C**  
-                    - 💧 습도: **55%**  
-                    - 🌬️ 바람: **1.5 m/s**  
-                    - 🌤️ 날씨 상태: **맑음**
+    @staticmethod
+    def _weather_documents(weather_data: Dict[str, Any], forecast: Optional[Dict[str, Any]]) -> List[Document]:
+        current_time = get_current_time()
+        if "error" not in weather_data:
+            content = f"""현재 시간: {current_time['full_datetime']}
+                                        도시: {weather_data['city']}
+                                        기온: {weather_data['temperature']}°C
+                                        습도: {weather_data['humidity']}%
+                                        강수형태: {weather_data['precipitation_type']}
+                                        풍속: {weather_data['wind_speed']} m/s"""
+            documents = [Document(page_content=content, metadata=weather_data)]
+        else:
+            documents = [Document(page_content=f"날씨 정보 조회 실패: {weather_data['error']}", metadata={})]
 
-                    맑고 산뜻한 날씨네요!  
-                    반려동물과 외출하시기 좋은 날이에요. 🐶💕
+        if forecast is not None and "error" not in forecast:
+            documents.append(Document(
+                page_content="일자별 날씨 예보\n" + format_daily_forecast(forecast["days"]),
+                metadata={"city": forecast["city"], "days": forecast["days"]}
+            ))
+        return documents
+    
+    def _generate_response(self, query: str, user_parsed: Dict[str, Any], 
+                        results: Dict[str, List[Document]], stream: bool = False) -> Union[str, Iterator[str]]:
+        """Generate final response (stream=True returns the chunk iterator)"""
+        inputs = self._response_inputs(query, user_parsed, results)
+        if stream:
+            return get_llm_gateway().stream(self.response_chain, inputs, name="chatbot_response")
+        return get_llm_gateway().invoke(self.response_chain, inputs, name="chatbot_response")
 
-                    **🐾 외출 시 주의사항**  
-                    - 햇빛이 강할 수 있으니 **그늘에서 쉬는 시간**을 자주 주세요.  
-                    - **수분 보충**을 위해 물을 꼭 챙겨주세요.  
-                    - **뜨거운 아스팔트**로부터 발바닥을 보호해 주세요.
+    async def _agenerate_response(self, query: str, user_parsed: Dict[str, Any],
+                                  results: Dict[str, List[Document]]) -> str:
+        """Async version of _generate_response"""
+        inputs = self._response_inputs(query, user_parsed, results)
+        return await get_llm_gateway().ainvoke(self.response_chain, inputs, name="chatbot_response")
 
-                    오늘도 반려동물과 함께 행복한 하루 보내세요! 🌈✨
-                    
-                    
-                2. 반대로, **'여행 코스' 요청일 경우에는** `🐾 1일차, 2일차` 등으로 일정을 구성하세요.
-                    - 일정 구성: 오전 → 점심 → 오후 → 저녁
-                    - 각 장소는 이름 + 설명 + 반려동물 동반 여부 
-                    
-                
-                3. **날씨 + 여행**이 모두 포함된 질문이라면,  
-                    👉 먼저 날씨 정보를 출력하고 → 아래에 여행 일정을 이어서 작성하세요.
-                
-                
-                4. 숙소 추천은 마지막 또는 별도 섹션에 `🏨 숙소 추천` 제목으로 정리해주세요.
-                    - 숙소명, 위치, 반려동물 동반 여부, 특징, 추가요금 여부
-                
-                5. 전체 말투는 따뜻하고 친근하게. 여행을 함께 준비하는 친구처럼 작성해주세요.
-                
-                6. 🐾, 🌳, 🍽️, 🐶, ✨ 등의 이모지를 적절히 활용해 가독성과 감성을 살려주세요.
-                7. 마지막에는 감성적인 인사로 마무리해주세요.
-                    - 예: “반려견과 함께하는 이번 여행이 오래도록 기억에 남기를 바랍니다! 🐕💕”
-                """
+    def _response_inputs(self, query: str, user_parsed: Dict[str, Any],
+                         results: Dict[str, List[Document]]) -> Dict[str, Any]:
+        """Response prompt inputs (context packed into the token budget)"""
+        content, report = ContextBuilder().build(results, self._format_place)
+        self.last_context_report = report
+        logger.info(f"Context tokens: {report['tokens_before']} -> {report['tokens_after']} "
+                    f"(docs {report['docs_before']} -> {report['docs_after']}, duplicates {report['duplicates']})")
         
-        prompt = PromptTemplate.from_template(template)
-        inputs = {
+        return {
             "query": query,
             "region": user_parsed.get("region", "정보 없음"),
             "pet_type": user_parsed.get("pet_type", "정보 없음"),
             "days": user_parsed.get("days", "정보 없음"),
             "content": content or "관련 정보를 찾을 수 없습니다."
         }
-        
-        chain = prompt | self.llm | StrOutputParser()
-        return chain.invoke(inputs)
+
+    @staticmethod
+    def _format_place(i: int, doc: Document) -> str:
+        place_name = place_title(doc)
+        map_link = get_naver_map_link(place_name) if place_name else "#"
+        return f"**{i}. [{place_name or f'장소 {i}'}]({map_link})**\n" + doc.page_content + "\n\n"
 
     def _extract_weather_region(self, query: str) -> Optional[str]:
-        """Extract region from weather queries using simple parsing"""
-        import re
-        
-        # Common weather keywords and modifiers to exclude
-        weather_keywords = ["날씨", "기온", "온도", "비", "눈", "바람", "습도", "맑", "흐림", "현재", "지금", "오늘", "내일", "어때"]
-        
+        """Extract region from weather queries (region dictionary first, then simple parsing)"""
         # Check if it's a weather query
         if not any(keyword in query for keyword in ["날씨", "기온", "온도"]):
             return None
-            
-        # Simple region extraction patterns - prioritize patterns that come before weather keywords
-        city_patterns = [
-            r'([가-힣]+(?:시|구|군|도))\s*(?:의\s*)?(?:날씨|기온|온도|현재)',  # 서울시 날씨, 강남구 날씨
-            r'([가-힣]+)\s*(?:의\s*)?(?:날씨|기온|온도)',      # 서울 날씨, 서울의 날씨
-            r'([가-힣]+)\s+(?:현재|지금)',                    # 서울 현재, 부산 지금
-        ]
-        
-        for pattern in city_patterns:
-            match = re.search(pattern, query)
+
+        try:
+            region = get_query_extractor().extract_region(query)
+            if region:
+                return region
+        except Exception as e:
+            logger.warning(f"Region dictionary lookup failed: {str(e)}")
+
+        for pattern in WEATHER_CITY_PATTERNS:
+            match = pattern.search(query)
             if match:
                 candidate = match.group(1)
-                if candidate not in weather_keywords:
+                if candidate not in WEATHER_KEYWORDS:
                     return candidate
         
         # Fallback: find the first meaningful Korean word that's not a weather keyword
-        words = re.findall(r'[가-힣]+', query)
+        words = HANGUL_WORD_PATTERN.findall(query)
         for word in words:
-            if word not in weather_keywords and len(word) >= 2:
+            if word not in WEATHER_KEYWORDS and len(word) >= 2:
                 return word
                 
         return None
@@ -267,12 +469,17 @@ def get_chatbot() -> Chatbot:
     return chatbot
 
 
-def process_query(query: str, stream: bool = False) -> str:
-    """Process query using  chatbot"""
+def process_query(query: str, stream: bool = False) -> Union[str, Iterator[str]]:
+    """Process query using  chatbot (stream=True returns a generator of answer chunks)"""
     chatbot = get_chatbot()
     return chatbot.process_query(query, stream)
 
 
+async def aprocess_query(query: str) -> str:
+    """Async version of process_query"""
+    return await get_chatbot().aprocess_query(query)
+
+
 def check_greeting(query: str) -> Optional[str]:
     """Check for greetings"""
     chatbot = get_chatbot()
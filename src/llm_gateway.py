@@ -0,0 +1,439 @@
+"""
+공용 LLM 게이트웨이
+
+- 클라이언트 풀: (모델, temperature) 별 ChatOpenAI 를 한 번만 만들고, 모두 같은 httpx 커넥션 풀을 공유
+- 체인 캐시: 프롬프트 | LLM | 파서 체인을 이름별로 한 번만 구성
+- single-flight: 같은 체인에 같은 입력이 동시에 들어오면 업스트림 호출은 한 번만
+- 동시성 제한: 동시에 진행 중인 LLM 호출 수 제한 (동기/비동기 호출, 모든 이벤트 루프를 합친 프로세스 전체)
+- 사용량 기록: 호출별 입력/출력/캐시된(prompt prefix cache) 토큰 수를 usage metadata 에서 수집
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import textwrap
+import time
+import weakref
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional, Tuple
+
+import httpx
+from dotenv import load_dotenv
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_openai import ChatOpenAI
+
+from api_client import AsyncSingleFlight, SingleFlight
+from metrics import LatencyHistogram
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gpt-4o-mini"
+# 프로세스당 동시 LLM 호출 수
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+# httpx 커넥션 풀 (keep-alive 로 TLS 핸드셰이크 재사용)
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "32"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "16"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+# 최근 호출별 사용량 보관 개수
+USAGE_HISTORY_SIZE = 200
+
+
+def build_response_prompt(system_template: str, user_template: str) -> ChatPromptTemplate:
+    """
+    고정 지침(system) + 요청별 값(human) 순서의 채팅 프롬프트
+
+    OpenAI 프롬프트 캐시는 앞부분이 같은 요청끼리만 적용되므로, 변수는 모두 user_template 에 둡니다.
+    들여쓰기는 제거해 불필요한 공백 토큰을 줄입니다.
+    """
+    return ChatPromptTemplate.from_messages([
+        ("system", textwrap.dedent(system_template).strip()),
+        ("human", textwrap.dedent(user_template).strip()),
+    ])
+
+
+def extract_usage(response: LLMResult) -> Optional[Dict[str, int]]:
+    """
+    LLM 응답의 토큰 사용량
+
+    Returns:
+        Dict[str, int]: input_tokens, output_tokens, cached_tokens (정보가 없으면 None)
+    """
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                details = usage.get("input_token_details") or {}
+                return {
+                    "input_tokens": usage.get("input_tokens", 0),
+                    "output_tokens": usage.get("output_tokens", 0),
+                    "cached_tokens": details.get("cache_read", 0) or 0,
+                }
+    token_usage = (response.llm_output or {}).get("token_usage")
+    if token_usage:
+        details = token_usage.get("prompt_tokens_details") or {}
+        return {
+            "input_tokens": token_usage.get("prompt_tokens", 0),
+            "output_tokens": token_usage.get("completion_tokens", 0),
+            "cached_tokens": details.get("cached_tokens", 0) or 0,
+        }
+    return None
+
+
+class _UsageCallback(BaseCallbackHandler):
+    """체인 호출 한 번의 LLM 사용량을 게이트웨이에 기록"""
+
+    def __init__(self, gateway: "LLMGateway", name: Optional[str]):
+        self.gateway = gateway
+        self.name = name or "unnamed"
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        usage = extract_usage(response)
+        if usage is not None:
+            self.gateway.record_usage(self.name, usage)
+
+
+class _PerLoopAsyncClient(httpx.AsyncClient):
+    """
+    이벤트 루프별 httpx.AsyncClient 로 요청을 넘기는 async 클라이언트
+
+    ChatOpenAI 는 생성할 때 받은 async 클라이언트 하나를 계속 쓰지만, httpx 커넥션은 만든 루프에서만
+    쓸 수 있습니다. asyncio.run 마다 새 루프가 생기므로 실제 커넥션 풀은 루프마다 따로 둡니다
+    (ApiClient._async_client 와 같은 방식).
+    """
+
+    def __init__(self, **client_kwargs: Any):
+        super().__init__(**client_kwargs)
+        self._client_kwargs = client_kwargs
+        self._loop_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = \
+            weakref.WeakKeyDictionary()
+        self._loop_lock = threading.Lock()
+
+    def loop_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        with self._loop_lock:
+            client = self._loop_clients.get(loop)
+            if client is None:
+                client = self._loop_clients[loop] = httpx.AsyncClient(**self._client_kwargs)
+            return client
+
+    async def send(self, request: httpx.Request, **kwargs: Any) -> httpx.Response:
+        return await self.loop_client().send(request, **kwargs)
+
+
+class _ConcurrencyLimiter:
+    """
+    동기 호출(스레드)과 비동기 호출(이벤트 루프 여러 개)이 함께 쓰는 프로세스 전체 동시 호출 제한
+
+    비동기 대기자는 루프의 Future 로 기다리고, 슬롯이 풀리면 해당 루프로 직접 넘겨받습니다 (폴링 없음).
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._active = 0
+        self._cond = threading.Condition()
+        self._async_waiters: "deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]" = deque()
+
+    def acquire(self):
+        with self._cond:
+            while self._active >= self.limit:
+                self._cond.wait()
+            self._active += 1
+
+    def release(self):
+        with self._cond:
+            # 기다리는 비동기 호출이 있으면 슬롯을 그대로 넘김 (_active 유지)
+            while self._async_waiters:
+                loop, future = self._async_waiters.popleft()
+                try:
+                    loop.call_soon_threadsafe(self._hand_over, future)
+                    return
+                except RuntimeError:  # 닫힌 루프
+                    continue
+            self._active -= 1
+            self._cond.notify()
+
+    def _hand_over(self, future: asyncio.Future):
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+
+    async def aacquire(self):
+        loop = asyncio.get_running_loop()
+        with self._cond:
+            if self._active < self.limit:
+                self._active += 1
+                return
+            future = loop.create_future()
+            self._async_waiters.append((loop, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._cond:
+                try:
+                    self._async_waiters.remove((loop, future))
+                    waiting = True
+                except ValueError:
+                    waiting = False
+            # 슬롯을 이미 넘겨받은 뒤 취소된 경우 (아직 넘겨받는 중이면 _hand_over 가 반환)
+            if not waiting and future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    async def __aenter__(self):
+        await self.aacquire()
+        return self
+
+    async def __aexit__(self, *exc):
+        self.release()
+
+
+class LLMGateway:
+    """
+    LLM 클라이언트/체인 관리 및 호출 제어
+
+    Args:
+        max_concurrency: 동시에 진행 가능한 LLM 호출 수 (동기/비동기 호출 합계)
+        max_connections: httpx 최대 커넥션 수
+        max_keepalive: 유지할 keep-alive 커넥션 수
+        keepalive_expiry: keep-alive 커넥션 유지 시간 (초)
+        timeout: 요청 타임아웃 (초)
+        llm_factory: (model, temperature) → LLM 객체 (테스트용, None 이면 ChatOpenAI)
+    """
+
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 max_connections: int = LLM_MAX_CONNECTIONS,
+                 max_keepalive: int = LLM_MAX_KEEPALIVE,
+                 keepalive_expiry: float = LLM_KEEPALIVE_EXPIRY,
+                 timeout: float = LLM_TIMEOUT,
+                 llm_factory: Optional[Callable[[str, float], Any]] = None):
+        self.max_concurrency = max_concurrency
+        self._limits = httpx.Limits(max_connections=max_connections,
+                                    max_keepalive_connections=max_keepalive,
+                                    keepalive_expiry=keepalive_expiry)
+        self._timeout = httpx.Timeout(timeout, connect=5.0)
+        self._llm_factory = llm_factory or self._create_llm
+        self._http_client: Optional[httpx.Client] = None
+        self._http_async_client: Optional[_PerLoopAsyncClient] = None
+        self._llms: Dict[Tuple[str, float], Any] = {}
+        self._chains: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._semaphore = _ConcurrencyLimiter(max_concurrency)
+        self._flight = SingleFlight()
+        self._async_flight = AsyncSingleFlight()
+        self._in_flight = 0
+        self.stats = {"calls": 0, "upstream_calls": 0, "coalesced": 0, "streams": 0,
+                      "errors": 0, "max_in_flight": 0}
+        self.queue_wait = LatencyHistogram()
+        self.latency = LatencyHistogram()
+        # 스트리밍 호출 시작 → 첫 청크 (대기열 시간 포함)
+        self.first_chunk = LatencyHistogram()
+        self._usage: Dict[str, Dict[str, int]] = {}
+        self._usage_history: "deque[Dict[str, Any]]" = deque(maxlen=USAGE_HISTORY_SIZE)
+
+    def _create_llm(self, model: str, temperature: float) -> ChatOpenAI:
+        if self._http_client is None:
+            self._http_client = httpx.Client(limits=self._limits, timeout=self._timeout)
+            self._http_async_client = _PerLoopAsyncClient(limits=self._limits, timeout=self._timeout)
+        return ChatOpenAI(
+            model=model,
+            api_key=os.getenv('OPENAI_API_KEY'),
+            temperature=temperature,
+            max_retries=LLM_MAX_RETRIES,
+            stream_usage=True,
+            http_client=self._http_client,
+            http_async_client=self._http_async_client,
+        )
+
+    def get_llm(self, model: str = DEFAULT_MODEL, temperature: float = 0) -> Any:
+        """(모델, temperature) 별 공용 LLM 클라이언트"""
+        key = (model, float(temperature))
+        with self._lock:
+            llm = self._llms.get(key)
+            if llm is None:
+                llm = self._llms[key] = self._llm_factory(model, float(temperature))
+            return llm
+
+    def chain(self, name: str, build: Callable[[], Any]) -> Any:
+        """이름별로 한 번만 구성되는 체인 (build 는 최초 호출 시에만 실행)"""
+        with self._lock:
+            chain = self._chains.get(name)
+        if chain is not None:
+            return chain
+        chain = build()
+        with self._lock:
+            return self._chains.setdefault(name, chain)
+
+    @staticmethod
+    def _flight_key(name: str, inputs: Dict[str, Any]) -> Tuple[str, str]:
+        return name, json.dumps(inputs, ensure_ascii=False, sort_keys=True, default=str)
+
+    def _enter(self, waited_since: float):
+        self.queue_wait.observe(time.perf_counter() - waited_since)
+        with self._lock:
+            self._in_flight += 1
+            self.stats["upstream_calls"] += 1
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self._in_flight)
+
+    def _exit(self, started: float, failed: bool):
+        self.latency.observe(time.perf_counter() - started)
+        with self._lock:
+            self._in_flight -= 1
+            if failed:
+                self.stats["errors"] += 1
+
+    def _bump(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _config(self, name: Optional[str]) -> Dict[str, Any]:
+        return {"callbacks": [_UsageCallback(self, name)]}
+
+    def record_usage(self, name: str, usage: Dict[str, int]):
+        """호출 한 번의 토큰 사용량 기록 (체인 이름별 누적 + 최근 호출 목록)"""
+        with self._lock:
+            totals = self._usage.setdefault(name, {"calls": 0, "input_tokens": 0, "output_tokens": 0,
+                                                   "cached_tokens": 0})
+            totals["calls"] += 1
+            for key in ("input_tokens", "output_tokens", "cached_tokens"):
+                totals[key] += usage.get(key, 0)
+            self._usage_history.append({"name": name, "time": time.time(), **usage})
+        logger.debug(f"LLM usage [{name}]: {usage}")
+
+    def get_usage(self) -> Dict[str, Any]:
+        """체인별 누적 사용량과 캐시 적중 비율(cached_tokens / input_tokens)"""
+        with self._lock:
+            totals = {name: dict(values) for name, values in self._usage.items()}
+            recent = list(self._usage_history)
+        for values in totals.values():
+            values["cache_hit_ratio"] = (values["cached_tokens"] / values["input_tokens"]
+                                         if values["input_tokens"] else 0.0)
+        return {"by_chain": totals, "recent": recent}
+
+    def _call(self, chain: Any, inputs: Dict[str, Any], name: Optional[str] = None) -> Any:
+        waited_since = time.perf_counter()
+        with self._semaphore:
+            self._enter(waited_since)
+            started, failed = time.perf_counter(), True
+            try:
+                result = chain.invoke(inputs, config=self._config(name))
+                failed = False
+                return result
+            finally:
+                self._exit(started, failed)
+
+    def invoke(self, chain: Any, inputs: Dict[str, Any], name: Optional[str] = None) -> Any:
+        """
+        체인 호출 (동시성 제한 + 같은 이름/입력의 동시 호출 병합)
+
+        Args:
+            chain: invoke() 를 제공하는 체인
+            inputs: 체인 입력
+            name: 병합 키로 쓸 체인 이름 (None 이면 병합하지 않음)
+        """
+        self._bump("calls")
+        if name is None:
+            return self._call(chain, inputs)
+        return self._flight.do(self._flight_key(name, inputs), lambda: self._call(chain, inputs, name))
+
+    async def _acall(self, chain: Any, inputs: Dict[str, Any], name: Optional[str] = None) -> Any:
+        waited_since = time.perf_counter()
+        async with self._semaphore:
+            self._enter(waited_since)
+            started, failed = time.perf_counter(), True
+            try:
+                result = await chain.ainvoke(inputs, config=self._config(name))
+                failed = False
+                return result
+            finally:
+                self._exit(started, failed)
+
+    async def ainvoke(self, chain: Any, inputs: Dict[str, Any], name: Optional[str] = None) -> Any:
+        """
+        invoke 의 비동기 버전
+
+        같은 루프에서 같은 이름/입력으로 동시에 들어온 호출은 하나의 태스크를 함께 기다리므로,
+        한 호출이 취소돼도 나머지는 결과를 받습니다. 동시성은 동기 호출과 같은 프로세스 전체 한도로 제한합니다.
+        """
+        self._bump("calls")
+        if name is None:
+            return await self._acall(chain, inputs)
+        return await self._async_flight.do(self._flight_key(name, inputs), lambda: self._acall(chain, inputs, name))
+
+    def stream(self, chain: Any, inputs: Dict[str, Any], name: Optional[str] = None) -> Iterator[Any]:
+        """스트리밍 호출 (스트림이 끝날 때까지 동시성 슬롯 유지)"""
+        self._bump("calls")
+        self._bump("streams")
+        waited_since = time.perf_counter()
+        with self._semaphore:
+            self._enter(waited_since)
+            started, failed, first = time.perf_counter(), True, True
+            try:
+                for chunk in chain.stream(inputs, config=self._config(name)):
+                    if first:
+                        self.first_chunk.observe(time.perf_counter() - waited_since)
+                        first = False
+                    yield chunk
+                failed = False
+            finally:
+                self._exit(started, failed)
+
+    async def astream(self, chain: Any, inputs: Dict[str, Any], name: Optional[str] = None) -> AsyncIterator[Any]:
+        """stream 의 비동기 버전"""
+        self._bump("calls")
+        self._bump("streams")
+        waited_since = time.perf_counter()
+        async with self._semaphore:
+            self._enter(waited_since)
+            started, failed, first = time.perf_counter(), True, True
+            try:
+                async for chunk in chain.astream(inputs, config=self._config(name)):
+                    if first:
+                        self.first_chunk.observe(time.perf_counter() - waited_since)
+                        first = False
+                    yield chunk
+                failed = False
+            finally:
+                self._exit(started, failed)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["in_flight"] = self._in_flight
+            stats["clients"] = len(self._llms)
+            stats["chains"] = sorted(self._chains)
+        stats["coalesced"] += self._flight.stats["shared"] + self._async_flight.stats["shared"]
+        stats["max_concurrency"] = self.max_concurrency
+        stats["queue_wait"] = self.queue_wait.snapshot()
+        stats["latency"] = self.latency.snapshot()
+        stats["first_chunk"] = self.first_chunk.snapshot()
+        stats["usage"] = self.get_usage()["by_chain"]
+        return stats
+
+
+# Global instance
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_llm_gateway() -> LLMGateway:
+    """프로세스 공용 LLM 게이트웨이"""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = LLMGateway()
+    return _gateway
@@ -0,0 +1,75 @@
+"""
+간단한 지연 시간 메트릭
+
+외부 모니터링 없이 프로세스 안에서 단계별 지연 시간 분포를 확인하기 위한 히스토그램입니다.
+"""
+import bisect
+import threading
+from typing import Any, Dict, Optional, Sequence
+
+# 기본 버킷 경계 (ms)
+DEFAULT_BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """
+    고정 버킷 지연 시간 히스토그램
+
+    Args:
+        buckets_ms: 버킷 상한값 목록 (ms, 오름차순). 마지막 버킷 이후는 '+Inf'
+    """
+
+    def __init__(self, buckets_ms: Optional[Sequence[float]] = None):
+        self.buckets_ms = tuple(buckets_ms or DEFAULT_BUCKETS_MS)
+        self._counts = [0] * (len(self.buckets_ms) + 1)
+        self._total = 0
+        self._sum_ms = 0.0
+        self._max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        """지연 시간(초) 기록"""
+        ms = seconds * 1000.0
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets_ms, ms)] += 1
+            self._total += 1
+            self._sum_ms += ms
+            self._max_ms = max(self._max_ms, ms)
+
+    def _quantile(self, q: float) -> Optional[float]:
+        # 버킷 상한값 기준 근사치
+        if not self._total:
+            return None
+        target = q * self._total
+        seen = 0
+        for bound, count in zip(self.buckets_ms + (self._max_ms,), self._counts):
+            seen += count
+            if seen >= target:
+                return min(bound, self._max_ms)
+        return self._max_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        현재 분포 조회
+
+        Returns:
+            Dict: count, mean_ms, max_ms, p50_ms/p95_ms/p99_ms(버킷 근사), buckets({'<=1ms': n, ...})
+        """
+        with self._lock:
+            labels = [f"<={b:g}ms" for b in self.buckets_ms] + ["+Inf"]
+            return {
+                "count": self._total,
+                "mean_ms": self._sum_ms / self._total if self._total else None,
+                "max_ms": self._max_ms if self._total else None,
+                "p50_ms": self._quantile(0.5),
+                "p95_ms": self._quantile(0.95),
+                "p99_ms": self._quantile(0.99),
+                "buckets": dict(zip(labels, self._counts)),
+            }
+
+    def reset(self):
+        with self._lock:
+            self._counts = [0] * (len(self.buckets_ms) + 1)
+            self._total = 0
+            self._sum_ms = 0.0
+            self._max_ms = 0.0
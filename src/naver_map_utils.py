@@ -1,7 +1,7 @@
 import os
 import urllib.parse
-import requests
 import logging
+from api_client import get_api_client
 
 # 향후 실제 데이터를 기반으로 장소를 선별할 예정으로 사전에 코드 작성 
 logger = logging.getLogger(__name__)
@@ -57,7 +57,8 @@ class NaverMapUtils:
                 'X-Naver-Client-Secret': os.getenv('NAVER_CLIENT_SECRET_KEY')
             }
             
-            response = requests.get(url, params=params, headers=headers)
+            response = get_api_client().get(url, params=params, headers=headers,
+                                            api_key=headers['X-Naver-Client-Id'])
             if response.status_code != 200:
                 logger.warning(f"Naver API request failed: {response.status_code}")
                 return False
@@ -0,0 +1,224 @@
+"""
+사전 기반 지역/반려동물/여행 일수 추출기
+
+get_user_parser 의 LLM 호출 전에 실행되는 결정적(deterministic) 추출기입니다.
+
+- 지역: region_only_city_info.json 키 + Tour API 시/도 이름 (+ '시/군/구'를 뗀 이름)
+- 반려동물: 반려동물 종류/품종/별칭 사전
+- 여행 일수: "N박 M일", "N일간", "당일치기", "주말" 등의 규칙
+
+지역/반려동물 사전은 Aho-Corasick 오토마톤 하나로 묶어 질문을 한 번만 훑습니다.
+"""
+import logging
+import re
+import threading
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Tour API(KorPetTourService/areaCode) 시/도 이름과 자주 쓰는 약칭
+TOUR_AREA_NAMES = [
+    "서울", "인천", "대전", "대구", "광주", "부산", "울산", "세종", "세종특별자치시",
+    "경기도", "강원도", "강원", "강원특별자치도", "충청북도", "충북", "충청남도", "충남",
+    "경상북도", "경북", "경상남도", "경남", "전라북도", "전북", "전북특별자치도",
+    "전라남도", "전남", "제주도", "제주특별자치도", "서귀포",
+]
+
+# '시/군/구'를 뗐을 때 일반 단어와 겹치는 지역명 (예: 고양시 → '고양이', 공주시 → '공주')
+AMBIGUOUS_STEMS = {
+    "고양", "공주", "음성", "예산", "완주", "고령", "구리", "부여", "장수", "영광", "보은",
+    "진도", "구미", "거창", "고성", "성주", "영동", "금산", "상주", "영주", "부안", "화순",
+    "강서", "동작", "중랑", "수영", "사상", "사하", "연수", "남동", "광산", "대덕", "영도",
+    # 화성(행성), 진주(보석), 양주(술), 영양(영양소), 달성(목표 달성), 강진(지진) 등 일반 명사
+    "화성", "진주", "양주", "청주", "영양", "달성", "강진", "무안", "장성", "양산", "동해", "남해",
+    "오산", "의성", "봉화", "광명",
+    # 경주(경주마), 강화(강화된 규정), 이천(이천 원), 청양(청양고추)
+    "경주", "강화", "이천", "청양",
+}
+
+# 반려동물 표현 → 결과 값 (별칭은 대표 이름으로)
+PET_SYNONYMS = {
+    "강아지": "강아지", "반려견": "반려견", "애견": "반려견", "댕댕이": "강아지", "멍멍이": "강아지",
+    "개랑": "개", "개와": "개", "개하고": "개", "개를": "개", "개 데리고": "개",
+    "고양이": "고양이", "반려묘": "반려묘", "냥이": "고양이", "냥냥이": "고양이", "야옹이": "고양이",
+    "말티즈": "말티즈", "푸들": "푸들", "포메라니안": "포메라니안", "포메": "포메라니안", "비숑": "비숑",
+    "시츄": "시츄", "치와와": "치와와", "닥스훈트": "닥스훈트", "웰시코기": "웰시코기", "코기": "웰시코기",
+    "시바견": "시바견", "진돗개": "진돗개", "리트리버": "리트리버", "골든리트리버": "골든리트리버",
+    "래브라도": "래브라도 리트리버", "보더콜리": "보더콜리", "스피츠": "스피츠", "슈나우저": "슈나우저",
+    "비글": "비글", "요크셔테리어": "요크셔테리어", "페르시안": "페르시안", "러시안블루": "러시안블루",
+    "코숏": "코리안숏헤어", "스코티시폴드": "스코티시폴드", "먼치킨": "먼치킨",
+    "토끼": "토끼", "햄스터": "햄스터", "앵무새": "앵무새", "고슴도치": "고슴도치",
+    "기니피그": "기니피그", "페럿": "페럿", "거북이": "거북이",
+}
+# 구체적인 종류가 없을 때만 사용하는 일반 표현
+GENERIC_PETS = {"반려동물": "반려동물", "애완동물": "반려동물"}
+
+KOREAN_DAY_COUNTS = {"이틀": 2, "사흘": 3, "나흘": 4, "일주일": 7}
+
+# (정규식, 변환 함수) - 위에서부터 먼저 맞는 규칙 사용
+DAYS_RULES = [
+    (re.compile(r"(\d+)\s*박\s*(\d+)\s*일"), lambda m: int(m.group(2))),
+    (re.compile(r"(\d+)\s*박"), lambda m: int(m.group(1)) + 1),
+    (re.compile(r"(\d+)\s*일\s*(?:동안|간|짜리|일정|코스|여행)"), lambda m: int(m.group(1))),
+    (re.compile(r"(이틀|사흘|나흘|일주일)"), lambda m: KOREAN_DAY_COUNTS[m.group(1)]),
+    (re.compile(r"당일\s*치기|당일\s*여행|당일로"), lambda m: "당일치기"),
+    (re.compile(r"주말"), lambda m: "주말"),
+    (re.compile(r"다음\s*주"), lambda m: "다음 주"),
+    (re.compile(r"이번\s*달\s*말"), lambda m: "이번 달 말"),
+    (re.compile(r"글피"), lambda m: "글피"),
+]
+
+# 출발지 표현 (예: "서울에서 속초 가려고") - 다른 지역이 있으면 제외
+_ORIGIN_SUFFIX = re.compile(r"^\s*에서")
+# 목적지 표현 (예: "부산으로 가려고", "부산 가") - 있으면 먼저 나온 지역보다 우선
+_DESTINATION_SUFFIX = re.compile(r"^\s*(?:으로|로|에)?\s*(?:가|갈|간다|놀러|여행|떠나)")
+
+
+class AhoCorasick:
+    """
+    다중 문자열 검색용 Aho-Corasick 오토마톤
+
+    add() 로 단어를 모두 넣은 뒤 build() 를 호출하고, find_all() 로 검색합니다.
+    """
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, Any]]] = [[]]
+        self._built = False
+
+    def add(self, word: str, value: Any):
+        node = 0
+        for ch in word:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(word), value))
+        self._built = False
+
+    def build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+        self._built = True
+
+    def find_all(self, text: str) -> List[Tuple[int, int, Any]]:
+        """
+        text 안의 모든 일치 항목
+
+        Returns:
+            List[Tuple[int, int, Any]]: (시작 위치, 끝 위치, 값) 목록
+        """
+        if not self._built:
+            self.build()
+        matches = []
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for length, value in self._out[node]:
+                matches.append((i - length + 1, i + 1, value))
+        return matches
+
+
+def _longest_non_overlapping(matches: List[Tuple[int, int, Any]]) -> List[Tuple[int, int, Any]]:
+    """겹치는 일치 항목 중 긴 것 우선으로 선택 (위치 순 정렬)"""
+    chosen: List[Tuple[int, int, Any]] = []
+    for start, end, value in sorted(matches, key=lambda m: (-(m[1] - m[0]), m[0])):
+        if all(end <= s or start >= e for s, e, _ in chosen):
+            chosen.append((start, end, value))
+    return sorted(chosen, key=lambda m: m[0])
+
+
+class QueryExtractor:
+    """
+    지역/반려동물/여행 일수 추출기
+
+    Args:
+        region_names: 지역명 목록 (None 이면 region_only_city_info.json 키 + TOUR_AREA_NAMES)
+    """
+
+    def __init__(self, region_names: Optional[Iterable[str]] = None):
+        if region_names is None:
+            from weather import get_region_index
+            region_names = list(get_region_index().regions) + TOUR_AREA_NAMES
+
+        self._automaton = AhoCorasick()
+        for name in dict.fromkeys(region_names):
+            self._automaton.add(name, ("region", name))
+            stem = name[:-1]
+            if name[-1] in "시군구" and len(stem) >= 2 and stem not in AMBIGUOUS_STEMS:
+                self._automaton.add(stem, ("region", stem))
+        for surface, pet in PET_SYNONYMS.items():
+            self._automaton.add(surface, ("pet", pet))
+        for surface, pet in GENERIC_PETS.items():
+            self._automaton.add(surface, ("generic_pet", pet))
+        self._automaton.build()
+
+    def _pick_region(self, query: str, regions: List[Tuple[int, int, str]]) -> Optional[str]:
+        if not regions:
+            return None
+        # "진주 목걸이 사러 부산 가" → 목적지 표현이 붙은 지역(부산) 우선
+        marked = [r for r in regions if _DESTINATION_SUFFIX.match(query[r[1]:])]
+        if marked:
+            return marked[0][2]
+        # "서울에서 속초 가려고" → 출발지(서울) 제외
+        destinations = [r for r in regions if not _ORIGIN_SUFFIX.match(query[r[1]:])]
+        return (destinations or regions)[0][2]
+
+    @staticmethod
+    def extract_days(query: str) -> Optional[Any]:
+        """여행 일수 (숫자 또는 '주말'/'당일치기' 등 문자열, 없으면 None)"""
+        for pattern, convert in DAYS_RULES:
+            match = pattern.search(query)
+            if match:
+                return convert(match)
+        return None
+
+    def extract(self, query: str) -> Dict[str, Any]:
+        """
+        질문에서 지역/반려동물/여행 일수 추출
+
+        Returns:
+            Dict[str, Any]: {"region", "pet_type", "days"} (찾지 못한 항목은 None)
+        """
+        matches = _longest_non_overlapping(self._automaton.find_all(query))
+        regions = [(s, e, v) for s, e, (kind, v) in matches if kind == "region"]
+        pets = [v for _, _, (kind, v) in matches if kind == "pet"]
+        generic = [v for _, _, (kind, v) in matches if kind == "generic_pet"]
+        return {
+            "region": self._pick_region(query, regions),
+            "pet_type": (pets or generic or [None])[0],
+            "days": self.extract_days(query),
+        }
+
+    def extract_region(self, query: str) -> Optional[str]:
+        return self.extract(query)["region"]
+
+
+_extractor: Optional[QueryExtractor] = None
+_extractor_lock = threading.Lock()
+
+
+def get_query_extractor() -> QueryExtractor:
+    """프로세스 공용 추출기"""
+    global _extractor
+    if _extractor is None:
+        with _extractor_lock:
+            if _extractor is None:
+                _extractor = QueryExtractor()
+    return _extractor
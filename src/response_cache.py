@@ -0,0 +1,257 @@
+"""
+전체 응답 시맨틱 캐시
+
+"KTX 기차 반려동물 탑승 관련해서 알려줘" 같은 자주 묻는 질문은 매번 거의 같은 답변이 나오므로,
+과거 질문 임베딩을 FAISS(내적) 인덱스로 보관하고 비슷한 질문이면 저장된 답변을 바로 반환합니다.
+
+- 적중 조건: 코사인 유사도 ≥ 임계값 + 분석된 지역/반려동물/카테고리 일치 + 만료 전 + 같은 데이터 버전
+- 만료: 날씨가 포함된 답변은 다음 초단기실황 발표 시각까지, 나머지는 RESPONSE_CACHE_TTL
+- 데이터 버전: VectorDB(FAISS) 파일이 갱신되면 값이 바뀌어 이전 답변은 사용하지 않음
+- 저장: 답변은 zlib 압축해 메모리에 두고, RESPONSE_CACHE_DIR 가 있으면 디스크에도 기록 (재시작 시 복원)
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import faiss
+import numpy as np
+
+from weather import get_base_date_time
+from weather_cache import next_publication_time
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_THRESHOLD = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.93"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", str(6 * 3600)))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+# 유사도 상위 몇 개까지 속성 일치 여부를 확인할지
+SEARCH_K = 5
+
+DEFAULT_DB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'db', 'faiss')
+
+
+def data_version(db_dir: str = DEFAULT_DB_DIR) -> str:
+    """VectorDB 파일(이름, 크기, 수정 시각)로 만든 버전 해시"""
+    digest = hashlib.sha1()
+    root = Path(db_dir)
+    if root.exists():
+        for path in sorted(root.glob("*/index.*")):
+            stat = path.stat()
+            digest.update(f"{path.parent.name}/{path.name}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()[:12]
+
+
+def weather_expiry(now: Optional[float] = None) -> float:
+    """날씨가 포함된 답변의 만료 시각 (다음 초단기실황 발표 시각)"""
+    current = datetime.fromtimestamp(now) if now is not None else datetime.now()
+    return next_publication_time(*get_base_date_time(current)).timestamp()
+
+
+def _normalize_value(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    text = str(value).strip()
+    return None if text in ("", "null", "None") else text
+
+
+def cache_attributes(categories: Sequence[str], user_parsed: Dict[str, Any]) -> Dict[str, Any]:
+    """적중 판정에 쓰는 분석 결과 (지역/반려동물/일수/카테고리)"""
+    return {
+        "region": _normalize_value(user_parsed.get("region")),
+        "pet_type": _normalize_value(user_parsed.get("pet_type")),
+        "days": _normalize_value(user_parsed.get("days")),
+        "categories": sorted(set(categories)),
+    }
+
+
+def _unit(vector: Sequence[float]) -> np.ndarray:
+    array = np.asarray(vector, dtype=np.float32).reshape(1, -1)
+    norm = np.linalg.norm(array)
+    return array / norm if norm else array
+
+
+class ResponseCache:
+    """
+    질문 임베딩 기반 응답 캐시
+
+    Args:
+        threshold: 적중으로 볼 최소 코사인 유사도
+        ttl: 날씨가 없는 답변의 유효 기간 (초)
+        cache_dir: 디스크 저장 디렉토리 (None 이면 메모리만 사용)
+        max_entries: 최대 항목 수 (초과 시 가장 오래된 항목부터 제거)
+        version_fn: 데이터 버전 함수 (기본 data_version)
+    """
+
+    def __init__(self, threshold: float = RESPONSE_CACHE_THRESHOLD, ttl: float = RESPONSE_CACHE_TTL,
+                 cache_dir: Optional[str] = None, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+                 version_fn=data_version):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.version_fn = version_fn
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._entries: List[Dict[str, Any]] = []
+        self._index: Optional[faiss.IndexFlatIP] = None
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "attribute_mismatches": 0, "expired": 0, "stores": 0}
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._load_disk()
+
+    # ---- 인덱스 관리 (호출측에서 self._lock 보유) ----
+
+    def _rebuild(self):
+        self._index = None
+        if self._entries:
+            self._index = faiss.IndexFlatIP(self._entries[0]["vector"].shape[1])
+            self._index.add(np.vstack([e["vector"] for e in self._entries]))
+
+    def _prune(self, now: float, version: str) -> int:
+        """만료/다른 데이터 버전 항목 제거 (제거한 수)"""
+        stale = [e for e in self._entries if e["expires_at"] <= now or e["data_version"] != version]
+        if stale:
+            stale_ids = {e["id"] for e in stale}
+            self._entries = [e for e in self._entries if e["id"] not in stale_ids]
+            for entry in stale:
+                self._remove_disk(entry["id"])
+            self._rebuild()
+        return len(stale)
+
+    # ---- 디스크 ----
+
+    def _disk_path(self, entry_id: str) -> Path:
+        return self.cache_dir / f"{entry_id}.zlib"
+
+    def _write_disk(self, entry: Dict[str, Any]):
+        if not self.cache_dir:
+            return
+        record = {k: v for k, v in entry.items() if k not in ("vector", "response")}
+        record["vector"] = entry["vector"].ravel().tolist()
+        record["response"] = zlib.decompress(entry["response"]).decode("utf-8")
+        path = self._disk_path(entry["id"])
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(zlib.compress(json.dumps(record, ensure_ascii=False).encode("utf-8")))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write response cache: {e}")
+
+    def _remove_disk(self, entry_id: str):
+        if self.cache_dir:
+            try:
+                self._disk_path(entry_id).unlink()
+            except FileNotFoundError:
+                pass
+
+    def _load_disk(self):
+        now, version = time.time(), self.version_fn()
+        for path in sorted(self.cache_dir.glob("*.zlib"), key=lambda p: p.stat().st_mtime):
+            try:
+                record = json.loads(zlib.decompress(path.read_bytes()).decode("utf-8"))
+            except (OSError, zlib.error, ValueError):
+                path.unlink(missing_ok=True)
+                continue
+            if record["expires_at"] <= now or record["data_version"] != version:
+                path.unlink(missing_ok=True)
+                continue
+            record["vector"] = np.asarray(record["vector"], dtype=np.float32).reshape(1, -1)
+            record["response"] = zlib.compress(record["response"].encode("utf-8"))
+            self._entries.append(record)
+        self._entries = self._entries[-self.max_entries:]
+        self._rebuild()
+        if self._entries:
+            logger.info(f"Restored {len(self._entries)} cached responses")
+
+    # ---- 조회/저장 ----
+
+    def lookup(self, query_vector: Sequence[float], categories: Sequence[str],
+               user_parsed: Dict[str, Any]) -> Optional[str]:
+        """
+        비슷한 과거 질문의 답변 조회
+
+        Returns:
+            Optional[str]: 저장된 답변 (조건을 만족하는 항목이 없으면 None)
+        """
+        attributes = cache_attributes(categories, user_parsed)
+        vector = _unit(query_vector)
+        with self._lock:
+            self.stats["expired"] += self._prune(time.time(), self.version_fn())
+            if self._index is None:
+                self.stats["misses"] += 1
+                return None
+            scores, ids = self._index.search(vector, min(SEARCH_K, len(self._entries)))
+            similar = [(float(s), int(i)) for s, i in zip(scores[0], ids[0]) if i >= 0 and s >= self.threshold]
+            for score, i in similar:
+                entry = self._entries[i]
+                if entry["attributes"] == attributes:
+                    self.stats["hits"] += 1
+                    logger.info(f"Response cache hit (similarity {score:.3f}): {entry['query']}")
+                    return zlib.decompress(entry["response"]).decode("utf-8")
+            if similar:
+                self.stats["attribute_mismatches"] += 1
+            self.stats["misses"] += 1
+            return None
+
+    def store(self, query: str, query_vector: Sequence[float], categories: Sequence[str],
+              user_parsed: Dict[str, Any], response: str):
+        """답변 저장 (날씨 포함 답변은 다음 발표 시각에 만료)"""
+        now = time.time()
+        expires_at = now + self.ttl
+        if "날씨" in categories:
+            expires_at = min(expires_at, weather_expiry(now))
+        entry = {
+            "id": uuid.uuid4().hex,
+            "query": query,
+            "attributes": cache_attributes(categories, user_parsed),
+            "vector": _unit(query_vector),
+            "response": zlib.compress(response.encode("utf-8")),
+            "created_at": now,
+            "expires_at": expires_at,
+            "data_version": self.version_fn(),
+        }
+        with self._lock:
+            self._entries.append(entry)
+            while len(self._entries) > self.max_entries:
+                self._remove_disk(self._entries.pop(0)["id"])
+            self._rebuild()
+            self.stats["stores"] += 1
+        self._write_disk(entry)
+
+    def clear(self):
+        with self._lock:
+            for entry in self._entries:
+                self._remove_disk(entry["id"])
+            self._entries = []
+            self._index = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+            stats["compressed_bytes"] = sum(len(e["response"]) for e in self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """프로세스 공용 응답 캐시 (RESPONSE_CACHE_DIR 가 설정되면 디스크에도 저장)"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(cache_dir=os.getenv("RESPONSE_CACHE_DIR"))
+    return _cache
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import traceback
 from typing import Dict, List, Optional, Tuple, Any
@@ -7,15 +8,26 @@ from langchain.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 import json
 import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from dotenv import load_dotenv
 
 # Import existing modules
 import vector_manger as vm
-from module import get_category, get_user_parser, get_naver_map_link
-from fetch_pt_places import fetch_pet_friendly_places_only
-from weather import get_weather, get_current_time
+from module import (get_category, get_user_parser, get_naver_map_link, analyze_query, aanalyze_query, INTENT_MODE,
+                    local_category, local_user_info, local_intent)
+from fetch_pt_places import fetch_pet_friendly_places_only, afetch_pet_friendly_places_only
+from weather import (get_weather, get_current_time, get_weather_batch, format_daily_forecast,
+                     aget_weather, aget_weather_batch)
 from vectordb_updater import VectorDBUpdater
+from llm_gateway import get_llm_gateway, build_response_prompt
+from context_builder import ContextBuilder, place_title
+from stage_graph import StageGraph, format_timings
+from metrics import LatencyHistogram
+from api_client import RequestMemo
+from deadline import Deadline, GENERATION_TIMEOUT_MESSAGE, WEATHER_SKIPPED_MESSAGE
 
 # Load environment variables
 load_dotenv()
@@ -25,6 +37,53 @@ openai_api_key = os.getenv('OPENAI_API_KEY')
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# process_query 단계를 실행하는 스레드 수 (요청 간 공유)
+RETRIEVER_STAGE_WORKERS = int(os.getenv("RETRIEVER_STAGE_WORKERS", "16"))
+# 카테고리 분석을 기다리지 않고 모든 카테고리를 미리 검색할 때의 문서 수 (더 많이 필요하면 다시 검색)
+SPECULATIVE_SEARCH_K = int(os.getenv("SPECULATIVE_SEARCH_K", "12"))
+# 검색 결과를 "충분히 관련 있음"으로 볼 최소 코사인 유사도 (vm.SCORE_KEY)
+QUALITY_THRESHOLD = float(os.getenv("RETRIEVER_QUALITY_THRESHOLD", "0.5"))
+# 지역 일치 여부를 확인하는 카테고리 (장소 데이터)
+REGIONAL_CATEGORIES = ("관광지", "숙박")
+# 주소로 지역 일치 여부를 확인하는 metadata 키
+REGION_METADATA_KEYS = ("province", "city", "road_address", "addr1", "addr2")
+# 지역명에서 떼어 내고 비교할 행정구역 접미사 (긴 것부터)
+REGION_SUFFIXES = ("특별자치시", "특별자치도", "특별시", "광역시", "도", "시", "군", "구")
+# 외부 API 보강을 기다리지 않고 기존 검색 결과로 먼저 답하는 카테고리 (쉼표 구분, 보강/DB 저장은 백그라운드)
+BACKGROUND_AUGMENT_CATEGORIES = tuple(
+    c.strip() for c in os.getenv("BACKGROUND_AUGMENT_CATEGORIES", "").split(",") if c.strip()
+)
+# 카테고리별 외부 API 보강을 동시에 실행하는 스레드 수 (요청 간 공유)
+AUGMENT_FETCH_WORKERS = int(os.getenv("AUGMENT_FETCH_WORKERS", "4"))
+# 백그라운드 보강 스레드 수
+BACKGROUND_AUGMENT_WORKERS = int(os.getenv("BACKGROUND_AUGMENT_WORKERS", "2"))
+
+# 응답 프롬프트: 고정 지침(system)을 앞에, 요청마다 바뀌는 값(human)을 뒤에 두어 프롬프트 prefix 캐시가 적용되도록 구성
+RESPONSE_SYSTEM_PROMPT = """
+        당신은 반려동물과 함께하는 여행 전문 도우미입니다. 
+        사용자의 질문에 대해 제공된 실제 데이터를 바탕으로 친절하고 유용한 답변을 제공해주세요.
+        
+        **중요 지침:**
+        1. 제공된 데이터만을 사용하여 답변하세요
+        2. 마크다운 형식으로 정리해서 응답하세요
+        3. 각 장소의 네이버 지도 링크를 포함하세요
+        4. 반려동물 관련 정보가 있다면 강조해서 안내하세요
+        5. 여행 일정이나 코스 추천이 가능하다면 제안해주세요
+        """
+
+RESPONSE_USER_TEMPLATE = """
+        사용자 질문: {query}
+        지역: {region}
+        반려동물: {pet_type}
+        여행 기간: {days}
+        
+        제공된 정보:
+        {content}
+        
+        위 정보를 바탕으로 친절하고 상세한 답변을 제공해주세요:
+        """
+
+
 class Retriever:
     """
     Enhanced retrieval system with automatic category routing and dynamic VectorDB augmentation
@@ -32,29 +91,59 @@ class Retriever:
     
     def __init__(self, 
                 min_results_threshold: int = 3,
-                quality_threshold: float = 0.7,
+                quality_threshold: float = QUALITY_THRESHOLD,
                 max_external_results: int = 30,  # 최대 외부 API fetch 개수 넉넉히
-                enable_db_updates: bool = True):
+                enable_db_updates: bool = True,
+                speculative_search: bool = True,
+                speculative_weather: bool = True,
+                background_augment: Optional[List[str]] = None):
         """
         Initialize the enhanced retriever
         
         Args:
-            min_results_threshold: Minimum number of results required before external API call
-            quality_threshold: Minimum similarity score for considering results as high quality
+            min_results_threshold: Minimum number of good results required before external API call
+            quality_threshold: Minimum cosine similarity for considering a result as high quality
             max_external_results: Maximum number of results to fetch from external APIs
             enable_db_updates: Whether to save new data to VectorDB
+            speculative_search: Search every category while categories are still being detected
+            speculative_weather: Fetch weather as soon as the region is known (used only if "날씨" is detected)
+            background_augment: Categories answered from existing results while the external fetch and
+                VectorDB insert run in the background (default: BACKGROUND_AUGMENT_CATEGORIES)
         """
         self.min_results_threshold = min_results_threshold
         self.quality_threshold = quality_threshold
         self.max_external_results = max_external_results
         self.enable_db_updates = enable_db_updates
+        self.speculative_search = speculative_search
+        self.speculative_weather = speculative_weather
+        
+        # Stage scheduler (shared pool) and per-stage latency
+        self._stage_executor = ThreadPoolExecutor(max_workers=RETRIEVER_STAGE_WORKERS,
+                                                  thread_name_prefix="retriever-stage")
+        self.stage_latency: Dict[str, LatencyHistogram] = {}
+        self.last_stage_timings: Optional[Dict[str, Dict[str, float]]] = None
+        
+        # Stale-while-revalidate augmentation (one in-flight job per category/region)
+        self.background_augment = set(BACKGROUND_AUGMENT_CATEGORIES if background_augment is None
+                                      else background_augment)
+        self._fetch_executor = ThreadPoolExecutor(max_workers=AUGMENT_FETCH_WORKERS,
+                                                  thread_name_prefix="retriever-fetch")
+        self._background_executor = ThreadPoolExecutor(max_workers=BACKGROUND_AUGMENT_WORKERS,
+                                                       thread_name_prefix="retriever-augment")
+        self._background_lock = threading.Lock()
+        self._background_inflight: set = set()
+        self.background_latency = LatencyHistogram()
+        self.background_stats = {"scheduled": 0, "deduplicated": 0, "completed": 0,
+                                 "changed": 0, "added_docs": 0, "failed": 0}
         
-        self.llm = ChatOpenAI(
-            model="gpt-4o-mini",
-            api_key=openai_api_key,
-            temperature=0.3
+        self.llm = get_llm_gateway().get_llm("gpt-4o-mini", temperature=0.3)
+        self.response_chain = get_llm_gateway().chain(
+            "retriever_response",
+            lambda: build_response_prompt(RESPONSE_SYSTEM_PROMPT, RESPONSE_USER_TEMPLATE) | self.llm | StrOutputParser(),
         )
         
+        self.last_context_report: Optional[Dict[str, Any]] = None
+        
         # Initialize VectorDB updater if updates are enabled
         self.db_updater = VectorDBUpdater() if enable_db_updates else None
         
@@ -64,54 +153,238 @@ class Retriever:
             "숙박": self._fetch_accommodations,
             # "대중교통": self._fetch_transport_info,  # Can be added later
         }
+        self.async_external_api_mapping = {
+            "관광지": self._afetch_tourist_attractions,
+            "숙박": self._afetch_accommodations,
+        }
     
-    def get_total_needed_places(self, days: Optional[Any]) -> int:
+    @staticmethod
+    def get_trip_days(days: Optional[Any]) -> int:
         try:
             days = int(days)
             if days < 1:
                 days = 1
         except (TypeError, ValueError):
             days = 1
-        return days * 4
+        return days
 
-    def process_query(self, query: str, stream: bool = False) -> str:
+    def get_total_needed_places(self, days: Optional[Any]) -> int:
+        return self.get_trip_days(days) * 4
+
+    def process_query(self, query: str, stream: bool = False, deadline: Optional[Deadline] = None) -> str:
         """
         Main processing pipeline for user queries
         
+        The stages run as a dependency graph (see _build_stage_graph): each stage starts as soon
+        as its inputs are ready, and per-stage timings are logged.
+        Every stage is bounded by the request deadline; optional stages (augmentation, weather,
+        VectorDB writes) are skipped when the budget runs low and the answer notes what was left out.
+        
         Args:
             query: User input query
             stream: Whether to stream the response
+            deadline: Request time budget (a new Deadline() if not given)
             
         Returns:
             Generated response or stream generator
         """
         try:
             logger.info(f"Processing query: {query}")
+            deadline = deadline or Deadline()
+            results, timings = self._build_stage_graph(query, stream, deadline).run()
+            self.last_stage_timings = timings
+            logger.info(f"Stage timings: {format_timings(timings)}")
+            return self._with_note(results["generate"], deadline, stream)
             
-            # Step 1: Query Analysis
-            categories = self._analyze_query_categories(query)
-            user_parsed = self._parse_user_info(query)
+        except Exception as e:
+            logger.error(f"Error processing query: {str(e)}\n{traceback.format_exc()}")
+            return "죄송합니다. 요청을 처리하는 중 오류가 발생했습니다. 다시 시도해 주세요."
+
+    def _build_stage_graph(self, query: str, stream: bool = False,
+                           deadline: Optional[Deadline] = None) -> StageGraph:
+        """
+        process_query stages and their inputs
+        
+            categories ─┬──────────────────────────┐
+            user_info ──┼─ search ─ quality ─ augment ─ generate
+            speculative_search ┘                      │
+            user_info ─ weather_prefetch ─ weather ───┘
+        
+        weather also takes categories and only waits for the prefetch when "날씨" was detected.
+        Analysis, augment, weather and generate get a deadline allowance; a stage that runs
+        over is replaced by its fallback (local analysis, unaugmented results, a weather notice).
+        """
+        deadline = deadline or Deadline()
+        graph = StageGraph(self._stage_executor, self.stage_latency)
+        
+        def on_timeout(stage: str, fallback):
+            def handler(**inputs):
+                deadline.skip(stage, "timed out")
+                return fallback(**inputs)
+            return handler
+        
+        # Query analysis (category + user info run concurrently, or as one call in "single" mode)
+        if INTENT_MODE == "single":
+            graph.add("intent", lambda: analyze_query(query, mode="single"),
+                      timeout=lambda: deadline.allowance("categories"),
+                      on_timeout=on_timeout("categories", lambda: local_intent(query)))
+            graph.add("categories", lambda intent: intent[0], inputs=("intent",))
+            graph.add("user_info", lambda intent: intent[1], inputs=("intent",))
+        else:
+            graph.add("categories", lambda: self._analyze_query_categories(query),
+                      timeout=lambda: deadline.allowance("categories"),
+                      on_timeout=on_timeout("categories", lambda: local_category(query)))
+            graph.add("user_info", lambda: self._parse_user_info(query),
+                      timeout=lambda: deadline.allowance("user_info"),
+                      on_timeout=on_timeout("user_info", lambda: local_user_info(query)))
+        
+        # VectorDB search (speculatively over every category before categories are known)
+        if self.speculative_search:
+            # Deduplication waits until the detected categories are known (see _select_search_results)
+            graph.add("speculative_search", lambda: self._search_vector_db(
+                query, list(vm.category_to_db), k_each=SPECULATIVE_SEARCH_K, top_k=SPECULATIVE_SEARCH_K,
+                min_k=vm.ADAPTIVE_MIN_K))
+            graph.add("search", lambda categories, user_info, speculative_search: self._select_search_results(
+                query, categories, user_info, speculative_search),
+                inputs=("categories", "user_info", "speculative_search"))
+        else:
+            graph.add("search", lambda categories, user_info: self._select_search_results(
+                query, categories, user_info, None), inputs=("categories", "user_info"))
+        
+        graph.add("quality", lambda search, categories, user_info: self._assess_result_quality(
+            search, categories, self.get_total_needed_places(user_info.get("days", 1)), user_info.get("region")),
+            inputs=("search", "categories", "user_info"))
+        graph.add("augment", lambda search, quality, categories, user_info: self._augment_results_if_needed(
+            query, user_info, [c for c in categories if c != "날씨"], search, quality,
+            self.get_total_needed_places(user_info.get("days", 1)), deadline),
+            inputs=("search", "quality", "categories", "user_info"),
+            timeout=lambda: deadline.allowance("augment"),
+            on_timeout=on_timeout("augment", lambda search, **_: search.copy()))
+        
+        # Weather: the KMA call can start as soon as the region is known, but generate only
+        # waits for it when "날씨" was detected
+        weather_timeout = on_timeout("weather", lambda **_: self._weather_skipped())
+        if self.speculative_weather:
+            graph.add("weather_prefetch", lambda user_info: self._prefetch_weather(user_info, deadline),
+                      inputs=("user_info",))
+            graph.add("weather", lambda weather_prefetch, user_info, categories: self._weather_stage(
+                user_info, categories, deadline, weather_prefetch),
+                inputs=("weather_prefetch", "user_info", "categories"),
+                timeout=lambda: deadline.allowance("weather"), on_timeout=weather_timeout)
+        else:
+            graph.add("weather", lambda user_info, categories: self._weather_stage(user_info, categories, deadline),
+                      inputs=("user_info", "categories"), timeout=lambda: deadline.allowance("weather"),
+                      on_timeout=weather_timeout)
+        
+        graph.add("generate", lambda augment, weather, categories, user_info: self._generate_stage(
+            query, user_info, categories, augment, weather, stream, deadline),
+            inputs=("augment", "weather", "categories", "user_info"),
+            timeout=deadline.generation_allowance,
+            on_timeout=lambda **_: iter([GENERATION_TIMEOUT_MESSAGE]) if stream else GENERATION_TIMEOUT_MESSAGE)
+        return graph
+
+    def _select_search_results(self, query: str, categories: List[str], user_info: Dict[str, Any],
+                               speculative: Optional[Dict[str, List[Document]]]) -> Dict[str, List[Document]]:
+        """Detected categories' results, reusing the speculative search when it searched deep enough"""
+        logger.info(f"Detected categories: {categories}")
+        logger.info(f"Parsed user info: {user_info}")
+        total_needed = self.get_total_needed_places(user_info.get("days", 1))
+        if speculative is not None and total_needed <= SPECULATIVE_SEARCH_K:
+            selected = vm.dedupe_places({c: speculative[c] for c in categories if c in speculative})
+            return {c: docs[:total_needed] for c, docs in selected.items()}
+        return self._search_vector_db(query, categories, k_each=total_needed, top_k=total_needed,
+                                      min_k=min(total_needed, vm.ADAPTIVE_MIN_K), dedupe=True)
+
+    def _prefetch_weather(self, user_info: Dict[str, Any], deadline: Optional[Deadline] = None) -> Optional[Future]:
+        """
+        Start the weather fetch in the background; the result is only awaited by _weather_stage
+        
+        "날씨" may not have been asked for, so a spent budget skips the prefetch without recording
+        a skip - _weather_stage records it only for weather queries.
+        """
+        if not user_info.get("region"):
+            return None
+        if deadline is not None and not deadline.allows("weather", record=False):
+            return None
+        return self._fetch_executor.submit(self._get_weather_info, user_info.get("region"),
+                                           self.get_trip_days(user_info.get("days")))
+
+    def _weather_stage(self, user_info: Dict[str, Any], categories: List[str],
+                       deadline: Optional[Deadline] = None,
+                       prefetched: Optional[Future] = None) -> Optional[List[Document]]:
+        """Weather documents when "날씨" was detected (None otherwise, without waiting for a prefetch)"""
+        if "날씨" not in categories or not user_info.get("region"):
+            return None
+        if deadline is not None and not deadline.allows("weather"):
+            return self._weather_skipped()
+        if prefetched is not None:
+            return prefetched.result()
+        return self._get_weather_info(user_info.get("region"), self.get_trip_days(user_info.get("days")))
+
+    @staticmethod
+    def _weather_skipped() -> List[Document]:
+        return [Document(page_content=WEATHER_SKIPPED_MESSAGE, metadata={})]
+
+    @staticmethod
+    def _with_note(response, deadline: Deadline, stream: bool):
+        """Append the deadline's skipped-stage note to the answer (as a final chunk when streaming)"""
+        note = deadline.note()
+        if not note or response == GENERATION_TIMEOUT_MESSAGE:
+            return response
+        if not stream:
+            return response + note
+
+        def chunks():
+            yield from response
+            # 생성이 시간 초과로 끊겼으면 지연 안내로 끝냄
+            if "generate" not in deadline.skipped:
+                yield note
+        return chunks()
+
+    def _generate_stage(self, query: str, user_info: Dict[str, Any], categories: List[str],
+                        results: Dict[str, List[Document]], weather: Optional[List[Document]], stream: bool,
+                        deadline: Optional[Deadline] = None):
+        if "날씨" in categories:
+            # weather is None when no region was found (returns the "지역 정보가 없어" notice)
+            results = dict(results, 날씨=weather if weather is not None else self._get_weather_info(None))
+        response = self._generate_response(query, user_info, results, stream)
+        if stream and deadline is not None:
+            # The stage only returns the iterator, so the stage timeout cannot bound the stream itself
+            return deadline.stream(response)
+        return response
+
+    def get_stage_stats(self) -> Dict[str, Any]:
+        """Per-stage latency distribution"""
+        return {name: histogram.snapshot() for name, histogram in self.stage_latency.items()}
+
+    async def aprocess_query(self, query: str, deadline: Optional[Deadline] = None) -> str:
+        """
+        Async version of process_query
+        
+        LLM calls use ainvoke, Tour API / weather use async HTTP, and embedding, FAISS search
+        and VectorDB writes run in the bounded vector executor. Stages share the same deadline
+        rules as process_query.
+        """
+        try:
+            logger.info(f"Processing query: {query}")
+            deadline = deadline or Deadline()
             
+            categories, user_parsed = await deadline.acall(
+                "categories", aanalyze_query(query), lambda: local_intent(query))
             logger.info(f"Detected categories: {categories}")
             logger.info(f"Parsed user info: {user_parsed}")
             
-            # Step 1.5: Determine needed places by days
-            days = user_parsed.get("days", 1)
-            total_needed = self.get_total_needed_places(days)
-            
-            # Step 2: Initial VectorDB Search (동적으로 개수 조정)
-            initial_results = self._search_vector_db(query, categories, k_each=total_needed, top_k=total_needed)
-            
-            # Step 3: Result Quality Assessment
-            quality_assessment = self._assess_result_quality(initial_results, categories, total_needed)
-            
-            # Step 4: Dynamic Augmentation if needed (total_needed 전달)
-            final_results = self._augment_results_if_needed(
-                query, user_parsed, categories, initial_results, quality_assessment, total_needed
+            total_needed = self.get_total_needed_places(user_parsed.get("days", 1))
+            initial_results = await self._asearch_vector_db(query, categories, k_each=total_needed, top_k=total_needed,
+                                                            min_k=min(total_needed, vm.ADAPTIVE_MIN_K), dedupe=True)
+            quality_assessment = self._assess_result_quality(initial_results, categories, total_needed,
+                                                             user_parsed.get("region"))
+            final_results = await self._aaugment_results_if_needed(
+                query, user_parsed, categories, initial_results, quality_assessment, total_needed, deadline
             )
-            
-            # Step 5: Generate Final Response
-            return self._generate_response(query, user_parsed, final_results, stream)
+            response = await deadline.acall("generate", self._agenerate_response(query, user_parsed, final_results),
+                                            lambda: GENERATION_TIMEOUT_MESSAGE)
+            return self._with_note(response, deadline, stream=False)
             
         except Exception as e:
             logger.error(f"Error processing query: {str(e)}\n{traceback.format_exc()}")
@@ -133,28 +406,48 @@ class Retriever:
             logger.error(f"Error parsing user info: {str(e)}")
             return {"region": None, "pet_type": None, "days": None}
     
-    def _search_vector_db(self, query: str, categories: List[str], k_each: int = 5, top_k: int = 5) -> Dict[str, List[Document]]:
-        """Search vector database for each category"""
+    def _search_vector_db(self, query: str, categories: List[str], k_each: int = 5, top_k: int = 5,
+                          min_k: Optional[int] = None, dedupe: bool = False) -> Dict[str, List[Document]]:
+        """Search vector database for each category (min_k: adaptive cut-off between min_k and top_k)"""
         try:
             return vm.multiretrieve_by_category(
                 query=query,
                 categories=categories,
                 k_each=k_each,
-                top_k=top_k
+                top_k=top_k,
+                min_k=min_k,
+                dedupe=dedupe
             )
         except Exception as e:
             logger.error(f"Error searching vector DB: {str(e)}")
             return {}
+
+    async def _asearch_vector_db(self, query: str, categories: List[str], k_each: int = 5, top_k: int = 5,
+                                 min_k: Optional[int] = None, dedupe: bool = False) -> Dict[str, List[Document]]:
+        """Async version of _search_vector_db (runs in the vector executor)"""
+        try:
+            return await vm.amultiretrieve_by_category(query=query, categories=categories, k_each=k_each, top_k=top_k,
+                                                       min_k=min_k, dedupe=dedupe)
+        except Exception as e:
+            logger.error(f"Error searching vector DB: {str(e)}")
+            return {}
     
     def _assess_result_quality(self, results: Dict[str, List[Document]], 
-                                categories: List[str], total_needed: int) -> Dict[str, Dict[str, Any]]:
+                                categories: List[str], total_needed: int,
+                                region: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
         """
         Assess the quality and sufficiency of search results
         
+        A result is "good" when its similarity (vm.SCORE_KEY) reaches quality_threshold, its content
+        is not a stub, and - for place categories with a known region - its address is in that region.
+        External APIs are only called when fewer than min(min_results_threshold, total_needed)
+        results are good.
+        
         Returns:
             Dict with quality assessment for each category
         """
         assessment = {}
+        region_stem = self._region_stem(region)
         
         for category in categories:
             if category == "날씨":
@@ -162,22 +455,20 @@ class Retriever:
                 
             category_results = results.get(category, [])
             result_count = len(category_results)
+            check_region = region_stem is not None and category in REGIONAL_CATEGORIES
             
-            # Assess quantity
-            sufficient_quantity = result_count >= total_needed
-            
-            # Assess quality (simple heuristic - can be improved)
-            avg_content_length = 0
-            if category_results:
-                avg_content_length = sum(len(doc.page_content) for doc in category_results) / len(category_results)
-            
-            sufficient_quality = avg_content_length > 50  # Minimum content length
+            similar = [doc for doc in category_results
+                       if doc.metadata.get(vm.SCORE_KEY, 1.0) >= self.quality_threshold and len(doc.page_content) > 50]
+            good = [doc for doc in similar if not check_region or self._matches_region(doc, region_stem)]
+            scores = [doc.metadata[vm.SCORE_KEY] for doc in category_results if vm.SCORE_KEY in doc.metadata]
             
             assessment[category] = {
                 "result_count": result_count,
-                "sufficient_quantity": sufficient_quantity,
-                "sufficient_quality": sufficient_quality,
-                "needs_augmentation": not (sufficient_quantity and sufficient_quality)
+                "good_count": len(good),
+                "max_similarity": round(max(scores), 3) if scores else None,
+                "region_mismatches": len(similar) - len(good),
+                "sufficient_quantity": len(good) >= total_needed,
+                "needs_augmentation": len(good) < min(self.min_results_threshold, total_needed)
             }
             
             logger.info(f"Quality assessment for {category}: {assessment[category]}")
@@ -186,118 +477,358 @@ class Retriever:
     
     def _augment_results_if_needed(self, query: str, user_parsed: Dict[str, Any], 
                                   categories: List[str], initial_results: Dict[str, List[Document]],
-                                  quality_assessment: Dict[str, Dict[str, Any]], total_needed: int) -> Dict[str, List[Document]]:
+                                  quality_assessment: Dict[str, Dict[str, Any]], total_needed: int,
+                                  deadline: Optional[Deadline] = None) -> Dict[str, List[Document]]:
         """
         Augment results with external API calls if needed
+        
+        With a deadline, external fetches and VectorDB writes are skipped once the budget runs low.
+        Categories are fetched concurrently, and identical external calls (e.g. 관광지 and 숙박 both
+        listing the region's pet-friendly places) run once per query through a RequestMemo.
         """
         final_results = initial_results.copy()
+        memo = RequestMemo()
         
+        # Start every needed fetch first
+        pending = {}
         for category in categories:
             if category == "날씨":
-                # Handle weather separately
-                final_results[category] = self._get_weather_info(user_parsed.get("region"))
                 continue
-                
-            assessment = quality_assessment.get(category, {})
-            existing_docs = final_results.get(category, [])
-            # 중복 체크용 title/contentid set
-            existing_titles = set(doc.metadata.get("title") for doc in existing_docs if doc.metadata.get("title"))
-            existing_ids = set(doc.metadata.get("contentid") for doc in existing_docs if doc.metadata.get("contentid"))
-            shortfall = total_needed - len(existing_docs)
-            if assessment.get("needs_augmentation", False) and shortfall > 0:
+            shortfall = self._augmentation_shortfall(category, final_results, quality_assessment, total_needed)
+            if shortfall > 0:
+                if self._schedule_background_augment(query, user_parsed, category, final_results, shortfall):
+                    continue
+                if deadline is not None and not deadline.allows("augment"):
+                    continue
                 logger.info(f"Augmenting results for category: {category}")
-                
-                # Fetch external data
-                external_data = self._fetch_external_data(category, user_parsed)
-                
-                if external_data:
-                    # 중복 제거 (title 또는 contentid 기준)
-                    unique_external = [
-                        item for item in external_data
-                        if (
-                            (item.get("contentid") and item.get("contentid") not in existing_ids) or
-                            (item.get("title") and item.get("title") not in existing_titles)
-                        )
-                    ][:shortfall]
-                    external_docs = self._convert_to_documents(unique_external, category)
-                    
-                    # Add to VectorDB for future use if enabled
-                    if self.enable_db_updates and self.db_updater and unique_external:
-                        try:
-                            db_docs = self.db_updater.create_documents_from_api_data(unique_external, category, query)
-                            self.db_updater.add_documents_to_db(db_docs, category)
-                        except Exception as e:
-                            logger.error(f"Error updating VectorDB: {str(e)}")
-                    
-                    # Merge with existing results
-                    final_results[category] = existing_docs + external_docs
-                    
-                    logger.info(f"Added {len(external_docs)} external results for {category}")
+                pending[category] = (shortfall, self._fetch_executor.submit(
+                    self._fetch_external_data, category, user_parsed, memo))
+        
+        if "날씨" in categories:
+            # Handle weather separately (while the fetches run)
+            if deadline is not None and not deadline.allows("weather"):
+                final_results["날씨"] = self._weather_skipped()
+            else:
+                final_results["날씨"] = self._get_weather_info(
+                    user_parsed.get("region"), self.get_trip_days(user_parsed.get("days"))
+                )
         
+        for category, (shortfall, future) in pending.items():
+            unique_external = self._unique_external(final_results.get(category, []), future.result(), shortfall)
+            
+            # Add to VectorDB for future use if enabled
+            if unique_external and (deadline is None or deadline.allows("db_write")):
+                self._update_db(unique_external, category, query)
+            
+            self._merge_external(final_results, category, unique_external)
+        
+        if pending:
+            logger.info(f"External fetches: {memo.get_stats()}")
         return final_results
+
+    async def _aaugment_results_if_needed(self, query: str, user_parsed: Dict[str, Any],
+                                          categories: List[str], initial_results: Dict[str, List[Document]],
+                                          quality_assessment: Dict[str, Dict[str, Any]], total_needed: int,
+                                          deadline: Optional[Deadline] = None) -> Dict[str, List[Document]]:
+        """Async version of _augment_results_if_needed (weather and external fetches run concurrently)"""
+        final_results = initial_results.copy()
+        deadline = deadline or Deadline()
+        memo = RequestMemo()
+        
+        pending = {}
+        for category in categories:
+            if category == "날씨":
+                if not deadline.allows("weather"):
+                    final_results[category] = self._weather_skipped()
+                    continue
+                pending[category] = deadline.acall("weather", self._aget_weather_info(
+                    user_parsed.get("region"), self.get_trip_days(user_parsed.get("days"))
+                ), self._weather_skipped)
+                continue
+            shortfall = self._augmentation_shortfall(category, final_results, quality_assessment, total_needed)
+            if shortfall > 0:
+                if self._schedule_background_augment(query, user_parsed, category, final_results, shortfall):
+                    continue
+                if not deadline.allows("augment"):
+                    continue
+                logger.info(f"Augmenting results for category: {category}")
+                pending[category] = deadline.acall("augment", self._afetch_external_data(category, user_parsed, memo), list)
+        
+        fetched = await asyncio.gather(*pending.values())
+        for category, value in zip(pending, fetched):
+            if category == "날씨":
+                final_results[category] = value
+                continue
+            shortfall = self._augmentation_shortfall(category, final_results, quality_assessment, total_needed)
+            unique_external = self._unique_external(final_results.get(category, []), value, shortfall)
+            if unique_external and deadline.allows("db_write"):
+                await deadline.acall("db_write", vm.run_in_executor(self._update_db, unique_external, category, query),
+                                     lambda: None)
+            self._merge_external(final_results, category, unique_external)
+        
+        return final_results
+
+    def _schedule_background_augment(self, query: str, user_parsed: Dict[str, Any], category: str,
+                                     results: Dict[str, List[Document]], shortfall: int) -> bool:
+        """
+        Start the external fetch + VectorDB insert for a background-mode category
+        
+        The current answer uses the existing results; the next query for the region finds the new
+        documents in VectorDB. Returns False when the category should be augmented inline
+        (not in background mode, or no VectorDB updater to store the results).
+        """
+        if category not in self.background_augment or not (self.enable_db_updates and self.db_updater):
+            return False
+        key = (category, user_parsed.get("region"))
+        with self._background_lock:
+            if key in self._background_inflight:
+                self.background_stats["deduplicated"] += 1
+                return True
+            self._background_inflight.add(key)
+            self.background_stats["scheduled"] += 1
+        logger.info(f"Augmenting results for category in background: {category}")
+        existing_docs = list(results.get(category, []))
+        self._background_executor.submit(self._background_augment, key, query, dict(user_parsed),
+                                         category, existing_docs, shortfall)
+        return True
+
+    def _background_augment(self, key: Tuple[str, Any], query: str, user_parsed: Dict[str, Any],
+                            category: str, existing_docs: List[Document], shortfall: int):
+        started = time.perf_counter()
+        try:
+            external_data = self._fetch_external_data(category, user_parsed)
+            unique_external = self._unique_external(existing_docs, external_data, shortfall)
+            if unique_external:
+                self._update_db(unique_external, category, query)
+            with self._background_lock:
+                self.background_stats["completed"] += 1
+                if unique_external:
+                    self.background_stats["changed"] += 1
+                    self.background_stats["added_docs"] += len(unique_external)
+        except Exception as e:
+            logger.error(f"Error in background augmentation for {category}: {str(e)}")
+            with self._background_lock:
+                self.background_stats["failed"] += 1
+        finally:
+            self.background_latency.observe(time.perf_counter() - started)
+            with self._background_lock:
+                self._background_inflight.discard(key)
+
+    def get_background_stats(self) -> Dict[str, Any]:
+        """Background augmentation counters ("changed_rate": share of jobs that added new documents)"""
+        with self._background_lock:
+            stats = dict(self.background_stats)
+            stats["inflight"] = len(self._background_inflight)
+        stats["changed_rate"] = stats["changed"] / stats["completed"] if stats["completed"] else 0.0
+        stats["latency"] = self.background_latency.snapshot()
+        return stats
+
+    @staticmethod
+    def _region_stem(region: Optional[str]) -> Optional[str]:
+        """'부산광역시' -> '부산', '제주도' -> '제주' (addresses use either form)"""
+        if not region or region in ("null", "None"):
+            return None
+        region = region.strip()
+        for suffix in REGION_SUFFIXES:
+            if region.endswith(suffix) and len(region) - len(suffix) >= 2:
+                return region[:-len(suffix)]
+        return region
+
+    @staticmethod
+    def _matches_region(doc: Document, region_stem: str) -> bool:
+        return (any(region_stem in str(doc.metadata.get(key) or "") for key in REGION_METADATA_KEYS)
+                or region_stem in doc.page_content)
+
+    @staticmethod
+    def _augmentation_shortfall(category: str, results: Dict[str, List[Document]],
+                                quality_assessment: Dict[str, Dict[str, Any]], total_needed: int) -> int:
+        """Number of extra results to fetch for a category (0 if no augmentation is needed)"""
+        category_assessment = quality_assessment.get(category, {})
+        if not category_assessment.get("needs_augmentation", False):
+            return 0
+        good_count = category_assessment.get("good_count", len(results.get(category, [])))
+        return max(0, total_needed - good_count)
+
+    @staticmethod
+    def _unique_external(existing_docs: List[Document], external_data: List[Dict[str, Any]],
+                         shortfall: int) -> List[Dict[str, Any]]:
+        """External items not already in the results (by title or contentid), up to shortfall"""
+        # 중복 체크용 title/contentid set
+        existing_titles = set(doc.metadata.get("title") for doc in existing_docs if doc.metadata.get("title"))
+        existing_ids = set(doc.metadata.get("contentid") for doc in existing_docs if doc.metadata.get("contentid"))
+        return [
+            item for item in external_data
+            if (
+                (item.get("contentid") and item.get("contentid") not in existing_ids) or
+                (item.get("title") and item.get("title") not in existing_titles)
+            )
+        ][:shortfall]
+
+    def _update_db(self, unique_external: List[Dict[str, Any]], category: str, query: str):
+        """Save fetched items to VectorDB for future queries"""
+        if self.enable_db_updates and self.db_updater:
+            try:
+                db_docs = self.db_updater.create_documents_from_api_data(unique_external, category, query)
+                self.db_updater.add_documents_to_db(db_docs, category)
+            except Exception as e:
+                logger.error(f"Error updating VectorDB: {str(e)}")
+
+    def _merge_external(self, results: Dict[str, List[Document]], category: str,
+                        unique_external: List[Dict[str, Any]]):
+        if not unique_external:
+            return
+        external_docs = self._convert_to_documents(unique_external, category)
+        results[category] = results.get(category, []) + external_docs
+        logger.info(f"Added {len(external_docs)} external results for {category}")
     
-    def _fetch_external_data(self, category: str, user_parsed: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Fetch data from external APIs based on category"""
+    def _fetch_external_data(self, category: str, user_parsed: Dict[str, Any],
+                             memo: Optional[RequestMemo] = None) -> List[Dict[str, Any]]:
+        """Fetch data from external APIs based on category (memo: share identical calls within a query)"""
         if category in self.external_api_mapping:
             try:
-                return self.external_api_mapping[category](user_parsed)
+                return self.external_api_mapping[category](user_parsed, memo)
+            except Exception as e:
+                logger.error(f"Error fetching external data for {category}: {str(e)}")
+                return []
+        return []
+    
+    async def _afetch_external_data(self, category: str, user_parsed: Dict[str, Any],
+                                    memo: Optional[RequestMemo] = None) -> List[Dict[str, Any]]:
+        """Async version of _fetch_external_data"""
+        if category in self.async_external_api_mapping:
+            try:
+                return await self.async_external_api_mapping[category](user_parsed, memo)
             except Exception as e:
                 logger.error(f"Error fetching external data for {category}: {str(e)}")
                 return []
         return []
     
-    def _fetch_tourist_attractions(self, user_parsed: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _fetch_pet_friendly_places(self, user_parsed: Dict[str, Any],
+                                   memo: Optional[RequestMemo] = None) -> List[Dict[str, Any]]:
+        """fetch_pet_friendly_places_only, once per query when a memo is given (items are copied per caller)"""
+        fetch = lambda: fetch_pet_friendly_places_only(user_parsed, limit=self.max_external_results)
+        if memo is None:
+            return fetch()
+        key = ("pet_friendly_places", user_parsed.get("region"), self.max_external_results)
+        return [dict(item) for item in memo.get(key, fetch)]
+
+    async def _afetch_pet_friendly_places(self, user_parsed: Dict[str, Any],
+                                          memo: Optional[RequestMemo] = None) -> List[Dict[str, Any]]:
+        """Async version of _fetch_pet_friendly_places"""
+        fetch = lambda: afetch_pet_friendly_places_only(user_parsed, limit=self.max_external_results)
+        if memo is None:
+            return await fetch()
+        key = ("pet_friendly_places", user_parsed.get("region"), self.max_external_results)
+        return [dict(item) for item in await memo.aget(key, fetch)]
+
+    def _fetch_tourist_attractions(self, user_parsed: Dict[str, Any],
+                                   memo: Optional[RequestMemo] = None) -> List[Dict[str, Any]]:
         """Fetch tourist attractions from external API"""
         try:
             if user_parsed.get("region"):
-                results = fetch_pet_friendly_places_only(user_parsed, limit=self.max_external_results)
+                results = self._fetch_pet_friendly_places(user_parsed, memo)
                 logger.info(f"Fetched {len(results)} tourist attractions from external API")
                 return results
         except Exception as e:
             logger.error(f"Error fetching tourist attractions: {str(e)}")
         return []
     
-    def _fetch_accommodations(self, user_parsed: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _fetch_accommodations(self, user_parsed: Dict[str, Any],
+                              memo: Optional[RequestMemo] = None) -> List[Dict[str, Any]]:
         """Fetch accommodation data from external API"""
         # This can be implemented with another API
-        # For now, using the same API as tourist attractions
+        # For now, using the same API as tourist attractions (shared through the memo)
         try:
             if user_parsed.get("region"):
-                results = fetch_pet_friendly_places_only(user_parsed, limit=self.max_external_results)
-                # Filter for accommodations if possible
-                accommodations = [r for r in results if any(keyword in r.get('title', '').lower() 
-                                                        for keyword in ['호텔', '펜션', '리조트', '게스트하우스', '숙박'])]
-                logger.info(f"Fetched {len(accommodations)} accommodations from external API")
-                return accommodations
+                results = self._fetch_pet_friendly_places(user_parsed, memo)
+                return self._filter_accommodations(results)
         except Exception as e:
             logger.error(f"Error fetching accommodations: {str(e)}")
         return []
+
+    async def _afetch_tourist_attractions(self, user_parsed: Dict[str, Any],
+                                          memo: Optional[RequestMemo] = None) -> List[Dict[str, Any]]:
+        """Async version of _fetch_tourist_attractions"""
+        try:
+            if user_parsed.get("region"):
+                results = await self._afetch_pet_friendly_places(user_parsed, memo)
+                logger.info(f"Fetched {len(results)} tourist attractions from external API")
+                return results
+        except Exception as e:
+            logger.error(f"Error fetching tourist attractions: {str(e)}")
+        return []
+
+    async def _afetch_accommodations(self, user_parsed: Dict[str, Any],
+                                     memo: Optional[RequestMemo] = None) -> List[Dict[str, Any]]:
+        """Async version of _fetch_accommodations"""
+        try:
+            if user_parsed.get("region"):
+                results = await self._afetch_pet_friendly_places(user_parsed, memo)
+                return self._filter_accommodations(results)
+        except Exception as e:
+            logger.error(f"Error fetching accommodations: {str(e)}")
+        return []
+
+    @staticmethod
+    def _filter_accommodations(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # Filter for accommodations if possible
+        accommodations = [r for r in results if any(keyword in r.get('title', '').lower() 
+                                                for keyword in ['호텔', '펜션', '리조트', '게스트하우스', '숙박'])]
+        logger.info(f"Fetched {len(accommodations)} accommodations from external API")
+        return accommodations
     
-    def _get_weather_info(self, region: str) -> List[Document]:
-        """Get weather information"""
+    def _get_weather_info(self, region: str, days: int = 1) -> List[Document]:
+        """Get weather information (with a per-day forecast for multi-day trips)"""
         if not region:
             return [Document(page_content="지역 정보가 없어 날씨를 조회할 수 없습니다.", metadata={})]
         
         try:
             weather_data = get_weather(region)
-            current_time = get_current_time()
-            
-            if "error" not in weather_data:
-                content = f"""
-                        ### 현재 시간 및 날씨 정보
-                        - 현재 시간: {current_time['full_datetime']}
-                        - 도시: {weather_data['city']}
-                        - 기온: {weather_data['temperature']}°C
-                        - 습도: {weather_data['humidity']}%
-                        - 강수형태: {weather_data['precipitation_type']}
-                        - 풍속: {weather_data['wind_speed']} m/s
-                """.strip()
-                return [Document(page_content=content, metadata=weather_data)]
+            forecast = get_weather_batch([region], days=days).get(region, {}) if days > 1 else None
+            return self._weather_documents(weather_data, forecast)
+        except Exception as e:
+            logger.error(f"Error getting weather info: {str(e)}")
+            return [Document(page_content="날씨 정보를 가져오는데 실패했습니다.", metadata={})]
+
+    async def _aget_weather_info(self, region: str, days: int = 1) -> List[Document]:
+        """Async version of _get_weather_info"""
+        if not region:
+            return [Document(page_content="지역 정보가 없어 날씨를 조회할 수 없습니다.", metadata={})]
+        
+        try:
+            if days > 1:
+                weather_data, batch = await asyncio.gather(aget_weather(region), aget_weather_batch([region], days=days))
+                forecast = batch.get(region, {})
             else:
-                return [Document(page_content=f"날씨 정보 조회 실패: {weather_data['error']}", metadata={})]
+                weather_data, forecast = await aget_weather(region), None
+            return self._weather_documents(weather_data, forecast)
         except Exception as e:
             logger.error(f"Error getting weather info: {str(e)}")
             return [Document(page_content="날씨 정보를 가져오는데 실패했습니다.", metadata={})]
+
+    @staticmethod
+    def _weather_documents(weather_data: Dict[str, Any], forecast: Optional[Dict[str, Any]]) -> List[Document]:
+        current_time = get_current_time()
+        if "error" not in weather_data:
+            content = f"""
+                    ### 현재 시간 및 날씨 정보
+                    - 현재 시간: {current_time['full_datetime']}
+                    - 도시: {weather_data['city']}
+                    - 기온: {weather_data['temperature']}°C
+                    - 습도: {weather_data['humidity']}%
+                    - 강수형태: {weather_data['precipitation_type']}
+                    - 풍속: {weather_data['wind_speed']} m/s
+            """.strip()
+            documents = [Document(page_content=content, metadata=weather_data)]
+        else:
+            documents = [Document(page_content=f"날씨 정보 조회 실패: {weather_data['error']}", metadata={})]
+
+        if forecast is not None and "error" not in forecast:
+            documents.append(Document(
+                page_content="### 일자별 날씨 예보\n" + format_daily_forecast(forecast["days"]),
+                metadata={"city": forecast["city"], "days": forecast["days"]}
+            ))
+        return documents
     
     def _convert_to_documents(self, external_data: List[Dict[str, Any]], category: str) -> List[Document]:
         """Convert external API data to Document objects"""
@@ -326,93 +857,87 @@ class Retriever:
         
         return documents
     
-    def _generate_response(self, query: str, user_parsed: Dict[str, Any], 
-                          results: Dict[str, List[Document]], stream: bool = False) -> str:
-        """Generate final response using LLM"""
-        
-        # Prepare content sections
-        content_sections = []
-        
-        for category, docs in results.items():
-            if not docs:
-                continue
-                
-            category_content = f"### {category} 정보\n"
-            
-            for i, doc in enumerate(docs, 1):
-                metadata = doc.metadata
-                
-                # Generate map link
-                place_name = metadata.get("title", f"장소 {i}")
-                map_link = get_naver_map_link(place_name) if place_name != f"장소 {i}" else "#"
-                
-                place_info = f"**{i}. [{place_name}]({map_link})**\n"
-                place_info += doc.page_content
-                
-                if metadata.get('data_source') == 'external_api':
-                    place_info += "\n   *(최신 정보)*"
-                
-                place_info += "\n\n"
-                category_content += place_info
-            
-            content_sections.append(category_content)
-        
-        content = "\n".join(content_sections)
+    @staticmethod
+    def _format_place(i: int, doc: Document) -> str:
+        # Generate map link
+        place_name = place_title(doc)
+        map_link = get_naver_map_link(place_name) if place_name else "#"
         
-        # Generate final response using LLM
-        template = """
-        당신은 반려동물과 함께하는 여행 전문 도우미입니다. 
-        사용자의 질문에 대해 제공된 실제 데이터를 바탕으로 친절하고 유용한 답변을 제공해주세요.
-        
-        **중요 지침:**
-        1. 제공된 데이터만을 사용하여 답변하세요
-        2. 마크다운 형식으로 정리해서 응답하세요
-        3. 각 장소의 네이버 지도 링크를 포함하세요
-        4. 반려동물 관련 정보가 있다면 강조해서 안내하세요
-        5. 여행 일정이나 코스 추천이 가능하다면 제안해주세요
-        
-        사용자 질문: {query}
-        지역: {region}
-        반려동물: {pet_type}
-        여행 기간: {days}
+        place_info = f"**{i}. [{place_name or f'장소 {i}'}]({map_link})**\n"
+        place_info += doc.page_content
         
-        제공된 정보:
-        {content}
+        if doc.metadata.get('data_source') == 'external_api':
+            place_info += "\n   *(최신 정보)*"
         
-        위 정보를 바탕으로 친절하고 상세한 답변을 제공해주세요:
-        """
+        return place_info + "\n\n"
+    
+    def _generate_response(self, query: str, user_parsed: Dict[str, Any], 
+                          results: Dict[str, List[Document]], stream: bool = False) -> str:
+        """Generate final response using LLM"""
+        inputs = self._response_inputs(query, user_parsed, results)
+        gateway = get_llm_gateway()
+        if stream:
+            return gateway.stream(self.response_chain, inputs, name="retriever_response")
+        else:
+            return gateway.invoke(self.response_chain, inputs, name="retriever_response")
+
+    async def _agenerate_response(self, query: str, user_parsed: Dict[str, Any],
+                                  results: Dict[str, List[Document]]) -> str:
+        """Async version of _generate_response"""
+        inputs = self._response_inputs(query, user_parsed, results)
+        return await get_llm_gateway().ainvoke(self.response_chain, inputs, name="retriever_response")
+
+    def _response_inputs(self, query: str, user_parsed: Dict[str, Any],
+                         results: Dict[str, List[Document]]) -> Dict[str, Any]:
+        # Prepare content sections (deduplicated, cleaned and packed into the token budget)
+        content, report = ContextBuilder().build(results, self._format_place)
+        self.last_context_report = report
+        logger.info(f"Context tokens: {report['tokens_before']} -> {report['tokens_after']} "
+                    f"(docs {report['docs_before']} -> {report['docs_after']}, duplicates {report['duplicates']})")
         
-        prompt = PromptTemplate.from_template(template)
-        inputs = {
+        return {
             "query": query,
             "region": user_parsed.get("region", "정보 없음"),
             "pet_type": user_parsed.get("pet_type", "정보 없음"),
             "days": user_parsed.get("days", "정보 없음"),
             "content": content or "관련 정보를 찾을 수 없습니다."
         }
-        
-        chain = prompt | self.llm | StrOutputParser()
-        
-        if stream:
-            return chain.stream(inputs)
-        else:
-            return chain.invoke(inputs)
+
+
+# Global instance
+_retriever: Optional[Retriever] = None
+_retriever_lock = threading.Lock()
+
+
+def get_retriever() -> Retriever:
+    """Get global retriever instance (LLM client and VectorDB updater are reused across queries)"""
+    global _retriever
+    if _retriever is None:
+        with _retriever_lock:
+            if _retriever is None:
+                _retriever = Retriever()
+    return _retriever
 
 
 # Convenience functions for backward compatibility
-def process_query(query: str, stream: bool = False) -> str:
+def process_query(query: str, stream: bool = False, deadline: Optional[Deadline] = None) -> str:
     """
     Process query using the enhanced retriever system
     
     Args:
         query: User input query
         stream: Whether to stream the response
+        deadline: Request time budget (a new Deadline() if not given)
         
     Returns:
         Generated response
     """
-    retriever = Retriever()
-    return retriever.process_query(query, stream)
+    return get_retriever().process_query(query, stream, deadline)
+
+
+async def aprocess_query(query: str) -> str:
+    """Async version of process_query"""
+    return await get_retriever().aprocess_query(query)
 
 
 # # Example usage and testing
@@ -0,0 +1,199 @@
+"""
+요청 처리 단계 DAG 스케줄러
+
+각 단계는 이름, 함수, 입력(다른 단계 이름) 목록으로 선언합니다.
+입력이 모두 끝난 단계는 바로 스레드 풀에 제출되므로, 서로 의존하지 않는 단계는 동시에 실행됩니다.
+
+    graph = StageGraph(executor)
+    graph.add("categories", lambda: get_category(query))
+    graph.add("user_info", lambda: get_user_parser(query))
+    graph.add("search", lambda categories: search(categories), inputs=("categories",))
+    results, timings = graph.run()
+
+단계 함수는 입력 단계의 결과를 같은 이름의 키워드 인자로 받습니다.
+timings 는 단계별 {ready_ms, start_ms, end_ms, duration_ms} (실행 시작 기준 ms) 입니다.
+
+timeout 을 준 단계는 풀 대신 전용 데몬 스레드에서 바로 시작하고, 그 시간 안에 끝나지 않으면
+on_timeout(같은 입력) 결과로 대체됩니다 (timings 에 timed_out=True). 버려진 함수는 그 스레드에서
+마저 끝나므로 멈춘 호출이 공용 풀 워커를 붙잡아 뒤 요청의 단계가 대기열에서 시간 초과되지 않습니다.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Tuple, Union
+
+from metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+
+class StageGraph:
+    """
+    단계 의존 그래프
+
+    Args:
+        executor: 단계를 실행할 풀 (None 이면 run() 동안만 쓰는 임시 풀)
+        histograms: 단계 이름별 소요 시간을 누적할 LatencyHistogram 사전 (없는 이름은 자동 생성)
+    """
+
+    def __init__(self, executor: Optional[Executor] = None,
+                 histograms: Optional[Dict[str, LatencyHistogram]] = None):
+        self.executor = executor
+        self.histograms = histograms
+        self._stages: Dict[str, Tuple[Callable[..., Any], Tuple[str, ...]]] = {}
+        self._timeouts: Dict[str, Tuple[Union[float, Callable[[], float]], Callable[..., Any]]] = {}
+
+    def add(self, name: str, fn: Callable[..., Any], inputs: Sequence[str] = (),
+            timeout: Union[None, float, Callable[[], float]] = None,
+            on_timeout: Optional[Callable[..., Any]] = None) -> "StageGraph":
+        """
+        단계 추가
+
+        Args:
+            name: 단계 이름 (다른 단계의 inputs 와 결과 키로 사용)
+            fn: 입력 단계 결과를 키워드 인자로 받는 함수
+            inputs: 입력 단계 이름 목록
+            timeout: 시작 후 허용 시간(초) 또는 시작 시점에 허용 시간을 계산하는 함수
+            on_timeout: 시간 초과 시 결과 대신 쓸 값을 만드는 함수 (fn 과 같은 입력을 받음)
+        """
+        if name in self._stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        self._stages[name] = (fn, tuple(inputs))
+        if timeout is not None:
+            self._timeouts[name] = (timeout, on_timeout or (lambda **_: None))
+        return self
+
+    def _validate(self):
+        for name, (_, inputs) in self._stages.items():
+            missing = [i for i in inputs if i not in self._stages]
+            if missing:
+                raise ValueError(f"Stage '{name}' depends on unknown stage(s): {missing}")
+        # 위상 정렬로 순환 확인
+        remaining = {name: set(inputs) for name, (_, inputs) in self._stages.items()}
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Cycle between stages: {sorted(remaining)}")
+            for name in ready:
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+
+    def run(self) -> Tuple[Dict[str, Any], Dict[str, Dict[str, float]]]:
+        """
+        모든 단계 실행
+
+        Returns:
+            Tuple[Dict, Dict]: (단계별 결과, 단계별 시간)
+
+        Raises:
+            단계 함수에서 발생한 첫 예외 (아직 시작하지 않은 단계는 취소)
+        """
+        self._validate()
+        if self.executor is None:
+            # 시간 초과된 단계를 기다리지 않도록 wait=False 로 정리
+            executor = ThreadPoolExecutor(max_workers=max(1, len(self._stages)))
+            try:
+                return self._run(executor)
+            finally:
+                executor.shutdown(wait=False)
+        return self._run(self.executor)
+
+    def _run(self, executor: Executor) -> Tuple[Dict[str, Any], Dict[str, Dict[str, float]]]:
+        origin = time.perf_counter()
+        results: Dict[str, Any] = {}
+        timings: Dict[str, Dict[str, float]] = {}
+        running: Dict[Future, str] = {}
+        expires: Dict[Future, float] = {}
+        stage_inputs: Dict[str, Dict[str, Any]] = {}
+        pending = dict(self._stages)
+        lock = threading.Lock()
+
+        def elapsed_ms() -> float:
+            return (time.perf_counter() - origin) * 1000.0
+
+        def execute(name: str, fn: Callable[..., Any], kwargs: Dict[str, Any]) -> Any:
+            with lock:
+                timings[name]["start_ms"] = elapsed_ms()
+            return fn(**kwargs)
+
+        def start_thread(name: str, fn: Callable[..., Any], kwargs: Dict[str, Any]) -> Future:
+            future: Future = Future()
+
+            def run():
+                if not future.set_running_or_notify_cancel():
+                    return
+                try:
+                    future.set_result(execute(name, fn, kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+
+            threading.Thread(target=run, name=f"stage-{name}", daemon=True).start()
+            return future
+
+        def submit_ready():
+            for name in [n for n, (_, inputs) in pending.items() if all(i in results for i in inputs)]:
+                fn, inputs = pending.pop(name)
+                with lock:
+                    timings[name] = {"ready_ms": elapsed_ms()}
+                stage_inputs[name] = {i: results[i] for i in inputs}
+                if name in self._timeouts:
+                    future = start_thread(name, fn, stage_inputs[name])
+                    timeout = self._timeouts[name][0]
+                    expires[future] = time.perf_counter() + (timeout() if callable(timeout) else timeout)
+                else:
+                    future = executor.submit(execute, name, fn, stage_inputs[name])
+                running[future] = name
+
+        def finish(name: str) -> Dict[str, float]:
+            with lock:
+                timing = timings[name]
+                timing["end_ms"] = elapsed_ms()
+                timing["duration_ms"] = timing["end_ms"] - timing.get("start_ms", timing["ready_ms"])
+            return timing
+
+        submit_ready()
+        while running:
+            wait_for = None
+            if expires:
+                wait_for = max(0.0, min(expires.values()) - time.perf_counter())
+            done, _ = wait(list(running), timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                expires.pop(future, None)
+                timing = finish(name)
+                error = future.exception()
+                if error is not None:
+                    for other in running:
+                        other.cancel()
+                    raise error
+                results[name] = future.result()
+                self._observe(name, timing["duration_ms"])
+            now = time.perf_counter()
+            for future in [f for f, at in expires.items() if at <= now and f in running]:
+                name = running.pop(future)
+                del expires[future]
+                future.cancel()
+                finish(name)["timed_out"] = True
+                logger.warning(f"Stage '{name}' timed out, continuing with fallback")
+                results[name] = self._timeouts[name][1](**stage_inputs[name])
+            submit_ready()
+        return results, timings
+
+    def _observe(self, name: str, duration_ms: float):
+        if self.histograms is None:
+            return
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms.setdefault(name, LatencyHistogram())
+        histogram.observe(duration_ms / 1000.0)
+
+
+def format_timings(timings: Dict[str, Dict[str, float]], order: Optional[Iterable[str]] = None) -> str:
+    """로그용 한 줄 요약: 'name=12ms@+3ms ...' (@ 뒤는 실행 시작 시점)"""
+    names = list(order) if order is not None else sorted(timings, key=lambda n: timings[n].get("start_ms", 0.0))
+    return " ".join(
+        f"{n}={timings[n].get('duration_ms', 0.0):.0f}ms@+{timings[n].get('start_ms', timings[n]['ready_ms']):.0f}ms"
+        for n in names if n in timings
+    )
@@ -0,0 +1,282 @@
+import unittest
+import sys
+import os
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+import httpx
+import requests
+from api_client import (ApiClient, CircuitBreaker, TokenBucket, RetryBudget, RequestMemo, AsyncSingleFlight,
+                        CircuitOpenError, RateLimitExceeded, OPEN, HALF_OPEN, CLOSED)
+
+
+def make_response(status_code):
+    response = requests.Response()
+    response.status_code = status_code
+    return response
+
+
+class TestApiClient(unittest.TestCase):
+    def setUp(self):
+        self.client = ApiClient(max_retries=2, backoff_base=0, failure_threshold=3, recovery_timeout=60)
+
+    def test_retry_then_success(self):
+        """재시도 대상 상태 코드 이후 성공"""
+        with mock.patch.object(self.client.session, "request",
+                               side_effect=[make_response(503), make_response(200)]) as req:
+            response = self.client.get("http://example.com/a")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(req.call_count, 2)
+        self.assertEqual(self.client.get_metrics()["retries"], 1)
+
+    def test_client_error_not_retried(self):
+        """4xx 는 재시도하지 않음"""
+        with mock.patch.object(self.client.session, "request", return_value=make_response(404)) as req:
+            response = self.client.get("http://example.com/a")
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(req.call_count, 1)
+
+    def test_connection_error_raised_after_retries(self):
+        """연결 오류가 계속되면 마지막 예외를 그대로 전달"""
+        with mock.patch.object(self.client.session, "request",
+                               side_effect=requests.ConnectionError("down")) as req:
+            with self.assertRaises(requests.ConnectionError):
+                self.client.get("http://example.com/a")
+        self.assertEqual(req.call_count, 3)
+
+    def test_circuit_opens_and_short_circuits(self):
+        """연속 실패 후 서킷이 열리면 요청 없이 즉시 실패"""
+        with mock.patch.object(self.client.session, "request", return_value=make_response(500)) as req:
+            self.client.get("http://example.com/a")
+            self.assertEqual(self.client.get_breaker("example.com").state, OPEN)
+            with self.assertRaises(CircuitOpenError):
+                self.client.get("http://example.com/b")
+        self.assertEqual(req.call_count, 3)
+        metrics = self.client.get_metrics()
+        self.assertIn("example.com", metrics["open_hosts"])
+        self.assertEqual(metrics["hosts"]["example.com"]["opened"], 1)
+
+    def test_circuit_open_error_is_request_exception(self):
+        """기존 호출부의 requests.RequestException 처리와 호환"""
+        self.assertTrue(issubclass(CircuitOpenError, requests.RequestException))
+        self.assertTrue(issubclass(RateLimitExceeded, requests.RequestException))
+
+    def test_rate_limit_exceeded(self):
+        """토큰이 없고 대기 시간이 0 이면 즉시 실패"""
+        self.client.rate_limit_wait = 0
+        self.client.set_rate_limit("key", rate=0.001, burst=1)
+        with mock.patch.object(self.client.session, "request", return_value=make_response(200)):
+            self.client.get("http://example.com/a", api_key="key")
+            with self.assertRaises(RateLimitExceeded):
+                self.client.get("http://example.com/a", api_key="key")
+
+
+class TestServiceIsolationAndRedaction(unittest.TestCase):
+    def setUp(self):
+        self.client = ApiClient(max_retries=1, backoff_base=0, failure_threshold=2, recovery_timeout=60)
+
+    def test_services_on_same_host_have_separate_breakers(self):
+        """기상청 장애로 같은 apis.data.go.kr 의 Tour API 서킷이 열리지 않음"""
+        with mock.patch.object(self.client.session, "request", return_value=make_response(500)):
+            self.client.get("http://apis.data.go.kr/1360000/x", service="kma")
+        self.assertEqual(self.client.get_breaker("kma").state, OPEN)
+        with mock.patch.object(self.client.session, "request", return_value=make_response(200)):
+            self.assertEqual(self.client.get("http://apis.data.go.kr/B551011/y", service="tour").status_code, 200)
+        self.assertEqual(self.client.get_metrics()["open_hosts"], ["kma"])
+
+    def test_api_key_not_logged_or_raised(self):
+        url = "http://apis.data.go.kr/B551011/y?serviceKey=SECRET123&numOfRows=10"
+        with mock.patch.object(self.client.session, "request",
+                               side_effect=requests.ConnectionError(f"Max retries exceeded with url: {url}")), \
+                self.assertLogs("api_client", level="INFO") as logs:
+            with self.assertRaises(requests.ConnectionError) as raised:
+                self.client.get(url)
+        self.assertNotIn("SECRET123", "\n".join(logs.output))
+        self.assertNotIn("SECRET123", str(raised.exception))
+        self.assertIn("serviceKey=***", str(raised.exception))
+
+        def handler(request):
+            raise httpx.ConnectError(f"failed: {request.url}", request=request)
+
+        async def run():
+            transport = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            with mock.patch.object(self.client, "_async_client", return_value=transport):
+                return await self.client.aget("http://apis.data.go.kr/1360000/x", params={"serviceKey": "SECRET123"},
+                                             service="kma")
+
+        with self.assertLogs("api_client", level="INFO") as logs, self.assertRaises(requests.ConnectionError) as raised:
+            asyncio.run(run())
+        self.assertNotIn("SECRET123", "\n".join(logs.output) + str(raised.exception))
+
+
+class TestAsyncApiClient(unittest.TestCase):
+    def setUp(self):
+        self.client = ApiClient(max_retries=2, backoff_base=0, failure_threshold=3, recovery_timeout=60)
+
+    def run_with(self, handler, coro_fn):
+        async def run():
+            transport = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            with mock.patch.object(self.client, "_async_client", return_value=transport):
+                return await coro_fn()
+        return asyncio.run(run())
+
+    def test_async_retry_then_success(self):
+        statuses = iter([503, 200])
+        response = self.run_with(lambda request: httpx.Response(next(statuses)),
+                                 lambda: self.client.aget("http://example.com/a", api_key="key"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get_metrics()["retries"], 1)
+
+    def test_async_timeout_mapped_to_requests(self):
+        """연결 오류는 동기 버전과 같은 예외 타입으로"""
+        def handler(request):
+            raise httpx.ConnectTimeout("slow", request=request)
+
+        with self.assertRaises(requests.Timeout):
+            self.run_with(handler, lambda: self.client.aget("http://example.com/a"))
+        self.assertEqual(self.client.get_breaker("example.com").stats["failures"], 3)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_half_open_transition(self):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertTrue(breaker.allow_request())
+        self.assertFalse(breaker.allow_request())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertEqual(breaker.stats["half_opened"], 1)
+
+
+class TestHalfOpenSlot(unittest.TestCase):
+    """half-open 시험 요청이 판정 없이 끝나도 슬롯이 반환되는지"""
+
+    def setUp(self):
+        self.client = ApiClient(max_retries=0, backoff_base=0, failure_threshold=1, recovery_timeout=0)
+        self.breaker = self.client.get_breaker("example.com")
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+
+    def assert_recovers(self):
+        with mock.patch.object(self.client.session, "request", return_value=make_response(200)):
+            self.assertEqual(self.client.get("http://example.com/a").status_code, 200)
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_rate_limited_probe(self):
+        self.client.rate_limit_wait = 0
+        self.client.set_rate_limit("key", rate=0.001, burst=0)
+        with self.assertRaises(RateLimitExceeded):
+            self.client.get("http://example.com/a", api_key="key")
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.assert_recovers()
+
+    def test_unexpected_request_error(self):
+        with mock.patch.object(self.client.session, "request", side_effect=requests.exceptions.InvalidURL("bad")):
+            with self.assertRaises(requests.exceptions.InvalidURL):
+                self.client.get("http://example.com/a")
+        self.assertEqual(self.breaker.stats["failures"], 2)
+        self.assert_recovers()
+
+    def test_cancelled_async_probe(self):
+        async def handler(request):
+            await asyncio.sleep(1)
+            return httpx.Response(200)
+
+        async def run():
+            transport = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            with mock.patch.object(self.client, "_async_client", return_value=transport):
+                await asyncio.wait_for(self.client.aget("http://example.com/a"), 0.05)
+
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(run())
+        self.assertEqual(self.breaker.stats["failures"], 1)
+        self.assert_recovers()
+
+
+class TestAsyncSingleFlight(unittest.TestCase):
+    def test_leader_cancellation_does_not_cancel_waiters(self):
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return "result"
+
+        async def run():
+            leader = asyncio.create_task(flight.do("key", fetch))
+            await asyncio.sleep(0)
+            waiter = asyncio.create_task(flight.do("key", fetch))
+            await asyncio.sleep(0.02)
+            leader.cancel()
+            return await waiter, leader.cancelled()
+
+        self.assertEqual(asyncio.run(run()), ("result", True))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.stats["shared"], 1)
+
+
+class TestLimiters(unittest.TestCase):
+    def test_token_bucket_burst(self):
+        bucket = TokenBucket(rate=0.001, capacity=2)
+        self.assertTrue(bucket.acquire())
+        self.assertTrue(bucket.acquire())
+        self.assertFalse(bucket.acquire())
+
+    def test_retry_budget(self):
+        budget = RetryBudget(ratio=0.0, min_retries=1)
+        budget.record_request()
+        self.assertTrue(budget.try_spend())
+        self.assertFalse(budget.try_spend())
+
+
+class TestRequestMemo(unittest.TestCase):
+    def test_concurrent_and_later_calls_share_one_execution(self):
+        memo = RequestMemo()
+        calls = []
+
+        def fetch():
+            calls.append(threading.get_ident())
+            time.sleep(0.05)
+            return ["해운대"]
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            results = list(executor.map(lambda _: memo.get(("places", "부산"), fetch), range(3)))
+        self.assertEqual(results, [["해운대"]] * 3)
+        self.assertEqual(memo.get(("places", "부산"), fetch), ["해운대"])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(memo.get_stats(), {"calls": 4, "executed": 1, "hits": 3})
+
+    def test_failures_are_not_kept(self):
+        memo = RequestMemo()
+        with self.assertRaises(RuntimeError):
+            memo.get("k", mock.Mock(side_effect=RuntimeError("down")))
+        self.assertEqual(memo.get("k", lambda: 1), 1)
+
+    def test_async_caller_cancellation_does_not_cancel_shared_call(self):
+        memo = RequestMemo()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "결과"
+
+        async def main():
+            impatient = asyncio.wait_for(memo.aget("k", fetch), timeout=0.01)
+            patient = memo.aget("k", fetch)
+            return await asyncio.gather(impatient, patient, return_exceptions=True)
+
+        timed_out, result = asyncio.run(main())
+        self.assertIsInstance(timed_out, asyncio.TimeoutError)
+        self.assertEqual(result, "결과")
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(memo.get("k", lambda: "다시"), "결과")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import sys
+import os
+import asyncio
+from unittest import mock
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+import numpy as np
+import module
+import category_router
+from category_router import EmbeddingCategoryRouter
+
+
+class KeywordEmbeddings:
+    """테스트용 임베딩: 키워드 등장 여부를 차원으로 사용"""
+    KEYWORDS = ["관광", "코스", "숙소", "호텔", "펜션", "기차", "버스", "탑승", "날씨", "비"]
+
+    def embed_query(self, text):
+        return [float(k in text) for k in self.KEYWORDS] + [0.1]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+
+
+SAMPLES = [
+    ("부산 관광지 추천", ["관광지"]),
+    ("여행 코스 알려줘", ["관광지"]),
+    ("반려견 숙소 추천", ["숙박"]),
+    ("펜션이나 호텔 있어?", ["숙박"]),
+    ("기차 탑승 규정", ["대중교통"]),
+    ("버스 탈 수 있어?", ["대중교통"]),
+    ("서울 날씨", ["날씨"]),
+    ("내일 비 와?", ["날씨"]),
+]
+
+
+class TestEmbeddingCategoryRouter(unittest.TestCase):
+    def setUp(self):
+        self.router = EmbeddingCategoryRouter(KeywordEmbeddings(), threshold=0.4, margin=0.2).fit(SAMPLES)
+
+    def test_prototypes_normalized(self):
+        self.assertEqual(self.router.categories, ["관광지", "숙박", "대중교통", "날씨"])
+        np.testing.assert_allclose(np.linalg.norm(self.router.prototypes, axis=1), 1.0, rtol=1e-5)
+
+    def test_single_label(self):
+        self.assertEqual(self.router.route("강릉 날씨 어때"), ["날씨"])
+
+    def test_multi_label(self):
+        self.assertEqual(set(self.router.route("관광 코스랑 숙소 호텔 추천")), {"관광지", "숙박"})
+
+    def test_falls_back_to_best(self):
+        """임계값을 넘는 카테고리가 없으면 가장 가까운 카테고리 1개"""
+        self.router.threshold = 0.99
+        self.assertEqual(self.router.route("기차"), ["대중교통"])
+
+    def test_selectable_in_get_category(self):
+        with mock.patch.object(module, "_route_by_embedding", return_value=["숙박"]) as route, \
+             mock.patch.object(module, "_category_chain") as chain:
+            self.assertEqual(module.get_category("안녕 뭐해", router="embedding"), ["숙박"])
+        route.assert_called_once()
+        chain.assert_not_called()
+
+    def test_default_router_reuses_cached_query_embedding(self):
+        """fit() 이 기본 임베딩을 불러온 뒤에도 질문 임베딩은 vm.embed_query 캐시를 사용"""
+        embeddings = KeywordEmbeddings()
+        with mock.patch.object(category_router.vm, "get_embedding", return_value=embeddings):
+            router = EmbeddingCategoryRouter(threshold=0.4, margin=0.2).fit(SAMPLES)
+        vector = embeddings.embed_query("강릉 날씨 어때")
+        with mock.patch.object(category_router.vm, "embed_query", return_value=vector) as embed_query, \
+                mock.patch.object(embeddings, "embed_query") as uncached:
+            self.assertEqual(router.route("강릉 날씨 어때"), ["날씨"])
+        embed_query.assert_called_once_with("강릉 날씨 어때")
+        uncached.assert_not_called()
+
+    def test_router_fallback_recorded_separately_from_llm(self):
+        classifier = module.LocalIntentClassifier(threshold=1.1)
+        with mock.patch.object(module, "get_local_classifier", return_value=classifier), \
+                mock.patch.object(module, "_route_by_embedding", return_value=["숙박"]):
+            module.get_category("안녕 뭐해", router="embedding")
+            asyncio.run(module.aget_category("안녕 뭐해", router="embedding"))
+        stats = classifier.get_stats()
+        self.assertEqual((stats["router"], stats["llm_fallback"]), (2, 0))
+        self.assertEqual((stats["router_latency"]["count"], stats["llm_latency"]["count"]), (2, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+import sys
+import os
+import asyncio
+import time
+from unittest import mock
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+from langchain.schema import Document
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+import llm
+from llm_gateway import LLMGateway
+from deadline import Deadline, GENERATION_TIMEOUT_MESSAGE
+from response_cache import ResponseCache
+
+ANSWER = "부산 해운대 해수욕장은 반려견 산책로가 잘 되어 있어요."
+USER = {"region": "부산", "pet_type": "강아지", "days": None}
+
+
+class TestChatbotStream(unittest.TestCase):
+    def setUp(self):
+        self.gateway = LLMGateway(llm_factory=lambda model, t: GenericFakeChatModel(
+            messages=iter([AIMessage(content=ANSWER)] * 3)))
+        self.cache = ResponseCache(threshold=0.95, version_fn=lambda: "v1")
+        patches = [
+            mock.patch.object(llm, "get_llm_gateway", return_value=self.gateway),
+            mock.patch.object(llm, "get_response_cache", return_value=self.cache),
+            mock.patch.object(llm, "analyze_query", return_value=(["관광지"], USER)),
+            mock.patch.object(llm, "aanalyze_query", mock.AsyncMock(return_value=(["관광지", "날씨"], USER))),
+            mock.patch.object(llm, "aget_weather", mock.AsyncMock(return_value={
+                "city": "부산", "temperature": "20", "humidity": "50", "precipitation_type": "맑음", "wind_speed": "1"})),
+            mock.patch.object(llm, "get_naver_map_link", return_value="#"),
+            mock.patch.object(llm.vm, "embed_query", return_value=[1.0, 0.0, 0.0]),
+            mock.patch.object(llm.vm, "multiretrieve_by_category", return_value={
+                "관광지": [Document(page_content="해운대 산책로", metadata={"title": "해운대해수욕장"})]}),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.chatbot = llm.Chatbot()
+
+    def test_chunks_streamed_then_cached(self):
+        chunks = list(self.chatbot.process_query("부산 강아지 관광지 추천", stream=True))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), ANSWER)
+        self.assertEqual(self.chatbot.ttft.snapshot()["count"], 1)
+        self.assertEqual(self.gateway.get_stats()["first_chunk"]["count"], 1)
+        self.assertEqual(self.cache.get_stats()["stores"], 1)
+
+        # 같은 질문은 캐시된 전체 답변이 청크 하나로 나옴
+        self.assertEqual(list(self.chatbot.process_query("부산 강아지 관광지 추천", stream=True)), [ANSWER])
+        self.assertEqual(self.chatbot.ttft.snapshot()["count"], 2)
+
+    def test_stream_stops_at_deadline(self):
+        def slow_chunks(*args, **kwargs):
+            yield "부산은 "
+            time.sleep(1)
+            yield "늦은 청크"
+
+        with mock.patch.object(llm, "Deadline", side_effect=lambda: Deadline(budget=0.3, reserve=0.2)), \
+                mock.patch.object(self.chatbot, "_generate_response", side_effect=slow_chunks):
+            chunks = list(self.chatbot.process_query("부산 강아지 관광지 추천", stream=True))
+        self.assertEqual(chunks, ["부산은 ", f"\n\n{GENERATION_TIMEOUT_MESSAGE}"])
+        self.assertEqual(self.cache.get_stats()["stores"], 0)
+
+    def test_non_stream_unchanged(self):
+        self.assertEqual(self.chatbot.process_query("부산 강아지 관광지 추천"), ANSWER)
+
+    def test_async_pipeline(self):
+        """aprocess_query: 비동기 분석/날씨 + 벡터 검색 후 ainvoke 로 답변"""
+        self.assertEqual(asyncio.run(self.chatbot.aprocess_query("부산 강아지 관광지 날씨")), ANSWER)
+        llm.aget_weather.assert_awaited_once_with("부산")
+        self.assertEqual(self.cache.get_stats()["stores"], 1)
+        self.assertEqual(self.chatbot.last_context_report["docs_after"], 2)
+
+    def test_greeting_single_chunk(self):
+        chunks = list(self.chatbot.process_query("안녕하세요", stream=True))
+        self.assertEqual(len(chunks), 1)
+        self.assertIn("반려동물 여행 전문 도우미", chunks[0])
+
+    def test_error_yields_message(self):
+        with mock.patch.object(llm, "analyze_query", side_effect=RuntimeError("down")):
+            self.assertEqual(list(self.chatbot.process_query("부산 여행", stream=True)), [llm.ERROR_MESSAGE])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+from langchain.schema import Document
+from context_builder import ContextBuilder, clean_content
+
+
+class CharCounter:
+    """테스트용: 글자 수 = 토큰 수"""
+    exact = False
+
+    def count(self, text):
+        return len(text)
+
+
+def lodging(name, address):
+    return Document(
+        page_content=f"부산광역시 해운대구에 위치한 '{name}'은(는) 반려동물 동반 가능한 숙박업소입니다. "
+                     f"주소는 '{address}'이고, 반려동물 조건은 '['반려 동물 가능', '소형견']'입니다.",
+        metadata={"facility_name": name},
+    )
+
+
+def fmt(i, doc):
+    return f"**{i}. {doc.metadata.get('title') or doc.metadata.get('facility_name')}**\n{doc.page_content}\n\n"
+
+
+class TestContextBuilder(unittest.TestCase):
+    def test_clean_lodging_boilerplate(self):
+        cleaned = clean_content(lodging("신라스테이 해운대", "부산 해운대구 해운대로570번길 46").page_content)
+        self.assertEqual(cleaned, "주소: 부산 해운대구 해운대로570번길 46\n반려동물 조건: 반려 동물 가능, 소형견")
+
+    def test_near_duplicates_removed(self):
+        results = {
+            "숙박": [lodging("신라스테이 해운대", "부산 해운대구 1"), lodging("신라스테이  해운대", "부산 해운대구 1")],
+            "관광지": [Document(page_content="해운대 해수욕장 산책로", metadata={"title": "해운대해수욕장"}),
+                     Document(page_content="해운대 해수욕장 산책로", metadata={"title": "해운대 해수욕장(부산)"})],
+        }
+        content, report = ContextBuilder(budget=10000, counter=CharCounter()).build(results, fmt)
+        self.assertEqual(report["duplicates"], 2)
+        self.assertEqual(report["docs_after"], 2)
+        self.assertNotIn("반려동물 동반 가능한 숙박업소입니다", content)
+        self.assertLess(report["tokens_after"], report["tokens_before"])
+
+    def test_budget_interleaves_categories_and_keeps_weather(self):
+        results = {
+            "관광지": [Document(page_content=f"관광지 설명 {i} " * 5, metadata={"title": f"관광지{i}"}) for i in range(5)],
+            "숙박": [Document(page_content=f"숙소 설명 {i} " * 5, metadata={"title": f"숙소{i}"}) for i in range(5)],
+            "날씨": [Document(page_content="맑음 " * 30, metadata={})],
+        }
+        content, report = ContextBuilder(budget=350, counter=CharCounter()).build(results, fmt)
+        self.assertIn("### 날씨 정보", content)
+        self.assertIn("관광지0", content)
+        self.assertIn("숙소0", content)
+        self.assertNotIn("관광지4", content)
+        self.assertEqual(report["dropped"], 10 + 1 - report["docs_after"])
+        self.assertTrue(content.index("### 관광지 정보") < content.index("### 숙박 정보"))
+
+
+if __name__ == '__main__':
+    unittest.main()
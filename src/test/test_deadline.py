@@ -0,0 +1,215 @@
+import unittest
+import sys
+import os
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+from langchain.schema import Document
+from langchain_core.runnables import RunnableLambda
+import retriever
+from deadline import Deadline, GENERATION_TIMEOUT_MESSAGE
+from llm_gateway import LLMGateway
+from stage_graph import StageGraph
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestDeadline(unittest.TestCase):
+    def test_allowance_keeps_generation_reserve(self):
+        clock = FakeClock()
+        deadline = Deadline(budget=20, reserve=8, clock=clock)
+        self.assertEqual(deadline.allowance("augment"), 8.0)   # 단계 상한
+        clock.now = 7
+        self.assertEqual(deadline.allowance("augment"), 5.0)   # 남은 13초 - 예약 8초
+        clock.now = 11
+        self.assertFalse(deadline.allows("augment"))            # 1초 < 최소 2초
+        self.assertTrue(deadline.allows("weather"))
+        self.assertEqual(deadline.generation_allowance(), 9.0)
+        clock.now = 30
+        self.assertEqual(deadline.generation_allowance(), 8.0)
+
+    def test_note_lists_visible_skips(self):
+        deadline = Deadline(budget=20, reserve=8)
+        self.assertEqual(deadline.note(), "")
+        deadline.skip("db_write", "budget exhausted")
+        self.assertEqual(deadline.note(), "")
+        deadline.skip("weather", "timed out")
+        deadline.skip("weather", "timed out")
+        self.assertEqual(deadline.note().count("날씨 정보"), 1)
+
+    def test_call_falls_back_on_timeout(self):
+        deadline = Deadline(budget=8.1, reserve=8)
+        started = time.perf_counter()
+        self.assertEqual(deadline.call("weather", lambda: time.sleep(1) or "late", lambda: "fallback"), "fallback")
+        self.assertLess(time.perf_counter() - started, 0.5)
+        self.assertEqual(deadline.skipped, ["weather"])
+
+    def test_abandoned_calls_do_not_starve_later_calls(self):
+        """시간 초과로 버려진 호출이 많아도 뒤의 호출은 자기 허용 시간을 온전히 씀"""
+        with ThreadPoolExecutor(max_workers=40) as pool:
+            slow = list(pool.map(lambda _: Deadline(budget=8.1, reserve=8).call(
+                "weather", lambda: time.sleep(1) or "late", lambda: "fallback"), range(20)))
+            fast = list(pool.map(lambda _: Deadline(budget=8.5, reserve=8).call(
+                "weather", lambda: time.sleep(0.01) or "ok", lambda: "fallback"), range(20)))
+        self.assertEqual(slow, ["fallback"] * 20)
+        self.assertEqual(fast, ["ok"] * 20)
+
+    def test_executor_timeout_starts_when_call_starts(self):
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown)
+        executor.submit(time.sleep, 0.3)
+        with mock.patch.dict("deadline.STAGE_ALLOWANCES", {"weather": 0.2}):
+            result = Deadline(budget=60, reserve=8).call("weather", lambda: time.sleep(0.05) or "ok",
+                                                         lambda: "fallback", executor=executor)
+        self.assertEqual(result, "ok")
+
+    def test_stream_cut_off_at_generation_deadline(self):
+        """첫 청크 이후 멈춘 스트림은 마감 시각에 닫고 지연 안내로 끝냄"""
+        closed = []
+
+        def chunks():
+            try:
+                yield "부산"
+                time.sleep(1)
+                yield "늦은 청크"
+            finally:
+                closed.append(True)
+
+        deadline = Deadline(budget=0.2, reserve=0.1)
+        started = time.perf_counter()
+        self.assertEqual(list(deadline.stream(chunks())), ["부산", f"\n\n{GENERATION_TIMEOUT_MESSAGE}"])
+        self.assertLess(time.perf_counter() - started, 0.6)
+        self.assertIn("generate", deadline.skipped)
+        time.sleep(1.1)
+        self.assertEqual(closed, [True])
+
+    def test_stream_first_chunk_bounded(self):
+        def chunks():
+            time.sleep(1)
+            yield "늦은 청크"
+
+        deadline = Deadline(budget=0.1, reserve=0.1)
+        self.assertEqual(list(deadline.stream(chunks())), [GENERATION_TIMEOUT_MESSAGE])
+        self.assertEqual(list(Deadline(budget=1, reserve=0.1).stream(iter(["a", "b"]))), ["a", "b"])
+
+    def test_acall_falls_back_on_timeout(self):
+        deadline = Deadline(budget=8.1, reserve=8)
+        result = asyncio.run(deadline.acall("augment", asyncio.sleep(1, result="late"), list))
+        self.assertEqual(result, [])
+        self.assertEqual(deadline.skipped, ["augment"])
+
+    def test_stage_graph_timeout(self):
+        graph = StageGraph()
+        graph.add("a", lambda: 1)
+        graph.add("slow", lambda a: time.sleep(1) or a, inputs=("a",),
+                  timeout=0.1, on_timeout=lambda a: -a)
+        graph.add("b", lambda slow: slow * 10, inputs=("slow",))
+        started = time.perf_counter()
+        results, timings = graph.run()
+        self.assertLess(time.perf_counter() - started, 0.5)
+        self.assertEqual(results["b"], -10)
+        self.assertTrue(timings["slow"]["timed_out"])
+
+
+def docs(prefix, n):
+    return [Document(page_content=f"{prefix} 설명 " * 20, metadata={"title": f"{prefix}{i}"}) for i in range(n)]
+
+
+class TestRetrieverDeadline(unittest.TestCase):
+    def setUp(self):
+        self.gateway = LLMGateway(llm_factory=lambda model, t: RunnableLambda(lambda _: "답변"))
+        self.fetch = mock.Mock(side_effect=lambda *a, **k: time.sleep(3) or [])
+
+        def slow_weather(region):
+            time.sleep(1)
+            return {"city": region, "temperature": "20", "humidity": "50",
+                    "precipitation_type": "맑음", "wind_speed": "1"}
+
+        patches = [
+            mock.patch.object(retriever, "get_llm_gateway", return_value=self.gateway),
+            mock.patch.object(retriever, "get_category", return_value=["관광지", "날씨"]),
+            mock.patch.object(retriever, "get_user_parser", return_value={"region": "부산", "pet_type": "강아지", "days": 1}),
+            mock.patch.object(retriever, "aanalyze_query", mock.AsyncMock(return_value=(
+                ["관광지", "날씨"], {"region": "부산", "pet_type": "강아지", "days": 1}))),
+            mock.patch.object(retriever, "get_weather", slow_weather),
+            mock.patch.object(retriever, "fetch_pet_friendly_places_only", self.fetch),
+            mock.patch.object(retriever, "get_naver_map_link", return_value="#"),
+            mock.patch.object(retriever.vm, "multiretrieve_by_category", return_value={"관광지": docs("관광지", 1)}),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.retriever = retriever.Retriever(enable_db_updates=False)
+
+    def test_slow_optional_stages_are_cut_off(self):
+        """외부 보강과 날씨가 느리면 시간 안에 있는 결과로 답하고 제외 항목을 안내"""
+        with mock.patch.dict("deadline.STAGE_ALLOWANCES", {"augment": 2.1, "weather": 0.6}):
+            started = time.perf_counter()
+            answer = self.retriever.process_query("부산 강아지 관광지 날씨", deadline=Deadline(budget=60, reserve=8))
+        self.assertLess(time.perf_counter() - started, 2.8)
+        self.assertTrue(answer.startswith("답변"))
+        self.assertIn("날씨 정보", answer)
+        self.assertIn("외부 API 최신 장소 정보", answer)
+        self.assertTrue(self.retriever.last_stage_timings["weather"]["timed_out"])
+
+    def test_non_weather_query_does_not_wait_for_weather(self):
+        """날씨를 묻지 않으면 미리 시작한 날씨 조회를 기다리지 않고 답변"""
+        self.fetch.side_effect = lambda *a, **k: []
+        with mock.patch.object(retriever, "get_category", return_value=["관광지"]):
+            started = time.perf_counter()
+            answer = self.retriever.process_query("부산 관광지 추천", deadline=Deadline(budget=60, reserve=8))
+        self.assertLess(time.perf_counter() - started, 0.8)
+        self.assertEqual(answer, "답변")
+        self.assertIsNone(self.retriever.last_stage_timings["weather"].get("timed_out"))
+
+    def test_unasked_weather_is_not_noted(self):
+        """미리 가져오던 날씨가 제외돼도 날씨를 묻지 않았으면 안내하지 않음"""
+        self.fetch.side_effect = lambda *a, **k: []
+        with mock.patch.object(retriever, "get_category", return_value=["관광지"]):
+            for budget in (60, 8.3):
+                deadline = Deadline(budget=budget, reserve=8)
+                with mock.patch.dict("deadline.STAGE_ALLOWANCES", {"weather": 0.6}):
+                    answer = self.retriever.process_query("부산 관광지 추천", deadline=deadline)
+                self.assertNotIn("weather", deadline.skipped)
+                self.assertNotIn("날씨 정보", answer)
+
+    def test_exhausted_budget_skips_optional_work(self):
+        deadline = Deadline(budget=8.3, reserve=8)
+        answer = self.retriever.process_query("부산 강아지 관광지 날씨", deadline=deadline)
+        self.fetch.assert_not_called()
+        self.assertIn("날씨 정보", answer)
+        self.assertIn("외부 API 최신 장소 정보", answer)
+        self.assertGreaterEqual(self.retriever.last_context_report["docs_after"], 1)
+
+    def test_stream_note_is_last_chunk(self):
+        chunks = list(self.retriever.process_query("부산 강아지 관광지 날씨", stream=True,
+                                                   deadline=Deadline(budget=8.3, reserve=8)))
+        self.assertIn("날씨 정보", chunks[-1])
+        self.assertEqual("".join(chunks[:-1]), "답변")
+
+    def test_stream_generation_bounded_by_deadline(self):
+        """스트리밍 답변도 요청 예산 안에서 끊김 (generate 단계는 이터레이터만 반환하므로 따로 제한)"""
+        self.retriever.response_chain = RunnableLambda(lambda _: time.sleep(2) or "답변")
+        started = time.perf_counter()
+        chunks = list(self.retriever.process_query("부산 강아지 관광지 날씨", stream=True,
+                                                   deadline=Deadline(budget=0.6, reserve=0.5)))
+        self.assertLess(time.perf_counter() - started, 1.5)
+        self.assertEqual(chunks, [GENERATION_TIMEOUT_MESSAGE])
+
+    def test_async_pipeline_skips(self):
+        answer = asyncio.run(self.retriever.aprocess_query("부산 강아지 관광지 날씨",
+                                                           deadline=Deadline(budget=8.3, reserve=8)))
+        self.assertIn("날씨 정보", answer)
+        self.assertIn("외부 API 최신 장소 정보", answer)
+
+
+if __name__ == '__main__':
+    unittest.main()
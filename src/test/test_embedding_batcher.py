@@ -0,0 +1,91 @@
+import unittest
+import sys
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+import vector_manger as vm
+from embedding_batcher import EmbeddingBatcher
+
+
+class FakeModel:
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.batches = []
+
+    def embed_documents(self, texts):
+        self.batches.append(list(texts))
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("model error")
+        return [[float(len(t)), float(i)] for i, t in enumerate(texts)]
+
+
+def embed_concurrently(batcher, texts):
+    start = threading.Barrier(len(texts))
+
+    def call(text):
+        start.wait()
+        return batcher.embed(text)
+
+    with ThreadPoolExecutor(max_workers=len(texts)) as pool:
+        return list(pool.map(call, texts))
+
+
+class TestEmbeddingBatcher(unittest.TestCase):
+    def test_concurrent_queries_share_forward_pass(self):
+        model = FakeModel(delay=0.02)
+        batcher = EmbeddingBatcher(model.embed_documents, batch_size=16, max_wait_ms=100)
+        texts = [f"질문{'!' * i}" for i in range(8)]
+        vectors = embed_concurrently(batcher, texts)
+        self.assertEqual([v[0] for v in vectors], [float(len(t)) for t in texts])
+        self.assertEqual(model.batches, [model.batches[0]])
+        stats = batcher.get_stats()
+        self.assertEqual((stats["requests"], stats["batches"], stats["max_batch"]), (8, 1, 8))
+        self.assertEqual(stats["queue_wait"]["count"], 8)
+        self.assertEqual(stats["compute"]["count"], 1)
+        self.assertGreaterEqual(stats["compute"]["max_ms"], 20)
+
+    def test_batch_size_and_duplicates(self):
+        model = FakeModel()
+        batcher = EmbeddingBatcher(model.embed_documents, batch_size=2, max_wait_ms=200)
+        embed_concurrently(batcher, ["a", "b", "c", "d"])
+        self.assertTrue(all(len(batch) <= 2 for batch in model.batches))
+
+        model.batches.clear()
+        batcher = EmbeddingBatcher(model.embed_documents, batch_size=4, max_wait_ms=200)
+        vectors = embed_concurrently(batcher, ["같은 질문"] * 4)
+        self.assertEqual(model.batches, [["같은 질문"]])
+        self.assertEqual(len({tuple(v) for v in vectors}), 1)
+
+    def test_single_query_waits_at_most_max_wait(self):
+        batcher = EmbeddingBatcher(FakeModel().embed_documents, batch_size=16, max_wait_ms=10)
+        started = time.perf_counter()
+        batcher.embed("혼자")
+        self.assertLess(time.perf_counter() - started, 0.5)
+
+    def test_error_reaches_every_caller(self):
+        model = FakeModel(fail=True)
+        batcher = EmbeddingBatcher(model.embed_documents, batch_size=4, max_wait_ms=50)
+        with self.assertRaises(RuntimeError):
+            embed_concurrently(batcher, ["a", "b"])
+        model.fail = False
+        self.assertEqual(batcher.embed("abc")[0], 3.0)
+        self.assertEqual(batcher.get_stats()["errors"], 1)
+
+    def test_embed_query_goes_through_batcher(self):
+        batcher = EmbeddingBatcher(FakeModel().embed_documents, max_wait_ms=0)
+        vm._embed_query_cached.cache_clear()
+        self.addCleanup(vm._embed_query_cached.cache_clear)
+        with mock.patch.object(vm, "EMBED_BATCHING_ENABLED", True), \
+                mock.patch.object(vm, "get_embedding_batcher", return_value=batcher):
+            self.assertEqual(vm.embed_query("부산 여행"), [5.0, 0.0])
+            vm.embed_query("부산 여행")
+        self.assertEqual(batcher.get_stats()["requests"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+import sys
+import os
+import asyncio
+import tempfile
+import time
+from unittest import mock
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+import module
+from intent_cache import IntentCache, normalize_query, prompt_version
+
+
+class TestIntentCache(unittest.TestCase):
+    def test_normalize_query(self):
+        self.assertEqual(normalize_query("  서울   날씨 어때?? "), "서울 날씨 어때")
+        self.assertEqual(normalize_query("KTX 탑승"), normalize_query("ktx  탑승!"))
+
+    def test_near_identical_queries_share_entry(self):
+        cache = IntentCache("v1")
+        compute = mock.Mock(return_value=["날씨"])
+        self.assertEqual(cache.get_or_compute("category", "서울 날씨 어때?", compute), ["날씨"])
+        self.assertEqual(cache.get_or_compute("category", "서울  날씨 어때", compute), ["날씨"])
+        compute.assert_called_once()
+        stats = cache.get_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["kinds"]["category"]["hit_rate"], 0.5)
+
+    def test_returns_copies(self):
+        cache = IntentCache("v1")
+        cache.set("user_info", "부산", {"region": "부산"})
+        cache.get("user_info", "부산")["region"] = "서울"
+        self.assertEqual(cache.get("user_info", "부산"), {"region": "부산"})
+
+    def test_lru_and_ttl(self):
+        cache = IntentCache("v1", max_entries=2, ttl=60)
+        cache.set("category", "a", ["관광지"])
+        cache.set("category", "b", ["숙박"])
+        cache.get("category", "a")
+        cache.set("category", "c", ["날씨"])
+        self.assertIsNone(cache.get("category", "b"))
+        self.assertEqual(cache.get("category", "a"), ["관광지"])
+        with mock.patch("intent_cache.time.time", return_value=time.time() + 120):
+            self.assertIsNone(cache.get("category", "a"))
+
+    def test_disk_tier_and_version_invalidation(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            IntentCache("aaaaaaaaaaaa", cache_dir=tmp).set("category", "속초 여행", ["관광지"])
+
+            restarted = IntentCache("aaaaaaaaaaaa", cache_dir=tmp)
+            self.assertEqual(restarted.get("category", "속초 여행"), ["관광지"])
+            self.assertEqual(restarted.get_stats()["disk_hits"], 1)
+
+            changed = IntentCache("bbbbbbbbbbbb", cache_dir=tmp)
+            self.assertIsNone(changed.get("category", "속초 여행"))
+            # 이전 버전 워커가 최근까지 쓰던 디렉토리는 남김 (롤링 배포)
+            self.assertEqual(changed.prune_stale_versions(), 0)
+            self.assertEqual(sorted(os.listdir(tmp)), ["aaaaaaaaaaaa", "bbbbbbbbbbbb"])
+            old = os.path.join(tmp, "aaaaaaaaaaaa")
+            os.utime(old, (time.time() - changed.ttl - 60,) * 2)
+            self.assertEqual(changed.prune_stale_versions(), 1)
+            self.assertEqual(os.listdir(tmp), ["bbbbbbbbbbbb"])
+
+    def test_prompt_version_tracks_templates(self):
+        self.assertNotEqual(prompt_version("model", "템플릿 A"), prompt_version("model", "템플릿 B"))
+        self.assertEqual(module.get_intent_cache().version, module.PROMPT_VERSION)
+
+
+class TestCachedIntentCalls(unittest.TestCase):
+    def setUp(self):
+        module.get_intent_cache().clear()
+
+    def test_category_llm_called_once(self):
+        with mock.patch.object(module, "_local_category", return_value=None), \
+             mock.patch.object(module, "_category_chain") as chain:
+            chain.return_value.invoke.return_value = ["숙박"]
+            first = module.get_category("애견 동반 글램핑장?", router="llm")
+            second = module.get_category("애견 동반  글램핑장", router="llm")
+        self.assertEqual(first, second)
+        chain.return_value.invoke.assert_called_once()
+
+    def test_concurrent_async_misses_call_llm_once(self):
+        calls = []
+
+        async def ainvoke():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return ["숙박"]
+
+        async def run():
+            return await asyncio.gather(*(module._acached_llm("category", "애견 동반 캠핑장", ainvoke) for _ in range(3)))
+
+        with mock.patch.object(module, "INTENT_CACHE_ENABLED", True):
+            self.assertEqual(asyncio.run(run()), [["숙박"]] * 3)
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
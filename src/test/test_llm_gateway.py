@@ -0,0 +1,238 @@
+import unittest
+import sys
+import os
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+from langchain_core.runnables import RunnableLambda
+import module
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.output_parsers import StrOutputParser
+from llm_gateway import LLMGateway, build_response_prompt, _PerLoopAsyncClient
+
+
+class SlowChain:
+    """호출 횟수와 최대 동시 실행 수를 기록하는 테스트용 체인"""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def _start(self):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+
+    def _stop(self):
+        with self._lock:
+            self.active -= 1
+
+    def invoke(self, inputs, config=None):
+        self._start()
+        time.sleep(self.delay)
+        self._stop()
+        return f"answer:{inputs['query']}"
+
+    async def ainvoke(self, inputs, config=None):
+        self._start()
+        await asyncio.sleep(self.delay)
+        self._stop()
+        return f"answer:{inputs['query']}"
+
+    def stream(self, inputs, config=None):
+        yield from ["a", "b"]
+
+    async def astream(self, inputs, config=None):
+        for chunk in ["a", "b"]:
+            yield chunk
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+class TestPerLoopAsyncClient(unittest.TestCase):
+    def test_connections_not_reused_across_event_loops(self):
+        """asyncio.run 을 두 번 불러도 앞 루프의 keep-alive 커넥션을 재사용하지 않음"""
+        server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = f"http://127.0.0.1:{server.server_address[1]}/"
+        client = _PerLoopAsyncClient(timeout=5)
+
+        async def get():
+            return (await client.get(url)).status_code, client.loop_client()
+
+        first_status, first_client = asyncio.run(get())
+        second_status, second_client = asyncio.run(get())
+        self.assertEqual((first_status, second_status), (200, 200))
+        self.assertIsNot(first_client, second_client)
+
+
+class TestLLMGateway(unittest.TestCase):
+    def setUp(self):
+        self.gateway = LLMGateway(max_concurrency=2, llm_factory=lambda model, t: object())
+
+    def test_clients_and_chains_reused(self):
+        self.assertIs(self.gateway.get_llm("m", 0), self.gateway.get_llm("m", 0.0))
+        self.assertIsNot(self.gateway.get_llm("m", 0), self.gateway.get_llm("m", 0.3))
+        builds = []
+        build = lambda: builds.append(1) or object()
+        self.assertIs(self.gateway.chain("c", build), self.gateway.chain("c", build))
+        self.assertEqual(len(builds), 1)
+
+    def test_identical_prompts_coalesced(self):
+        chain = SlowChain()
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            results = list(pool.map(lambda _: self.gateway.invoke(chain, {"query": "q"}, name="c"), range(5)))
+        self.assertEqual(results, ["answer:q"] * 5)
+        self.assertEqual(chain.calls, 1)
+        self.assertEqual(self.gateway.get_stats()["coalesced"], 4)
+
+    def test_concurrency_limit(self):
+        chain = SlowChain()
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            list(pool.map(lambda i: self.gateway.invoke(chain, {"query": str(i)}, name="c"), range(6)))
+        self.assertEqual(chain.calls, 6)
+        self.assertLessEqual(chain.max_active, 2)
+        self.assertEqual(self.gateway.get_stats()["in_flight"], 0)
+
+    def test_async_coalescing_and_limit(self):
+        chain = SlowChain()
+
+        async def run():
+            same = [self.gateway.ainvoke(chain, {"query": "q"}, name="c") for _ in range(3)]
+            different = [self.gateway.ainvoke(chain, {"query": str(i)}, name="c") for i in range(4)]
+            return await asyncio.gather(*same, *different)
+
+        results = asyncio.run(run())
+        self.assertEqual(results[:3], ["answer:q"] * 3)
+        self.assertEqual(chain.calls, 5)
+        self.assertLessEqual(chain.max_active, 2)
+
+    def test_async_leader_cancellation_does_not_fail_waiters(self):
+        """먼저 호출한 쪽이 시간 초과로 취소돼도 같은 입력을 기다리던 호출은 결과를 받음"""
+        chain = SlowChain(delay=0.1)
+
+        async def run():
+            leader = asyncio.create_task(asyncio.wait_for(self.gateway.ainvoke(chain, {"query": "q"}, name="c"), 0.03))
+            await asyncio.sleep(0.01)
+            waiter = self.gateway.ainvoke(chain, {"query": "q"}, name="c")
+            return await asyncio.gather(leader, waiter, return_exceptions=True)
+
+        leader, waiter = asyncio.run(run())
+        self.assertIsInstance(leader, asyncio.TimeoutError)
+        self.assertEqual(waiter, "answer:q")
+        self.assertEqual(chain.calls, 1)
+
+    def test_async_calls_not_shared_across_loops(self):
+        chain = SlowChain(delay=0.1)
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            results = list(pool.map(lambda _: asyncio.run(self.gateway.ainvoke(chain, {"query": "q"}, name="c")),
+                                    range(2)))
+        self.assertEqual(results, ["answer:q"] * 2)
+        self.assertEqual(chain.calls, 2)
+
+    def test_limit_shared_by_sync_calls_and_event_loops(self):
+        """동기 호출과 여러 이벤트 루프의 비동기 호출을 합쳐 max_concurrency 를 넘지 않음"""
+        chain = SlowChain(delay=0.05)
+
+        async def run(prefix):
+            return await asyncio.gather(*(self.gateway.ainvoke(chain, {"query": f"{prefix}{i}"}) for i in range(3)))
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            jobs = [pool.submit(asyncio.run, run("a")), pool.submit(asyncio.run, run("b"))]
+            jobs += [pool.submit(self.gateway.invoke, chain, {"query": f"s{i}"}) for i in range(2)]
+            for job in jobs:
+                job.result(timeout=5)
+        self.assertEqual(chain.calls, 8)
+        self.assertLessEqual(chain.max_active, 2)
+        self.assertEqual(self.gateway.get_stats()["in_flight"], 0)
+
+    def test_cancelled_async_waiter_releases_slot(self):
+        chain = SlowChain(delay=0.05)
+
+        async def run():
+            busy = [asyncio.create_task(self.gateway.ainvoke(chain, {"query": str(i)})) for i in range(2)]
+            await asyncio.sleep(0.01)
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(self.gateway.ainvoke(chain, {"query": "late"}), 0.01)
+            await asyncio.gather(*busy)
+
+        asyncio.run(run())
+        # 취소된 대기자가 슬롯을 가져가지 않았으므로 두 호출이 동시에 실행 가능
+        chain.max_active = 0
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            list(pool.map(lambda i: self.gateway.invoke(chain, {"query": f"x{i}"}), range(2)))
+        self.assertEqual(chain.max_active, 2)
+        self.assertEqual(self.gateway.get_stats()["in_flight"], 0)
+
+    def test_errors_shared_and_counted(self):
+        class Failing:
+            def invoke(self, inputs, config=None):
+                raise RuntimeError("upstream down")
+
+        with self.assertRaises(RuntimeError):
+            self.gateway.invoke(Failing(), {"query": "q"}, name="f")
+        self.assertEqual(self.gateway.get_stats()["errors"], 1)
+
+    def test_stream_releases_slot(self):
+        self.assertEqual(list(self.gateway.stream(SlowChain(), {"query": "q"})), ["a", "b"])
+        self.assertEqual(self.gateway.get_stats()["in_flight"], 0)
+        self.assertEqual(self.gateway.get_stats()["first_chunk"]["count"], 1)
+
+    def test_astream(self):
+        async def run():
+            return [chunk async for chunk in self.gateway.astream(SlowChain(), {"query": "q"})]
+
+        self.assertEqual(asyncio.run(run()), ["a", "b"])
+        self.assertEqual(self.gateway.get_stats()["in_flight"], 0)
+
+    def test_intent_chains_precompiled(self):
+        gateway = LLMGateway(llm_factory=lambda model, t: RunnableLambda(lambda _: "관광지, 숙박"))
+        with mock.patch.object(module, "get_llm_gateway", return_value=gateway):
+            self.assertIs(module._category_chain(), module._category_chain())
+            self.assertEqual(module._invoke_chain("category", module._category_chain(), {"input": "q"}),
+                             ["관광지", "숙박"])
+        self.assertEqual(gateway.get_stats()["chains"], ["category"])
+        self.assertEqual(gateway.get_stats()["clients"], 1)
+
+    def test_cached_tokens_recorded(self):
+        """usage metadata 의 cache_read 토큰이 체인별로 누적"""
+        usage = {"input_tokens": 1500, "output_tokens": 200, "total_tokens": 1700,
+                 "input_token_details": {"cache_read": 1024}}
+        llm = GenericFakeChatModel(messages=iter([AIMessage(content="답변", usage_metadata=usage)]))
+        chain = build_response_prompt("고정 지침", "질문: {query}") | llm | StrOutputParser()
+        self.assertEqual(self.gateway.invoke(chain, {"query": "q"}, name="response"), "답변")
+        totals = self.gateway.get_usage()["by_chain"]["response"]
+        self.assertEqual((totals["calls"], totals["cached_tokens"]), (1, 1024))
+        self.assertAlmostEqual(totals["cache_hit_ratio"], 1024 / 1500)
+
+    def test_response_prompt_static_prefix(self):
+        messages = build_response_prompt("\n    지침 A\n    지침 B\n", "\n    질문: {query}\n").format_messages(query="q")
+        self.assertEqual([m.type for m in messages], ["system", "human"])
+        self.assertEqual(messages[0].content, "지침 A\n지침 B")
+        self.assertEqual(messages[1].content, "질문: q")
+
+
+if __name__ == '__main__':
+    unittest.main()
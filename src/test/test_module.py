@@ -2,6 +2,9 @@ import unittest
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+import time
+from unittest import mock
+import module
 from module import get_naver_map_link
 from urllib.parse import quote
 
@@ -88,5 +91,72 @@ class TestModule(unittest.TestCase):
                 f"Failed for place: {place}\nExpected: {expected_url}\nGot: {result_url}"
             )
 
+class TestAnalyzeQuery(unittest.TestCase):
+    def test_runs_concurrently(self):
+        """카테고리/사용자 정보 분석이 동시에 실행됨"""
+        def slow_category(query):
+            time.sleep(0.3)
+            return ["관광지"]
+
+        def slow_parser(query):
+            time.sleep(0.3)
+            return {"region": "속초", "pet_type": "강아지", "days": 2}
+
+        with mock.patch.object(module, "get_category", slow_category), \
+             mock.patch.object(module, "get_user_parser", slow_parser):
+            start = time.perf_counter()
+            categories, user_parsed = module.analyze_query("속초 여행", mode="parallel")
+            elapsed = time.perf_counter() - start
+        self.assertEqual(categories, ["관광지"])
+        self.assertEqual(user_parsed["region"], "속초")
+        self.assertLess(elapsed, 0.55)
+
+    def test_fallback_on_error(self):
+        """한쪽이 실패해도 기본값으로 대체"""
+        with mock.patch.object(module, "get_category", side_effect=RuntimeError("boom")), \
+             mock.patch.object(module, "get_user_parser", return_value={"region": "부산", "pet_type": None, "days": 1}):
+            categories, user_parsed = module.analyze_query("부산", mode="parallel")
+        self.assertEqual(categories, module.CATEGORY_FALLBACK)
+        self.assertEqual(user_parsed["region"], "부산")
+
+    def test_single_call_split(self):
+        """single-call 결과 분리"""
+        with mock.patch.object(module, "get_intent",
+                               side_effect=lambda q: module._split_intent(
+                                   {"categories": "날씨, 숙박, 기타", "region": "강릉", "pet_type": "null", "days": "null"})):
+            categories, user_parsed = module.analyze_query("강릉 날씨", mode="single")
+        self.assertEqual(categories, ["날씨", "숙박"])
+        self.assertEqual(user_parsed, {"region": "강릉", "pet_type": "null", "days": "null"})
+
+
+class TestLocalIntentClassifier(unittest.TestCase):
+    def setUp(self):
+        self.classifier = module.get_local_classifier()
+
+    def test_confident_queries(self):
+        """명확한 질문은 임계값 이상으로 분류"""
+        for query, expected in [("서울 날씨 어때", ["날씨"]),
+                                ("강아지랑 함께하는 포항 여행 추천 코스 알려줘.", ["관광지"])]:
+            categories, confidence = self.classifier.classify(query)
+            self.assertEqual(categories, expected)
+            self.assertGreaterEqual(confidence, self.classifier.threshold)
+
+    def test_unrelated_query_not_confident(self):
+        categories, confidence = self.classifier.classify("안녕 뭐해")
+        self.assertEqual(categories, [])
+        self.assertLess(confidence, self.classifier.threshold)
+
+    def test_fast_path_skips_llm(self):
+        with mock.patch.object(module, "_category_chain") as chain:
+            self.assertEqual(module.get_category("서울 날씨 어때"), ["날씨"])
+        chain.assert_not_called()
+
+    def test_accuracy_report(self):
+        report = self.classifier.accuracy_report(thresholds=[0.8])
+        self.assertEqual(report["samples"], 20)
+        self.assertIn(0.8, report["by_threshold"])
+        self.assertGreater(report["by_threshold"][0.8]["coverage"], 0)
+
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
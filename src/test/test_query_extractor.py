@@ -0,0 +1,97 @@
+import unittest
+import sys
+import os
+from unittest import mock
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+import module
+from query_extractor import AhoCorasick, QueryExtractor, get_query_extractor
+
+
+class TestAhoCorasick(unittest.TestCase):
+    def test_overlapping_matches(self):
+        automaton = AhoCorasick()
+        for word in ["he", "she", "his", "hers"]:
+            automaton.add(word, word)
+        found = sorted((s, e, v) for s, e, v in automaton.find_all("ushers"))
+        self.assertEqual(found, [(1, 4, "she"), (2, 4, "he"), (2, 6, "hers")])
+
+
+class TestQueryExtractor(unittest.TestCase):
+    def setUp(self):
+        self.extractor = get_query_extractor()
+
+    def test_full_extraction(self):
+        self.assertEqual(
+            self.extractor.extract("이번 주말에 강아지랑 부산으로 2박 3일 여행 가려고 해"),
+            {"region": "부산", "pet_type": "강아지", "days": 3},
+        )
+
+    def test_days_rules(self):
+        cases = {
+            "제주도 2박 여행": 3,
+            "4일간 여행": 4,
+            "사흘 동안": 3,
+            "대전 당일치기": "당일치기",
+            "주말에 울산 가": "주말",
+            "다음 주 제주도": "다음 주",
+            "춘천 가는데": None,
+        }
+        for query, expected in cases.items():
+            self.assertEqual(self.extractor.extract_days(query), expected, query)
+
+    def test_pet_synonyms(self):
+        self.assertEqual(self.extractor.extract("댕댕이랑 산책")["pet_type"], "강아지")
+        self.assertEqual(self.extractor.extract("광주에서 개랑 하루")["pet_type"], "개")
+        self.assertEqual(self.extractor.extract("반려동물 동반 가능한 카페")["pet_type"], "반려동물")
+        self.assertEqual(self.extractor.extract("반려동물 중에 말티즈")["pet_type"], "말티즈")
+
+    def test_region_preferences(self):
+        """출발지보다 목적지, 짧은 이름보다 긴 이름"""
+        self.assertEqual(self.extractor.extract_region("서울에서 자차로 속초 가려고 해"), "속초")
+        self.assertEqual(self.extractor.extract_region("제주도로 3일 동안"), "제주도")
+        self.assertEqual(self.extractor.extract_region("대구에서 2박 3일"), "대구")
+        self.assertEqual(self.extractor.extract_region("대구 사는데 주말에 부산으로 가려고"), "부산")
+        self.assertEqual(self.extractor.extract_region("진주 목걸이 사러 부산 가"), "부산")
+
+    def test_ambiguous_stem_not_matched(self):
+        """'고양시' 에서 뗀 '고양' 이 '고양이' 와 겹치지 않음"""
+        self.assertIsNone(self.extractor.extract_region("고양이랑 갈만한 곳"))
+        self.assertEqual(self.extractor.extract_region("고양시 애견 카페"), "고양시")
+        self.assertIsNone(self.extractor.extract_region("화성 탐사처럼 신나는 곳 강아지랑"))
+        self.assertEqual(self.extractor.extract_region("화성시 반려견 놀이터"), "화성시")
+
+    def test_common_word_stems_not_matched(self):
+        cases = {
+            "경주마 체험 강아지랑": "경주시 반려견 여행",
+            "강화된 규정 알려줘": "강화군 애견 펜션",
+            "이천 원 짜리 간식": "이천시 반려견 카페",
+            "청양고추 축제": "청양군 캠핑장",
+        }
+        for common, region in cases.items():
+            self.assertIsNone(self.extractor.extract_region(common), common)
+            self.assertEqual(self.extractor.extract_region(region), region.split()[0])
+
+    def test_custom_regions(self):
+        extractor = QueryExtractor(["강남구", "강릉"])
+        self.assertEqual(extractor.extract_region("강남 맛집"), "강남")
+        self.assertIsNone(extractor.extract_region("부산 맛집"))
+
+
+class TestUserParserWithExtractor(unittest.TestCase):
+    def test_skips_llm_when_complete(self):
+        with mock.patch.object(module, "_user_parser_chain") as chain:
+            result = module.get_user_parser("부산 강아지랑 2박 3일")
+        chain.assert_not_called()
+        self.assertEqual(result, {"region": "부산", "pet_type": "강아지", "days": 3})
+
+    def test_llm_fills_missing_fields(self):
+        llm_output = {"region": "서울 근교", "pet_type": "고양이", "days": 1}
+        with mock.patch.object(module, "_user_parser_chain") as chain:
+            chain.return_value.invoke.return_value = llm_output
+            result = module.get_user_parser("말티즈랑 근교로 바람 쐬러")
+        chain.assert_called_once()
+        self.assertEqual(result, {"region": "서울 근교", "pet_type": "말티즈", "days": 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
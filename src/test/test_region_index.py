@@ -0,0 +1,68 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+import numpy as np
+from weather import RegionIndex, get_region_index, latlon_to_grid, latlon_to_grid_array, attach_weather_grid
+
+
+class TestRegionIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = get_region_index()
+
+    def test_loaded_once(self):
+        """같은 경로는 한 번만 로드"""
+        self.assertIs(self.index, get_region_index())
+        self.assertEqual(len(self.index), 215)
+
+    def test_precomputed_grid(self):
+        """미리 계산된 격자 좌표가 latlon_to_grid 결과와 동일"""
+        region = self.index.get("서울")
+        self.assertEqual(self.index.grid("서울"), latlon_to_grid(region["lat"], region["lon"]))
+        self.assertEqual(self.index.grid("서울"), (60, 127))
+
+    def test_resolve_matches_linear_scan(self):
+        """부분 문자열 조회가 기존 선형 탐색과 같은 결과"""
+        names = list(self.index.regions)
+        for city in ["서울", "속초", "속초시", "기장", "남구", "강원 속초", "제주", "구"]:
+            expected = city if city in self.index else next((k for k in names if city in k), None)
+            self.assertEqual(self.index.resolve(city), expected, city)
+
+    def test_find_prefix(self):
+        index = RegionIndex({"강남구": {"lat": 37.5, "lon": 127.0},
+                             "강릉": {"lat": 37.7, "lon": 128.8},
+                             "부산": {"lat": 35.1, "lon": 129.0}})
+        self.assertEqual(index.find_prefix("강"), ["강남구", "강릉"])
+        self.assertEqual(index.find_prefix("제"), [])
+
+    def test_invalid_coordinates(self):
+        index = RegionIndex({"어딘가": {"lat": "x", "lon": None}})
+        self.assertEqual(index.resolve("어딘"), "어딘가")
+        self.assertIsNone(index.grid("어딘가"))
+
+
+class TestVectorizedGrid(unittest.TestCase):
+    def test_matches_scalar(self):
+        """벡터화 변환 결과가 스칼라 변환과 동일"""
+        rng = np.random.default_rng(0)
+        lats = rng.uniform(33.0, 38.6, 1000)
+        lons = rng.uniform(124.5, 131.0, 1000)
+        nx, ny = latlon_to_grid_array(lats, lons)
+        for gx, gy, lat, lon in zip(nx, ny, lats, lons):
+            self.assertEqual((int(gx), int(gy)), latlon_to_grid(lat, lon))
+
+    def test_nearest_region(self):
+        index = get_region_index()
+        self.assertEqual(index.nearest(37.5636, 126.98), "서울")
+        self.assertEqual(index.nearest_many([np.nan], [np.nan]), [None])
+
+    def test_attach_weather_grid(self):
+        places = [{"title": "속초해수욕장", "mapx": "128.6", "mapy": "38.19"}, {"title": "좌표 없음"}]
+        attach_weather_grid(places)
+        self.assertEqual((places[0]["nx"], places[0]["ny"]), latlon_to_grid(38.19, 128.6))
+        self.assertIsNotNone(places[0]["weather_region"])
+        self.assertNotIn("nx", places[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+import sys
+import os
+import tempfile
+import time
+from datetime import datetime
+from unittest import mock
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+from response_cache import ResponseCache, weather_expiry
+
+KTX = [1.0, 0.0, 0.0]
+KTX_SIMILAR = [0.99, 0.05, 0.0]
+OTHER = [0.0, 1.0, 0.0]
+USER = {"region": None, "pet_type": "반려동물", "days": None}
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.version = "v1"
+        self.cache = ResponseCache(threshold=0.95, ttl=60, version_fn=lambda: self.version)
+        self.cache.store("KTX 기차 반려동물 탑승 관련해서 알려줘", KTX, ["대중교통"], USER, "KTX 답변")
+
+    def test_similar_query_hits(self):
+        self.assertEqual(self.cache.lookup(KTX_SIMILAR, ["대중교통"], USER), "KTX 답변")
+        self.assertIsNone(self.cache.lookup(OTHER, ["대중교통"], USER))
+        stats = self.cache.get_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_attributes_must_match(self):
+        """유사도가 높아도 지역/카테고리가 다르면 미적중"""
+        self.assertIsNone(self.cache.lookup(KTX, ["대중교통"], dict(USER, region="부산")))
+        self.assertIsNone(self.cache.lookup(KTX, ["대중교통", "숙박"], USER))
+        self.assertEqual(self.cache.get_stats()["attribute_mismatches"], 2)
+        self.assertEqual(self.cache.lookup(KTX, ["대중교통"], dict(USER, region="null")), "KTX 답변")
+
+    def test_ttl_and_data_version(self):
+        with mock.patch("response_cache.time.time", return_value=time.time() + 120):
+            self.assertIsNone(self.cache.lookup(KTX, ["대중교통"], USER))
+        self.cache.store("KTX", KTX, ["대중교통"], USER, "새 답변")
+        self.version = "v2"
+        self.assertIsNone(self.cache.lookup(KTX, ["대중교통"], USER))
+        self.assertEqual(self.cache.get_stats()["entries"], 0)
+
+    def test_weather_expires_at_next_publication(self):
+        self.cache.ttl = 24 * 3600
+        self.cache.store("서울 날씨", OTHER, ["날씨"], {"region": "서울"}, "맑음")
+        entry = self.cache._entries[-1]
+        self.assertEqual(entry["expires_at"], weather_expiry(entry["created_at"]))
+        self.assertEqual(weather_expiry(datetime(2025, 6, 3, 9, 50).timestamp()),
+                         datetime(2025, 6, 3, 10, 40).timestamp())
+
+    def test_disk_roundtrip_compressed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResponseCache(threshold=0.95, cache_dir=tmp, version_fn=lambda: "v1")
+            answer = "반려견 KTX 탑승 규정 안내 " * 50
+            cache.store("KTX", KTX, ["대중교통"], USER, answer)
+            files = os.listdir(tmp)
+            self.assertEqual(len(files), 1)
+            self.assertLess(os.path.getsize(os.path.join(tmp, files[0])), len(answer.encode("utf-8")))
+
+            restored = ResponseCache(threshold=0.95, cache_dir=tmp, version_fn=lambda: "v1")
+            self.assertEqual(restored.lookup(KTX, ["대중교통"], USER), answer)
+            ResponseCache(cache_dir=tmp, version_fn=lambda: "v2")
+            self.assertEqual(os.listdir(tmp), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import unittest
+import sys
+import os
+import asyncio
+import threading
+from unittest import mock
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+from langchain.schema import Document
+from langchain_core.runnables import RunnableLambda
+import retriever
+from llm_gateway import LLMGateway
+
+USER = {"region": "부산", "pet_type": "강아지", "days": 1}
+PLACES = [{"title": "해운대해수욕장", "contentid": "1", "addr1": "부산 해운대구"},
+          {"title": "광안리해수욕장", "contentid": "2", "addr1": "부산 수영구"}]
+
+
+class TestBackgroundAugment(unittest.TestCase):
+    def setUp(self):
+        gateway = LLMGateway(llm_factory=lambda model, t: RunnableLambda(lambda _: "답변"))
+        self.release = threading.Event()
+        self.fetch = mock.Mock(side_effect=lambda *a, **k: self.release.wait(5) and list(PLACES))
+        self.updater = mock.Mock()
+        patches = [
+            mock.patch.object(retriever, "get_llm_gateway", return_value=gateway),
+            mock.patch.object(retriever, "get_category", return_value=["관광지"]),
+            mock.patch.object(retriever, "get_user_parser", return_value=USER),
+            mock.patch.object(retriever, "aanalyze_query", mock.AsyncMock(return_value=(["관광지"], USER))),
+            mock.patch.object(retriever, "fetch_pet_friendly_places_only", self.fetch),
+            mock.patch.object(retriever, "get_weather", return_value={"error": "offline"}),
+            mock.patch.object(retriever, "get_naver_map_link", return_value="#"),
+            mock.patch.object(retriever, "VectorDBUpdater", return_value=self.updater),
+            mock.patch.object(retriever.vm, "multiretrieve_by_category", return_value={
+                "관광지": [Document(page_content="해운대 산책로 " * 10, metadata={"title": "해운대해수욕장", "contentid": "1"})]}),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.addCleanup(self.release.set)
+        self.retriever = retriever.Retriever(background_augment=["관광지"])
+
+    def wait_for_background(self):
+        self.release.set()
+        self.retriever._background_executor.shutdown(wait=True)
+
+    def test_answers_before_enrichment_finishes(self):
+        self.assertEqual(self.retriever.process_query("부산 강아지 관광지"), "답변")
+        # 답변 시점에는 아직 외부 결과가 없음
+        self.assertEqual(self.retriever.last_context_report["docs_after"], 1)
+        self.updater.add_documents_to_db.assert_not_called()
+
+        self.wait_for_background()
+        # 기존 결과에 있던 해운대는 제외하고 광안리만 저장
+        saved = self.updater.create_documents_from_api_data.call_args.args[0]
+        self.assertEqual([p["title"] for p in saved], ["광안리해수욕장"])
+        self.updater.add_documents_to_db.assert_called_once()
+        stats = self.retriever.get_background_stats()
+        self.assertEqual((stats["scheduled"], stats["completed"], stats["changed"], stats["added_docs"]), (1, 1, 1, 1))
+        self.assertEqual(stats["changed_rate"], 1.0)
+
+    def test_inflight_job_is_shared(self):
+        self.retriever.process_query("부산 강아지 관광지")
+        asyncio.run(self.retriever.aprocess_query("부산 강아지 관광지 추천"))
+        self.wait_for_background()
+        self.fetch.assert_called_once()
+        self.assertEqual(self.retriever.get_background_stats()["deduplicated"], 1)
+
+    def test_other_categories_stay_inline(self):
+        self.retriever.background_augment = set()
+        self.release.set()
+        self.retriever.process_query("부산 강아지 관광지")
+        self.assertEqual(self.retriever.last_context_report["docs_after"], 2)
+        self.assertEqual(self.retriever.get_background_stats()["scheduled"], 0)
+
+
+class TestSharedFetch(unittest.TestCase):
+    """관광지와 숙박이 모두 부족해도 같은 Tour API 조회는 질문당 한 번"""
+
+    def setUp(self):
+        gateway = LLMGateway(llm_factory=lambda model, t: RunnableLambda(lambda _: "답변"))
+        places = PLACES + [{"title": "해운대 펜션", "contentid": "3", "addr1": "부산 해운대구"}]
+        self.fetch = mock.Mock(side_effect=lambda *a, **k: [dict(p) for p in places])
+        self.afetch = mock.AsyncMock(side_effect=lambda *a, **k: [dict(p) for p in places])
+        patches = [
+            mock.patch.object(retriever, "get_llm_gateway", return_value=gateway),
+            mock.patch.object(retriever, "get_category", return_value=["관광지", "숙박"]),
+            mock.patch.object(retriever, "get_user_parser", return_value=USER),
+            mock.patch.object(retriever, "aanalyze_query", mock.AsyncMock(return_value=(["관광지", "숙박"], USER))),
+            mock.patch.object(retriever, "fetch_pet_friendly_places_only", self.fetch),
+            mock.patch.object(retriever, "afetch_pet_friendly_places_only", self.afetch),
+            mock.patch.object(retriever, "get_weather", return_value={"error": "offline"}),
+            mock.patch.object(retriever, "get_naver_map_link", return_value="#"),
+            mock.patch.object(retriever.vm, "multiretrieve_by_category", return_value={}),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.retriever = retriever.Retriever(enable_db_updates=False, background_augment=[])
+
+    def augment(self):
+        quality = self.retriever._assess_result_quality({}, ["관광지", "숙박"], 4, "부산")
+        return self.retriever._augment_results_if_needed("부산 여행", USER, ["관광지", "숙박"], {}, quality, 4)
+
+    def test_sync_fetch_shared(self):
+        results = self.augment()
+        self.fetch.assert_called_once()
+        self.assertEqual(len(results["관광지"]), 3)
+        self.assertEqual([d.metadata["title"] for d in results["숙박"]], ["해운대 펜션"])
+        # 카테고리별로 사본을 받으므로 category 메타데이터가 섞이지 않음
+        self.assertEqual({d.metadata["category"] for d in results["관광지"]}, {"관광지"})
+        self.assertEqual(results["숙박"][0].metadata["category"], "숙박")
+
+    def test_async_fetch_shared(self):
+        asyncio.run(self.retriever.aprocess_query("부산 여행"))
+        self.afetch.assert_awaited_once()
+        self.assertEqual(self.retriever.last_context_report["docs_before"], 4)
+
+
+def place(title, address, similarity):
+    return Document(page_content=f"{title} 반려견 동반 가능 장소 소개 " * 4,
+                    metadata={"title": title, "road_address": address, retriever.vm.SCORE_KEY: similarity})
+
+
+class TestQualityGate(unittest.TestCase):
+    def setUp(self):
+        gateway = LLMGateway(llm_factory=lambda model, t: RunnableLambda(lambda _: "답변"))
+        with mock.patch.object(retriever, "get_llm_gateway", return_value=gateway):
+            self.retriever = retriever.Retriever(min_results_threshold=3, quality_threshold=0.5,
+                                                 enable_db_updates=False)
+
+    def assess(self, docs, region="부산광역시", total_needed=8):
+        return self.retriever._assess_result_quality({"관광지": docs}, ["관광지", "날씨"], total_needed, region)["관광지"]
+
+    def test_enough_good_results_skip_external_fetch(self):
+        docs = [place(f"부산{i}", "부산 해운대구", 0.6) for i in range(3)] + [place("저유사", "부산 중구", 0.2)]
+        assessment = self.assess(docs)
+        self.assertEqual(assessment["good_count"], 3)
+        self.assertFalse(assessment["needs_augmentation"])
+
+    def test_region_mismatch_and_low_scores_trigger_fetch(self):
+        docs = [place(f"서울{i}", "서울 종로구", 0.9) for i in range(5)] + [place("부산", "부산 중구", 0.3)]
+        assessment = self.assess(docs)
+        self.assertEqual((assessment["good_count"], assessment["region_mismatches"]), (0, 5))
+        self.assertTrue(assessment["needs_augmentation"])
+        self.assertEqual(self.retriever._augmentation_shortfall("관광지", {}, {"관광지": assessment}, 8), 8)
+        # 지역이 없으면 유사도만 확인
+        self.assertFalse(self.assess(docs, region=None)["needs_augmentation"])
+
+    def test_region_stem(self):
+        self.assertEqual(self.retriever._region_stem("제주도"), "제주")
+        self.assertEqual(self.retriever._region_stem("부산광역시"), "부산")
+        self.assertEqual(self.retriever._region_stem("중구"), "중구")
+        self.assertIsNone(self.retriever._region_stem("null"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import unittest
+import sys
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+from langchain.schema import Document
+from langchain_core.runnables import RunnableLambda
+import retriever
+from llm_gateway import LLMGateway
+from stage_graph import StageGraph, format_timings
+
+
+class TestStageGraph(unittest.TestCase):
+    def test_independent_stages_overlap(self):
+        graph = StageGraph()
+        graph.add("a", lambda: time.sleep(0.1) or 1)
+        graph.add("b", lambda: time.sleep(0.1) or 2)
+        graph.add("c", lambda a, b: a + b, inputs=("a", "b"))
+        started = time.perf_counter()
+        results, timings = graph.run()
+        self.assertEqual(results["c"], 3)
+        self.assertLess(time.perf_counter() - started, 0.19)
+        self.assertGreaterEqual(timings["c"]["start_ms"], max(timings["a"]["end_ms"], timings["b"]["end_ms"]))
+        self.assertIn("c=", format_timings(timings))
+
+    def test_error_propagates(self):
+        graph = StageGraph()
+        graph.add("a", lambda: 1 / 0)
+        graph.add("b", lambda a: a, inputs=("a",))
+        with self.assertRaises(ZeroDivisionError):
+            graph.run()
+
+    def test_invalid_graph(self):
+        with self.assertRaises(ValueError):
+            StageGraph().add("a", lambda b: b, inputs=("b",)).run()
+        graph = StageGraph().add("a", lambda b: b, inputs=("b",)).add("b", lambda a: a, inputs=("a",))
+        with self.assertRaises(ValueError):
+            graph.run()
+
+    def test_timed_out_stage_does_not_hold_pool_worker(self):
+        """시간 초과로 버려진 단계가 공용 풀 워커를 붙잡지 않아 다음 요청이 대기열에서 시간 초과되지 않음"""
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown, wait=False)
+        hung = StageGraph(executor).add("llm", lambda: time.sleep(1) or "late", timeout=0.1,
+                                        on_timeout=lambda: "fallback")
+        self.assertEqual(hung.run()[0]["llm"], "fallback")
+
+        started = time.perf_counter()
+        results, timings = (StageGraph(executor)
+                            .add("search", lambda: "docs")
+                            .add("llm", lambda search: search + ":answer", inputs=("search",), timeout=0.3,
+                                 on_timeout=lambda search: "fallback")
+                            .run())
+        self.assertEqual(results, {"search": "docs", "llm": "docs:answer"})
+        self.assertNotIn("timed_out", timings["llm"])
+        self.assertLess(time.perf_counter() - started, 0.3)
+
+    def test_histograms(self):
+        histograms = {}
+        StageGraph(histograms=histograms).add("a", lambda: None).run()
+        self.assertEqual(histograms["a"].snapshot()["count"], 1)
+
+
+def docs(prefix, n):
+    return [Document(page_content=f"{prefix} 설명 " * 20, metadata={"title": f"{prefix}{i}"}) for i in range(n)]
+
+
+class TestRetrieverStages(unittest.TestCase):
+    def setUp(self):
+        gateway = LLMGateway(llm_factory=lambda model, t: RunnableLambda(lambda _: "답변"))
+        self.search = mock.Mock(return_value={"관광지": docs("관광지", 12), "숙박": docs("숙소", 12),
+                                              "대중교통": docs("교통", 12)})
+        self.weather_started = []
+
+        def slow_category(query):
+            time.sleep(0.1)
+            return ["관광지", "날씨"]
+
+        def weather(region):
+            self.weather_started.append(time.perf_counter())
+            return {"city": region, "temperature": "20", "humidity": "50",
+                    "precipitation_type": "맑음", "wind_speed": "1"}
+
+        patches = [
+            mock.patch.object(retriever, "get_llm_gateway", return_value=gateway),
+            mock.patch.object(retriever, "get_category", slow_category),
+            mock.patch.object(retriever, "get_user_parser", return_value={"region": "부산", "pet_type": "강아지", "days": 2}),
+            mock.patch.object(retriever, "get_weather", weather),
+            mock.patch.object(retriever, "get_weather_batch", return_value={}),
+            mock.patch.object(retriever, "fetch_pet_friendly_places_only", return_value=[]),
+            mock.patch.object(retriever, "get_naver_map_link", return_value="#"),
+            mock.patch.object(retriever.vm, "multiretrieve_by_category", self.search),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.retriever = retriever.Retriever(enable_db_updates=False)
+
+    def test_speculative_search_and_early_weather(self):
+        started = time.perf_counter()
+        self.assertEqual(self.retriever.process_query("부산 강아지 1박 2일 여행 날씨"), "답변")
+        timings = self.retriever.last_stage_timings
+
+        # 검색은 카테고리 분석과 동시에 한 번만 (2일 x 4곳 = 8 ≤ SPECULATIVE_SEARCH_K)
+        self.search.assert_called_once()
+        self.assertLess(timings["speculative_search"]["start_ms"], timings["categories"]["end_ms"])
+        # 날씨는 지역을 알자마자 (카테고리 분석이 끝나기 전에) 조회
+        self.assertLess((self.weather_started[0] - started) * 1000, timings["categories"]["end_ms"])
+        self.assertGreaterEqual(self.retriever.last_context_report["docs_after"], 1)
+        self.assertIn("generate", self.retriever.get_stage_stats())
+
+    def test_deep_search_falls_back_to_targeted_search(self):
+        with mock.patch.object(retriever, "get_user_parser", return_value={"region": "부산", "pet_type": None, "days": 5}):
+            self.retriever.process_query("부산 5일 여행")
+        self.assertEqual(self.search.call_count, 2)
+        self.assertEqual(self.search.call_args.kwargs["k_each"], 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import unittest
+import sys
+import os
+import math
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import mock
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+import unified_index
+import vector_manger as vm
+from unified_index import UnifiedIndex
+from vector_fixtures import VECTORS, store
+
+
+def titles(hits):
+    return [doc.metadata["title"] for _, doc in hits]
+
+
+class TestUnifiedIndex(unittest.TestCase):
+    def setUp(self):
+        self.stores = {"관광지": store("해운대", "광안리", "송정"),
+                       "숙박": store("해운대 호텔", "부산역 호텔"),
+                       "대중교통": store("KTX")}
+        self.unified = UnifiedIndex.build(self.stores)
+
+    def test_single_probe_matches_separate_search(self):
+        hits = self.unified.search(VECTORS["해운대"], ["관광지", "숙박"], k_each=2)
+        for category in ("관광지", "숙박"):
+            expected = self.stores[category].similarity_search_with_score_by_vector(VECTORS["해운대"], k=2)
+            self.assertEqual(titles(hits[category]), [d.metadata["title"] for d, _ in expected])
+            for (score, _), (_, expected_score) in zip(hits[category], expected):
+                self.assertTrue(math.isclose(score, expected_score, abs_tol=1e-5))
+        self.assertEqual(self.unified.get_stats(), {"searches": 1, "refills": 0, "saves": 0, "vectors": 6})
+
+    def test_crowded_out_category_is_refilled(self):
+        """관광지 후보에 밀려 첫 조회에서 빠진 대중교통은 라벨로 제한해 다시 조회"""
+        with mock.patch.object(unified_index, "UNIFIED_OVERFETCH", 1):
+            hits = self.unified.search(VECTORS["해운대"], ["관광지", "대중교통"], k_each=1)
+        self.assertEqual(titles(hits["관광지"]), ["해운대"])
+        self.assertEqual(titles(hits["대중교통"]), ["KTX"])
+        self.assertEqual(self.unified.get_stats()["refills"], 1)
+
+    def test_save_load_mmap_and_add(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.unified.save(Path(tmp))
+            loaded = UnifiedIndex.load(Path(tmp))
+            # 벡터는 파일을 메모리 맵으로 참조 (프로세스 메모리로 복사하지 않음)
+            self.assertFalse(loaded.index.codes.is_owned)
+            self.assertEqual(loaded.categories, ["관광지", "숙박", "대중교통"])
+            self.assertEqual(titles(loaded.search(VECTORS["KTX"], ["숙박"], k_each=1)["숙박"]), ["부산역 호텔"])
+
+            lodging = self.stores["숙박"]
+            start = lodging.index.ntotal
+            lodging.add_texts(["KTX"], metadatas=[{"title": "역 앞 호텔"}])
+            target = Path(tmp) / "data" / "db" / "faiss" / unified_index.UNIFIED_DB_NAME
+            with mock.patch.object(vm, "get_unified_index", return_value=loaded), \
+                    mock.patch.object(vm, "get_project_root", return_value=Path(tmp)), \
+                    mock.patch.object(unified_index, "UNIFIED_SAVE_DELAY", 0.2):
+                vm.add_to_unified_index("숙박", lodging, start)
+                lodging.add_texts(["해운대"], metadatas=[{"title": "바닷가 호텔"}])
+                vm.add_to_unified_index("숙박", lodging, start + 1)
+            self.assertEqual(titles(loaded.search(VECTORS["KTX"], ["숙박"], k_each=1)["숙박"]), ["역 앞 호텔"])
+            with mock.patch.object(unified_index, "UNIFIED_OVERFETCH", 1):
+                hits = loaded.search(VECTORS["해운대"], ["숙박"], k_each=2)
+            self.assertEqual(titles(hits["숙박"]), ["바닷가 호텔", "해운대 호텔"])
+            self.assertFalse(loaded.index.codes.is_owned)
+            # 저장은 추가할 때마다가 아니라 지연 후 백그라운드에서 한 번
+            self.assertFalse(target.exists())
+            for _ in range(100):
+                if loaded.get_stats()["saves"]:
+                    break
+                time.sleep(0.05)
+            self.assertEqual(loaded.get_stats()["saves"], 1)
+            self.assertEqual(UnifiedIndex.load(target).get_stats()["vectors"], 8)
+            self.assertEqual(titles(UnifiedIndex.load(target).search(VECTORS["해운대"], ["숙박"], k_each=1)["숙박"]),
+                             ["바닷가 호텔"])
+
+    def test_searches_run_concurrently(self):
+        """검색끼리는 서로 기다리지 않고, add 만 검색이 끝나기를 기다림"""
+        index = self.unified.index
+        both_searching = threading.Barrier(2, timeout=2)
+
+        class BarrierIndex:
+            ntotal = index.ntotal
+
+            def search(self, *args, **kwargs):
+                both_searching.wait()
+                return index.search(*args, **kwargs)
+
+        self.unified.index = BarrierIndex()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+            self.unified.search(VECTORS["해운대"], ["관광지"], k_each=1))) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual([titles(r["관광지"]) for r in results], [["해운대"], ["해운대"]])
+        self.assertFalse(both_searching.broken)
+
+    def test_multiretrieve_uses_unified_index(self):
+        """통합 인덱스에 없는 카테고리만 카테고리별 DB 로 검색"""
+        unified = UnifiedIndex.build({"숙박": self.stores["숙박"], "대중교통": self.stores["대중교통"]})
+        with mock.patch.object(vm, "get_unified_index", return_value=unified), \
+                mock.patch.dict(vm._db_cache, {vm.category_to_db["관광지"]: self.stores["관광지"]}), \
+                mock.patch.object(vm, "load_db", wraps=vm.load_db) as load_db, \
+                mock.patch.object(vm, "embed_query", return_value=VECTORS["해운대"]):
+            results = vm.multiretrieve_by_category("해운대", ["관광지", "숙박", "대중교통"], k_each=2, top_k=2)
+        self.assertEqual({c.args[0] for c in load_db.call_args_list}, {vm.category_to_db["관광지"]})
+        self.assertEqual(unified.get_stats()["searches"], 1)
+        self.assertEqual([d.metadata["title"] for d in results["숙박"]], ["해운대 호텔", "부산역 호텔"])
+        self.assertEqual([d.metadata["title"] for d in results["대중교통"]], ["KTX"])
+        self.assertTrue(math.isclose(results["숙박"][0].metadata[vm.SCORE_KEY], 0.96, abs_tol=1e-5))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+import sys
+import os
+import math
+from unittest import mock
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+import vector_manger as vm
+from vector_fixtures import VECTORS, FixedEmbeddings, store
+
+
+def build_db(strategy=DistanceStrategy.EUCLIDEAN_DISTANCE):
+    return store("해운대", "광안리", "KTX", distance_strategy=strategy)
+
+
+class TestMultiretrieveScores(unittest.TestCase):
+    def search(self, db):
+        with mock.patch.dict(vm._db_cache, {vm.category_to_db["관광지"]: db}), \
+                mock.patch.object(vm, "embed_query", return_value=VECTORS["해운대"]):
+            return vm.multiretrieve_by_category("해운대", ["관광지", "날씨"], k_each=3, top_k=2)["관광지"]
+
+    def test_scores_are_cosine_similarity(self):
+        """정규화 임베딩의 제곱 L2 거리 → 코사인 유사도"""
+        for strategy in (DistanceStrategy.EUCLIDEAN_DISTANCE, DistanceStrategy.MAX_INNER_PRODUCT):
+            docs = self.search(build_db(strategy))
+            self.assertEqual([d.metadata["title"] for d in docs], ["해운대", "광안리"])
+            self.assertTrue(math.isclose(docs[0].metadata[vm.SCORE_KEY], 1.0, abs_tol=1e-5))
+            self.assertTrue(math.isclose(docs[1].metadata[vm.SCORE_KEY], 0.8, abs_tol=1e-5))
+
+    def test_docstore_documents_untouched(self):
+        db = build_db()
+        self.search(db)
+        stored = [db.docstore.search(i) for i in db.index_to_docstore_id.values()]
+        self.assertTrue(all(vm.SCORE_KEY not in d.metadata for d in stored))
+
+
+class TestAdaptiveTopK(unittest.TestCase):
+    def test_cut_at_score_gap(self):
+        self.assertEqual(vm.adaptive_cutoff([0.82, 0.80, 0.79, 0.78, 0.55, 0.54], min_k=2, max_k=6), 4)
+
+    def test_never_below_min_k(self):
+        self.assertEqual(vm.adaptive_cutoff([0.9, 0.5, 0.49, 0.48, 0.47], min_k=3, max_k=5), 3)
+
+    def test_cut_at_elbow(self):
+        similarities = [0.80, 0.74, 0.68, 0.62, 0.61, 0.60, 0.59, 0.58]
+        self.assertEqual(vm.adaptive_cutoff(similarities, min_k=2, max_k=8), 4)
+
+    def test_flat_scores_keep_max_k(self):
+        self.assertEqual(vm.adaptive_cutoff([0.7, 0.69, 0.69, 0.68, 0.68], min_k=2, max_k=4), 4)
+        self.assertEqual(vm.adaptive_cutoff([0.7, 0.2], min_k=3, max_k=10), 2)
+
+    def test_same_place_kept_once_across_categories(self):
+        place = FAISS.from_texts(["해운대", "광안리"], FixedEmbeddings(),
+                                 metadatas=[{"title": "해운대 해수욕장"}, {"title": "광안리"}])
+        lodging = FAISS.from_texts(["해운대", "KTX"], FixedEmbeddings(),
+                                   metadatas=[{"facility_name": "해운대해수욕장"}, {"facility_name": "부산역 호텔"}])
+        dbs = {vm.category_to_db["관광지"]: place, vm.category_to_db["숙박"]: lodging}
+        with mock.patch.dict(vm._db_cache, dbs), mock.patch.object(vm, "embed_query", return_value=VECTORS["해운대"]):
+            results = vm.multiretrieve_by_category("해운대", ["관광지", "숙박"], k_each=2, top_k=2, dedupe=True)
+        # 같은 점수면 먼저 요청한 카테고리에 남김
+        self.assertEqual([d.metadata.get("title") for d in results["관광지"]], ["해운대 해수욕장", "광안리"])
+        self.assertEqual([d.metadata.get("facility_name") for d in results["숙박"]], ["부산역 호텔"])
+
+
+class TestExactScan(unittest.TestCase):
+    def setUp(self):
+        self.db = build_db()
+        self.name = vm.category_to_db["대중교통"]
+        patch = mock.patch.dict(vm._db_cache, {self.name: self.db})
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.addCleanup(vm._matrix_cache.pop, self.name, None)
+
+    def test_matches_faiss_search(self):
+        exact = vm.search_ids(self.name, VECTORS["광안리"], 3)
+        with mock.patch.object(vm, "EXACT_SCAN_MAX_VECTORS", 0):
+            indexed = vm.search_ids(self.name, VECTORS["광안리"], 3)
+        self.assertEqual([i for i, _ in exact], [i for i, _ in indexed])
+        for (_, a), (_, b) in zip(exact, indexed):
+            self.assertTrue(math.isclose(a, b, abs_tol=1e-5))
+        self.assertEqual([d.metadata["title"] for d in vm.get_documents(self.name, [i for i, _ in exact])],
+                         ["광안리", "해운대", "KTX"])
+
+    def test_matrix_rebuilt_after_add(self):
+        vm.search_ids(self.name, VECTORS["KTX"], 1)
+        self.db.add_texts(["KTX"], metadatas=[{"title": "KTX 규정"}])
+        self.assertEqual(len(vm.search_ids(self.name, VECTORS["KTX"], 5)), 4)
+
+    def test_documents_materialized_for_final_top_k_only(self):
+        with mock.patch.object(self.db.docstore, "search", wraps=self.db.docstore.search) as lookup, \
+                mock.patch.object(vm, "embed_query", return_value=VECTORS["KTX"]):
+            docs = vm.multiretrieve_by_category("KTX", ["대중교통"], k_each=3, top_k=1)["대중교통"]
+        self.assertEqual([d.metadata["title"] for d in docs], ["KTX"])
+        self.assertEqual(lookup.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
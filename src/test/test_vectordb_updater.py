@@ -0,0 +1,57 @@
+import unittest
+import sys
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import mock
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+from langchain.schema import Document
+import vectordb_updater
+from vectordb_updater import VectorDBUpdater
+
+
+class SlowDB:
+    """add_texts 도중 다른 쓰기가 끼어들면 기록하는 가짜 VectorDB"""
+
+    def __init__(self):
+        self.index = mock.Mock(ntotal=0)
+        self.writing = False
+        self.overlaps = 0
+
+    def add_texts(self, texts, metadatas):
+        if self.writing:
+            self.overlaps += 1
+        self.writing = True
+        ntotal = self.index.ntotal
+        time.sleep(0.05)
+        self.index.ntotal = ntotal + len(texts)
+        self.writing = False
+
+
+class TestConcurrentWrites(unittest.TestCase):
+    def test_jobs_for_same_db_write_one_at_a_time(self):
+        """같은 DB 에 대한 보강 작업(예: 숙박/부산, 숙박/제주)은 추가·동기화·저장을 차례로"""
+        db = SlowDB()
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.object(vectordb_updater.vm, "get_embedding"), \
+                mock.patch.object(vectordb_updater.vm, "get_project_root", return_value=Path(tmp)), \
+                mock.patch.object(vectordb_updater.vm, "load_db", return_value=db), \
+                mock.patch.object(vectordb_updater.vm, "add_to_unified_index") as add_to_unified, \
+                mock.patch.object(VectorDBUpdater, "_save_updated_db"):
+            updaters = [VectorDBUpdater(), VectorDBUpdater()]
+            docs = [Document(page_content=f"숙소{i}", metadata={}) for i in range(2)]
+            threads = [threading.Thread(target=u.add_documents_to_db, args=([d], "숙박"))
+                       for u, d in zip(updaters, docs)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.assertEqual(db.overlaps, 0)
+        self.assertEqual(db.index.ntotal, 2)
+        self.assertEqual(sorted(c.args[2] for c in add_to_unified.call_args_list), [0, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
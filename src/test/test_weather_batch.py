@@ -0,0 +1,94 @@
+import unittest
+import sys
+import os
+import asyncio
+from datetime import date, datetime, timedelta
+from unittest import mock
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+import weather
+import weather_cache
+
+
+def fake_forecast(nx, ny, base_date, base_time):
+    forecast = {}
+    for offset in range(4):
+        day = (date.today() + timedelta(days=offset)).strftime('%Y%m%d')
+        forecast[day] = {
+            '0600': {'TMP': '15', 'SKY': '1', 'PTY': '0', 'POP': '10', 'REH': '60', 'WSD': '1.0', 'TMN': '14'},
+            '1200': {'TMP': '24', 'SKY': '4', 'PTY': '1', 'POP': '70', 'REH': '80', 'WSD': '3.5'},
+            '1500': {'TMP': '25', 'SKY': '4', 'PTY': '1', 'POP': '60', 'REH': '70', 'WSD': '2.0', 'TMX': '26'},
+        }
+    return forecast
+
+
+def forecast_page(page_no, total_count):
+    """단기예보 XML 한 페이지 (페이지마다 다른 시각의 TMP 한 행)"""
+    return mock.Mock(status_code=200, raise_for_status=lambda: None, content=(
+        f"<response><body><items><item><fcstDate>20250603</fcstDate><fcstTime>{page_no:02d}00</fcstTime>"
+        f"<category>TMP</category><fcstValue>{page_no}</fcstValue></item></items>"
+        f"<numOfRows>1000</numOfRows><pageNo>{page_no}</pageNo><totalCount>{total_count}</totalCount></body></response>"
+    ).encode("utf-8"))
+
+
+class TestForecastPaging(unittest.TestCase):
+    def test_pages_past_num_of_rows_are_fetched(self):
+        """totalCount 가 numOfRows 보다 크면 마지막 날 예보가 잘리지 않도록 다음 페이지도 조회"""
+        client = mock.Mock()
+        client.get.side_effect = lambda url, params, **kwargs: forecast_page(int(params['pageNo']), 2100)
+        client.aget = mock.AsyncMock(side_effect=lambda url, params, **kwargs: forecast_page(int(params['pageNo']), 2100))
+        with mock.patch.object(weather, 'get_api_client', return_value=client):
+            forecast = weather._fetch_forecast(60, 127, '20250603', '0200')
+            self.assertEqual(forecast, asyncio.run(weather._afetch_forecast(60, 127, '20250603', '0200')))
+        self.assertEqual(forecast['20250603'], {'0100': {'TMP': '1'}, '0200': {'TMP': '2'}, '0300': {'TMP': '3'}})
+        self.assertEqual([c.kwargs['params']['pageNo'] for c in client.get.call_args_list], ['1', '2', '3'])
+
+    def test_failed_page_is_not_returned_as_partial_forecast(self):
+        client = mock.Mock()
+        client.get.side_effect = lambda url, params, **kwargs: forecast_page(1, 1500) if params['pageNo'] == '1' \
+            else mock.Mock(status_code=200, raise_for_status=lambda: None, content=b"not xml")
+        with mock.patch.object(weather, 'get_api_client', return_value=client):
+            self.assertIn('error', weather._fetch_forecast(60, 127, '20250603', '0200'))
+
+
+class TestWeatherBatch(unittest.TestCase):
+    def setUp(self):
+        weather_cache._cache = None
+        weather_cache._forecast_cache = None
+
+    def test_forecast_base_date_time(self):
+        self.assertEqual(weather.get_forecast_base_date_time(datetime(2025, 6, 3, 1, 0)), ('20250602', '2300'))
+        self.assertEqual(weather.get_forecast_base_date_time(datetime(2025, 6, 3, 2, 10)), ('20250603', '0200'))
+        self.assertEqual(weather.get_forecast_base_date_time(datetime(2025, 6, 3, 14, 5)), ('20250603', '1100'))
+
+    def test_summarize_forecast_day(self):
+        summary = weather.summarize_forecast_day(fake_forecast(0, 0, '', '')[date.today().strftime('%Y%m%d')])
+        self.assertEqual(summary['min_temp'], 14.0)
+        self.assertEqual(summary['max_temp'], 26.0)
+        self.assertEqual(summary['sky'], '흐림')
+        self.assertEqual(summary['precipitation_type'], '비')
+        self.assertEqual(summary['precipitation_probability'], 70.0)
+
+    def test_batch_dedupes_grid_cells(self):
+        """같은 격자를 쓰는 지역은 한 번만 요청"""
+        with mock.patch.object(weather, '_fetch_forecast', side_effect=fake_forecast) as fcst, \
+             mock.patch.object(weather, '_fetch_nowcast', return_value={'T1H': '20', 'REH': '50', 'PTY': '0', 'WSD': '1'}) as ncst:
+            results = weather.get_weather_batch(['제주', '제주도', '서울', '없는지역'], days=3)
+        self.assertEqual(fcst.call_count, 2)
+        self.assertEqual(ncst.call_count, 2)
+        self.assertEqual(results['제주']['days'], results['제주도']['days'])
+        self.assertEqual(len(results['서울']['days']), 3)
+        self.assertEqual(results['서울']['current']['temperature'], '20')
+        self.assertIn('error', results['없는지역'])
+
+    def test_batch_out_of_horizon(self):
+        with mock.patch.object(weather, '_fetch_forecast', side_effect=fake_forecast), \
+             mock.patch.object(weather, '_fetch_nowcast', return_value={'error': 'x'}):
+            results = weather.get_weather_batch(['서울'], start_date=date.today() + timedelta(days=3), days=2)
+        days = results['서울']['days']
+        self.assertNotIn('error', days[0])
+        self.assertIn('error', days[1])
+        self.assertNotIn('current', results['서울'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+import sys
+import os
+import asyncio
+import tempfile
+import threading
+import time
+from datetime import datetime
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+from weather_cache import WeatherCache, next_publication_time
+from weather import get_base_date_time
+
+
+def current_key(nx=60, ny=127):
+    return (nx, ny) + get_base_date_time()
+
+
+class TestWeatherCache(unittest.TestCase):
+    def test_hit_after_fetch(self):
+        cache = WeatherCache()
+        calls = []
+        fetch = lambda: calls.append(1) or {"T1H": "20.1"}
+        self.assertEqual(cache.get_or_fetch(current_key(), fetch), {"T1H": "20.1"})
+        self.assertEqual(cache.get_or_fetch(current_key(), fetch), {"T1H": "20.1"})
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.get_stats()["hits"], 1)
+
+    def test_errors_not_cached(self):
+        cache = WeatherCache()
+        calls = []
+        fetch = lambda: calls.append(1) or {"error": "fail"}
+        cache.get_or_fetch(current_key(), fetch)
+        cache.get_or_fetch(current_key(), fetch)
+        self.assertEqual(len(calls), 2)
+
+    def test_expired_entry_refetched(self):
+        """지난 발표 시각 키는 이미 만료된 상태"""
+        cache = WeatherCache()
+        calls = []
+        fetch = lambda: calls.append(1) or {"T1H": "1"}
+        cache.get_or_fetch((60, 127, "20200101", "0900"), fetch)
+        cache.get_or_fetch((60, 127, "20200101", "0900"), fetch)
+        self.assertEqual(len(calls), 2)
+
+    def test_single_flight(self):
+        """같은 격자의 동시 미스는 한 번만 요청"""
+        cache = WeatherCache()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.2)
+            return {"T1H": "3"}
+
+        threads = [threading.Thread(target=cache.get_or_fetch, args=(current_key(), fetch)) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(calls), 1)
+
+    def test_shared_dir(self):
+        """공유 디렉토리를 쓰면 다른 캐시 인스턴스(프로세스)도 결과를 재사용"""
+        with tempfile.TemporaryDirectory() as tmp:
+            WeatherCache(shared_dir=tmp).get_or_fetch(current_key(), lambda: {"T1H": "5"})
+            other = WeatherCache(shared_dir=tmp)
+            self.assertEqual(other.get_or_fetch(current_key(), lambda: {"T1H": "never"}), {"T1H": "5"})
+            self.assertEqual(other.get_stats()["shared_hits"], 1)
+
+    def test_shared_dir_prunes_expired_entries_and_locks(self):
+        """지난 발표 시각의 캐시 파일과 락 파일은 새 결과를 쓸 때 정리"""
+        with tempfile.TemporaryDirectory() as tmp:
+            old_key = (60, 127, "20250603", "0900")
+            WeatherCache(shared_dir=tmp).get_or_fetch(old_key, lambda: {"T1H": "1"}, expires_at=time.time() + 0.1)
+            failed_key = (61, 127, "20250603", "0900")
+            WeatherCache(shared_dir=tmp).get_or_fetch(failed_key, lambda: {"error": "timeout"})
+            orphan = os.path.join(tmp, "ncst_61_127_202506030900.lock")
+            if os.path.exists(orphan):
+                os.utime(orphan, (time.time() - 3 * 3600,) * 2)
+            time.sleep(0.15)
+
+            cache = WeatherCache(shared_dir=tmp)
+            cache.get_or_fetch(current_key(), lambda: {"T1H": "5"})
+            nx, ny, base_date, base_time = current_key()
+            current = {f"ncst_{nx}_{ny}_{base_date}{base_time}.json"}
+            self.assertEqual({name for name in os.listdir(tmp) if not name.endswith(".lock")}, current)
+            self.assertLessEqual({name for name in os.listdir(tmp) if name.endswith(".lock")},
+                                 {f"ncst_{nx}_{ny}_{base_date}{base_time}.lock"})
+            self.assertGreaterEqual(cache.get_stats()["pruned"], 1)
+
+    def test_async_fetch_coalesced_and_cached(self):
+        """같은 격자에 대한 동시 비동기 요청은 한 번만 호출"""
+        cache = WeatherCache()
+        calls = []
+
+        async def afetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"T1H": "7"}
+
+        async def run():
+            results = await asyncio.gather(*(cache.aget_or_fetch(current_key(), afetch) for _ in range(5)))
+            return results + [await cache.aget_or_fetch(current_key(), afetch)]
+
+        self.assertEqual(asyncio.run(run()), [{"T1H": "7"}] * 6)
+        self.assertEqual(len(calls), 1)
+        stats = cache.get_stats()
+        self.assertEqual((stats["coalesced"], stats["hits"]), (4, 1))
+
+
+class TestPublicationTime(unittest.TestCase):
+    def test_next_publication_time(self):
+        self.assertEqual(next_publication_time("20250603", "0900"), datetime(2025, 6, 3, 10, 40))
+        self.assertEqual(next_publication_time("20250603", "2300"), datetime(2025, 6, 4, 0, 40))
+
+    def test_base_date_time_midnight(self):
+        """자정 직후에는 전날 23시 발표분"""
+        self.assertEqual(get_base_date_time(datetime(2025, 6, 4, 0, 10)), ("20250603", "2300"))
+        self.assertEqual(get_base_date_time(datetime(2025, 6, 4, 9, 45)), ("20250604", "0900"))
+
+
+if __name__ == '__main__':
+    unittest.main()
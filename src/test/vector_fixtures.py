@@ -0,0 +1,25 @@
+"""벡터 검색 테스트에서 함께 쓰는 고정 임베딩과 FAISS 스토어 생성 도우미"""
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+
+VECTORS = {
+    "해운대": [1.0, 0.0, 0.0],
+    "광안리": [0.8, 0.6, 0.0],
+    "송정": [0.6, 0.8, 0.0],
+    "해운대 호텔": [0.96, 0.28, 0.0],
+    "부산역 호텔": [0.0, 0.6, 0.8],
+    "KTX": [0.0, 0.0, 1.0],
+}
+
+
+class FixedEmbeddings(Embeddings):
+    def embed_documents(self, texts):
+        return [VECTORS[t] for t in texts]
+
+    def embed_query(self, text):
+        return VECTORS[text]
+
+
+def store(*texts, **kwargs):
+    """texts 를 제목 메타데이터와 함께 담은 FAISS 스토어 (kwargs 는 FAISS.from_texts 로 전달)"""
+    return FAISS.from_texts(list(texts), FixedEmbeddings(), metadatas=[{"title": t} for t in texts], **kwargs)
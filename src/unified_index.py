@@ -0,0 +1,268 @@
+"""
+카테고리 통합 FAISS 인덱스
+
+카테고리별 FAISS(faiss_place_kure / faiss_pet_kure / faiss_regular_kure)를 벡터마다 카테고리 라벨을 붙인
+인덱스 하나로 합칩니다. 여러 카테고리를 묻는 질문도 인덱스를 한 번만 조회하고, 결과를 라벨로 나눕니다.
+
+- 한 번의 조회로 k_each * 카테고리 수 * UNIFIED_OVERFETCH 개를 가져와 라벨별로 k_each 개씩 채움
+- 그래도 k_each 를 못 채운 카테고리(다른 카테고리에 밀린 경우)만 라벨로 제한해 다시 조회 (refill)
+- index.faiss 는 메모리 맵(IO_FLAG_MMAP_IFC)으로 열어 프로세스 간 페이지 캐시를 공유
+  메모리 맵 인덱스에는 벡터를 추가할 수 없으므로, 불러온 뒤 추가된 벡터는 작은 추가분 인덱스에 넣고 함께 조회
+- 검색끼리는 동시에 실행하고, 문서 추가(add)만 검색을 잠시 막음 (읽기/쓰기 잠금)
+- 추가 후 저장은 UNIFIED_SAVE_DELAY 초 동안 모아서 백그라운드에서 한 번만
+
+빌드: python unified_index.py  (data/db/faiss/faiss_unified_kure 에 저장)
+VectorDBUpdater 가 카테고리 DB 에 문서를 추가하면 불러온 통합 인덱스에도 같은 벡터를 추가하고 저장을 예약합니다.
+"""
+import json
+import logging
+import os
+import pickle
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import faiss
+import numpy as np
+from langchain.schema import Document
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+
+logger = logging.getLogger(__name__)
+
+UNIFIED_DB_NAME = "faiss_unified_kure"
+# 한 번의 조회로 가져올 후보 배수 (k_each * 카테고리 수 * 배수)
+UNIFIED_OVERFETCH = int(os.getenv("UNIFIED_OVERFETCH", "3"))
+# 문서 추가 후 파일 저장까지 기다리는 시간 (초) - 그 사이의 추가는 한 번에 저장
+UNIFIED_SAVE_DELAY = float(os.getenv("UNIFIED_SAVE_DELAY", "30"))
+
+
+class _ReadWriteLock:
+    """여러 읽기(검색)는 동시에, 쓰기(add)는 단독으로"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writing = False
+
+    def acquire_read(self):
+        with self._cond:
+            while self._writing:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self):
+        with self._cond:
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        with self._cond:
+            while self._writing or self._readers:
+                self._cond.wait()
+            self._writing = True
+
+    def release_write(self):
+        with self._cond:
+            self._writing = False
+            self._cond.notify_all()
+
+
+class UnifiedIndex:
+    """
+    카테고리 라벨이 붙은 통합 인덱스
+
+    Args:
+        index: FAISS 인덱스 (모든 카테고리 벡터, 메모리 맵일 수 있음 - 직접 add 하지 않음)
+        docs: 벡터 순서와 같은 Document 목록 (index 다음에 추가분 인덱스 순서)
+        labels: 벡터별 카테고리 번호 (categories 의 인덱스)
+        categories: 카테고리 이름 목록
+        distance_strategy: 원본 DB 의 거리 방식 (vm.to_similarity 에서 사용)
+    """
+
+    def __init__(self, index: "faiss.Index", docs: List[Document], labels: np.ndarray,
+                 categories: List[str], distance_strategy: str = DistanceStrategy.EUCLIDEAN_DISTANCE):
+        self.index = index
+        self.docs = docs
+        self.labels = labels
+        self.categories = list(categories)
+        self.distance_strategy = distance_strategy
+        # 불러온 뒤 추가된 벡터 (id 는 index.ntotal 부터 이어짐)
+        self._extra = faiss.IndexFlat(index.d, index.metric_type)
+        self._descending = distance_strategy == DistanceStrategy.MAX_INNER_PRODUCT
+        self._rw = _ReadWriteLock()
+        self._lock = threading.Lock()  # stats / 저장 예약
+        self._save_timer: Optional[threading.Timer] = None
+        self.stats = {"searches": 0, "refills": 0, "saves": 0}
+
+    @classmethod
+    def build(cls, stores: Dict[str, FAISS]) -> "UnifiedIndex":
+        """카테고리별 FAISS 저장소를 하나로 합침 (벡터는 원본 인덱스에서 그대로 복원)"""
+        strategies = {store.distance_strategy for store in stores.values()}
+        if len(strategies) > 1:
+            raise ValueError(f"Stores use different distance strategies: {strategies}")
+        first = next(iter(stores.values()))
+        index = faiss.IndexFlatIP(first.index.d) if first.distance_strategy == DistanceStrategy.MAX_INNER_PRODUCT \
+            else faiss.IndexFlatL2(first.index.d)
+
+        docs: List[Document] = []
+        labels: List[int] = []
+        for label, (category, store) in enumerate(stores.items()):
+            vectors = store.index.reconstruct_n(0, store.index.ntotal)
+            index.add(vectors)
+            docs.extend(store.docstore.search(store.index_to_docstore_id[i]) for i in range(store.index.ntotal))
+            labels.extend([label] * store.index.ntotal)
+            logger.info(f"Unified index: {category} {store.index.ntotal} vectors")
+        return cls(index, docs, np.asarray(labels, dtype=np.int16), list(stores), first.distance_strategy)
+
+    def save(self, path: Path):
+        """
+        임시 파일에 쓴 뒤 교체합니다. 다른 프로세스가 메모리 맵으로 열고 있는 파일을
+        덮어쓰지 않고, 교체 전까지는 이전 파일을 그대로 읽게 됩니다.
+        """
+        path.mkdir(parents=True, exist_ok=True)
+        self._rw.acquire_read()
+        try:
+            index = self.index
+            if self._extra.ntotal:
+                index = faiss.IndexFlat(self.index.d, self.index.metric_type)
+                index.add(self.index.reconstruct_n(0, self.index.ntotal))
+                index.add(self._extra.reconstruct_n(0, self._extra.ntotal))
+            faiss.write_index(index, str(path / "index.faiss.tmp"))
+            with open(path / "labels.npy.tmp", "wb") as f:
+                np.save(f, self.labels)
+            with open(path / "docs.pkl.tmp", "wb") as f:
+                pickle.dump(self.docs[:index.ntotal], f)
+            with open(path / "meta.json.tmp", "w", encoding="utf-8") as f:
+                json.dump({"categories": self.categories, "distance_strategy": str(self.distance_strategy.value)},
+                          f, ensure_ascii=False)
+        finally:
+            self._rw.release_read()
+        for name in ("index.faiss", "labels.npy", "docs.pkl", "meta.json"):
+            os.replace(path / f"{name}.tmp", path / name)
+        with self._lock:
+            self.stats["saves"] += 1
+
+    def schedule_save(self, path: Path, delay: Optional[float] = None):
+        """delay(기본 UNIFIED_SAVE_DELAY) 초 뒤 백그라운드에서 저장 (이미 예약돼 있으면 그 저장에 포함)"""
+        def run():
+            with self._lock:
+                self._save_timer = None
+            try:
+                self.save(path)
+            except Exception as e:
+                logger.error(f"Error saving unified index: {str(e)}")
+
+        with self._lock:
+            if self._save_timer is not None:
+                return
+            self._save_timer = threading.Timer(UNIFIED_SAVE_DELAY if delay is None else delay, run)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    @classmethod
+    def load(cls, path: Path, mmap: bool = True) -> "UnifiedIndex":
+        index_path = str(path / "index.faiss")
+        try:
+            index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP_IFC) if mmap else faiss.read_index(index_path)
+        except RuntimeError as e:
+            logger.warning(f"Memory-mapped read failed, loading into memory: {str(e)}")
+            index = faiss.read_index(index_path)
+        with open(path / "docs.pkl", "rb") as f:
+            docs = pickle.load(f)
+        with open(path / "meta.json", encoding="utf-8") as f:
+            meta = json.load(f)
+        return cls(index, docs, np.load(path / "labels.npy"), meta["categories"],
+                   DistanceStrategy(meta["distance_strategy"]))
+
+    def add(self, category: str, vectors: np.ndarray, docs: List[Document]):
+        """카테고리 DB 에 추가된 문서를 통합 인덱스에도 추가"""
+        if category not in self.categories:
+            raise ValueError(f"Unknown category: {category}")
+        self._rw.acquire_write()
+        try:
+            self._extra.add(np.asarray(vectors, dtype=np.float32))
+            self.docs.extend(docs)
+            self.labels = np.concatenate([self.labels, np.full(len(docs), self.categories.index(category),
+                                                                dtype=self.labels.dtype)])
+        finally:
+            self._rw.release_write()
+
+    @property
+    def ntotal(self) -> int:
+        return self.index.ntotal + self._extra.ntotal
+
+    def _search(self, query: np.ndarray, k: int, members: Optional[np.ndarray] = None) -> List[Tuple[float, int]]:
+        """기본 인덱스와 추가분 인덱스를 함께 조회해 점수 순으로 합친 (점수, 통합 id) 상위 k 개"""
+        hits: List[Tuple[float, int]] = []
+        offset = 0
+        for index in (self.index, self._extra):
+            n = index.ntotal
+            if n:
+                params = None
+                if members is not None:
+                    own = members[(members >= offset) & (members < offset + n)] - offset
+                    params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(own.astype(np.int64))) \
+                        if len(own) else None
+                if members is None or params is not None:
+                    scores, ids = index.search(query, min(k, n), params=params)
+                    hits.extend((float(score), int(i) + offset) for score, i in zip(scores[0], ids[0]) if i >= 0)
+            offset += n
+        hits.sort(key=lambda hit: hit[0], reverse=self._descending)
+        return hits[:k]
+
+    def search(self, vector: Sequence[float], categories: Sequence[str],
+               k_each: int) -> Dict[str, List[Tuple[float, Document]]]:
+        """
+        카테고리별 상위 k_each 개 (FAISS 점수, Document)
+
+        한 번의 조회 결과를 라벨로 나누고, 모자란 카테고리만 라벨로 제한해 다시 조회합니다.
+        """
+        wanted = {self.categories.index(c): c for c in categories if c in self.categories}
+        if not wanted:
+            return {}
+        query = np.asarray([vector], dtype=np.float32)
+        refills = 0
+        self._rw.acquire_read()
+        try:
+            labels = self.labels
+            hits: Dict[str, List[Tuple[float, Document]]] = {c: [] for c in wanted.values()}
+            for score, i in self._search(query, k_each * len(wanted) * UNIFIED_OVERFETCH):
+                category = wanted.get(int(labels[i]))
+                if category is not None and len(hits[category]) < k_each:
+                    hits[category].append((score, self.docs[i]))
+
+            for label, category in wanted.items():
+                members = np.flatnonzero(labels == label)
+                if len(hits[category]) >= min(k_each, len(members)):
+                    continue
+                refills += 1
+                hits[category] = [(score, self.docs[i]) for score, i in self._search(query, k_each, members)]
+        finally:
+            self._rw.release_read()
+        with self._lock:
+            self.stats["searches"] += 1
+            self.stats["refills"] += refills
+        return hits
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self.stats)
+        stats["vectors"] = int(self.ntotal)
+        return stats
+
+
+if __name__ == "__main__":
+    import vector_manger as vm
+
+    stores = {}
+    for category, name in vm.category_to_db.items():
+        try:
+            stores[category] = vm.load_db(name)
+        except FileNotFoundError:
+            print(f"⚠️ {name} 이 없어 {category} 은(는) 제외합니다 (카테고리별 DB 로 검색)")
+    unified = UnifiedIndex.build(stores)
+    target = vm.get_project_root() / "data" / "db" / "faiss" / UNIFIED_DB_NAME
+    unified.save(target)
+    print(f"✅ {unified.ntotal}개 벡터로 통합 인덱스를 저장했습니다: {target}")
@@ -1,8 +1,14 @@
-import pathlib, functools, torch
+import pathlib, functools, torch, asyncio, threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
 from langchain_huggingface.embeddings import HuggingFaceEmbeddings
-from typing import Dict, List, Sequence, Optional, Tuple
+from typing import Callable, Dict, List, Sequence, Optional, Tuple
 from langchain.schema import Document
+from context_builder import place_key
+from unified_index import UnifiedIndex, UNIFIED_DB_NAME
+from embedding_batcher import EmbeddingBatcher
 import logging 
 import ast
 import os
@@ -33,6 +39,33 @@ category_to_db: Dict[str, str] = {
     "대중교통": "faiss_regular_kure",
 }
 
+# 비동기 경로에서 임베딩/FAISS 검색(CPU 작업)을 돌릴 스레드 수
+VECTOR_EXECUTOR_WORKERS = int(os.getenv("VECTOR_EXECUTOR_WORKERS", "4"))
+# multiretrieve_by_category 결과 Document.metadata 에 담는 유사도 키 (코사인 유사도, 높을수록 유사)
+SCORE_KEY = "similarity"
+# 적응형 top-k (min_k 를 준 경우): 인접한 두 유사도 차이가 이 값 이상이면 그 앞에서 자름
+ADAPTIVE_SCORE_GAP = float(os.getenv("ADAPTIVE_SCORE_GAP", "0.08"))
+# 1위와 마지막 후보의 유사도 차이가 이 값 이상일 때만 엘보 지점에서 자름
+ADAPTIVE_ELBOW_MIN_DROP = float(os.getenv("ADAPTIVE_ELBOW_MIN_DROP", "0.1"))
+# 호출측에서 쓰는 기본 최소 문서 수
+ADAPTIVE_MIN_K = int(os.getenv("ADAPTIVE_MIN_K", "3"))
+# 동시 세션의 질문 임베딩을 모아 한 번에 계산 (0 이면 질문마다 바로 embed_query)
+EMBED_BATCHING_ENABLED = os.getenv("EMBED_BATCHING", "1") != "0"
+# 벡터 수가 이 값 이하인 DB 는 정규화 행렬과의 행렬곱 한 번으로 정확 검색 (faiss_regular_kure 등)
+EXACT_SCAN_MAX_VECTORS = int(os.getenv("EXACT_SCAN_MAX_VECTORS", "2000"))
+# "unified" 이면 통합 인덱스(unified_index.py 로 빌드) 한 번 조회로 여러 카테고리를 검색
+VECTOR_INDEX_MODE = os.getenv("VECTOR_INDEX_MODE", "separate")
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_batcher: Optional[EmbeddingBatcher] = None
+_batcher_lock = threading.Lock()
+_unified_index: Optional[UnifiedIndex] = None
+_unified_loaded = False
+_unified_lock = threading.Lock()
+# DB 이름 → (DB 객체, 벡터 수, 정규화 행렬). DB 가 교체되거나 문서가 추가되면 다시 만듦
+_matrix_cache: Dict[str, Tuple[FAISS, int, np.ndarray]] = {}
+_matrix_lock = threading.Lock()
+
 def get_device():
     """Get the appropriate device for computation"""
     device = _initialize_device()
@@ -59,6 +92,31 @@ def get_embedding(device: Optional[str] = None):
         encode_kwargs={"normalize_embeddings": True}
     )
 
+def get_embedding_batcher() -> EmbeddingBatcher:
+    """
+    프로세스 공용 질문 임베딩 배처
+    KURE 는 질문/문서 인코딩 설정이 같으므로 embed_documents 로 모아서 계산해도 embed_query 와 같은 벡터입니다.
+    """
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = EmbeddingBatcher(get_embedding().embed_documents)
+    return _batcher
+
+# 쿼리 임베딩 캐시 (카테고리 라우팅과 검색이 같은 임베딩을 재사용)
+@functools.lru_cache(maxsize=256)
+def _embed_query_cached(query: str) -> Tuple[float, ...]:
+    if EMBED_BATCHING_ENABLED:
+        return tuple(get_embedding_batcher().embed(query))
+    return tuple(get_embedding().embed_query(query))
+
+def embed_query(query: str) -> List[float]:
+    """
+    질의문 임베딩 (최근 질의는 캐시된 값 재사용)
+    """
+    return list(_embed_query_cached(query))
+
 def get_project_root():
     """프로젝트 루트 디렉토리 경로를 반환합니다."""
     current_file = pathlib.Path(__file__).resolve()
@@ -94,6 +152,156 @@ def load_db(name: str) -> FAISS:
         logging.error(f"Error loading database {name}: {str(e)}")
         raise
 
+def get_unified_index() -> Optional[UnifiedIndex]:
+    """
+    통합 인덱스 (VECTOR_INDEX_MODE=unified 이고 빌드된 파일이 있을 때만, 없으면 None)
+    index.faiss 는 메모리 맵으로 열어 여러 프로세스가 같은 페이지를 공유합니다.
+    """
+    global _unified_index, _unified_loaded
+    if VECTOR_INDEX_MODE != "unified":
+        return None
+    if not _unified_loaded:
+        with _unified_lock:
+            if not _unified_loaded:
+                path = get_project_root() / "data" / "db" / "faiss" / UNIFIED_DB_NAME
+                if path.exists():
+                    try:
+                        _unified_index = UnifiedIndex.load(path)
+                        logging.info(f"Loaded unified index: {path}")
+                    except Exception as e:
+                        logging.error(f"Error loading unified index, using per-category DBs: {str(e)}")
+                else:
+                    logging.warning(f"Unified index not found, using per-category DBs: {path}")
+                _unified_loaded = True
+    return _unified_index
+
+def add_to_unified_index(category: str, db: FAISS, start: int):
+    """
+    카테고리 DB 의 start 번째 이후 벡터를 통합 인덱스에도 추가하고 저장을 예약합니다.
+    (보강 요청마다 전체 인덱스를 다시 쓰지 않도록 UNIFIED_SAVE_DELAY 동안 모아서 백그라운드 저장)
+    (통합 인덱스를 쓰지 않거나 해당 카테고리가 없으면 아무것도 하지 않음)
+    """
+    unified = get_unified_index()
+    if unified is None or category not in unified.categories:
+        return
+    vectors = db.index.reconstruct_n(start, db.index.ntotal - start)
+    docs = [db.docstore.search(db.index_to_docstore_id[i]) for i in range(start, db.index.ntotal)]
+    unified.add(category, vectors, docs)
+    unified.schedule_save(get_project_root() / "data" / "db" / "faiss" / UNIFIED_DB_NAME)
+
+def to_similarity(db: FAISS, score: float) -> float:
+    """
+    FAISS 점수를 코사인 유사도로 변환합니다.
+    임베딩이 정규화되어 있으므로 기본(EUCLIDEAN) 인덱스의 점수는 제곱 L2 거리이고,
+    |a-b|² = 2 - 2cos 이므로 cos = 1 - score / 2 입니다.
+    """
+    strategy = getattr(db, "distance_strategy", DistanceStrategy.EUCLIDEAN_DISTANCE)
+    if strategy == DistanceStrategy.MAX_INNER_PRODUCT:
+        return float(score)
+    if strategy == DistanceStrategy.EUCLIDEAN_DISTANCE:
+        return 1.0 - float(score) / 2.0
+    return 1.0 - float(score)
+
+def _normalized_matrix(name: str, db: FAISS) -> np.ndarray:
+    """DB 벡터를 복원해 행 단위로 정규화한 연속(C-order) float32 행렬"""
+    ntotal = db.index.ntotal
+    cached = _matrix_cache.get(name)
+    if cached and cached[0] is db and cached[1] == ntotal:
+        return cached[2]
+    with _matrix_lock:
+        cached = _matrix_cache.get(name)
+        if cached and cached[0] is db and cached[1] == ntotal:
+            return cached[2]
+        matrix = np.ascontiguousarray(db.index.reconstruct_n(0, ntotal), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms > 0, norms, 1.0)
+        _matrix_cache[name] = (db, ntotal, matrix)
+        logging.info(f"Built exact-scan matrix for {name}: {matrix.shape}")
+        return matrix
+
+def search_ids(name: str, vector: Sequence[float], k: int) -> List[Tuple[str, float]]:
+    """
+    DB 에서 (docstore ID, 코사인 유사도) 상위 k 개를 반환합니다. Document 는 만들지 않습니다.
+    EXACT_SCAN_MAX_VECTORS 이하인 작은 DB 는 정규화 행렬과의 행렬곱 한 번으로,
+    큰 DB 는 LangChain 래퍼 없이 FAISS 인덱스를 직접 조회합니다.
+    (임베딩이 정규화되어 있으므로 두 경로의 순위는 기존 L2/IP 검색과 같습니다)
+    """
+    db = load_db(name)
+    ntotal = db.index.ntotal
+    k = min(k, ntotal)
+    if k <= 0:
+        return []
+    query = np.asarray(vector, dtype=np.float32)
+    if ntotal <= EXACT_SCAN_MAX_VECTORS:
+        similarities = _normalized_matrix(name, db) @ (query / (np.linalg.norm(query) or 1.0))
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top], kind="stable")]
+        return [(db.index_to_docstore_id[int(i)], float(similarities[i])) for i in top]
+    scores, ids = db.index.search(query.reshape(1, -1), k)
+    return [(db.index_to_docstore_id[int(i)], to_similarity(db, score))
+            for score, i in zip(scores[0], ids[0]) if i >= 0]
+
+def get_documents(name: str, ids: Sequence[str]) -> List[Document]:
+    """search_ids 결과의 ID 로 docstore 원본 Document 를 조회 (수정하지 말 것)"""
+    db = load_db(name)
+    return [db.docstore.search(doc_id) for doc_id in ids]
+
+def adaptive_cutoff(similarities: Sequence[float], min_k: int, max_k: int) -> int:
+    """
+    내림차순 유사도 목록에서 남길 문서 수 (min_k ~ max_k)
+
+    1. min_k 이후 인접한 두 유사도 차이가 ADAPTIVE_SCORE_GAP 이상인 첫 지점에서 자름
+    2. 없으면, 하락폭이 ADAPTIVE_ELBOW_MIN_DROP 이상일 때 첫 점과 마지막 점을 잇는 직선보다
+       가장 아래로 처진 지점(엘보)까지 남김
+    """
+    n = min(len(similarities), max_k)
+    if n <= min_k:
+        return n
+    for i in range(min_k, n):
+        if similarities[i - 1] - similarities[i] >= ADAPTIVE_SCORE_GAP:
+            return i
+    first, last = similarities[0], similarities[n - 1]
+    if first - last < ADAPTIVE_ELBOW_MIN_DROP or n < 3:
+        return n
+    slope = (last - first) / (n - 1)
+    sag = [(first + slope * i) - similarities[i] for i in range(n)]
+    elbow = max(range(1, n - 1), key=lambda i: sag[i])
+    if sag[elbow] <= 0:
+        return n
+    return max(min_k, elbow + 1)
+
+def _dedupe_places(ranked: Dict[str, List[Tuple[float, Document]]]) -> int:
+    """
+    같은 장소(정규화한 장소명)가 여러 카테고리/DB 에 있으면 유사도가 가장 높은 카테고리에 하나만 남깁니다.
+    장소명이 없는 문서(규정 등)는 그대로 둡니다. 제거한 문서 수를 반환합니다.
+    """
+    best: Dict[str, Tuple[float, str]] = {}
+    for cat, items in ranked.items():
+        for similarity, doc in items:
+            key = place_key(doc)
+            if key and (key not in best or similarity > best[key][0]):
+                best[key] = (similarity, cat)
+
+    removed = 0
+    for cat, items in ranked.items():
+        kept, seen = [], set()
+        for similarity, doc in items:
+            key = place_key(doc)
+            if key and (best[key][1] != cat or key in seen):
+                removed += 1
+                continue
+            if key:
+                seen.add(key)
+            kept.append((similarity, doc))
+        ranked[cat] = kept
+    return removed
+
+def dedupe_places(results: Dict[str, List[Document]]) -> Dict[str, List[Document]]:
+    """multiretrieve_by_category 결과(metadata[SCORE_KEY] 포함)에 _dedupe_places 적용"""
+    ranked = {cat: [(doc.metadata.get(SCORE_KEY, 0.0), doc) for doc in docs] for cat, docs in results.items()}
+    _dedupe_places(ranked)
+    return {cat: [doc for _, doc in items] for cat, items in ranked.items()}
+
 def multiretrieve_by_category(
     query: str,
     categories: Sequence[str] | str,
@@ -101,10 +309,16 @@ def multiretrieve_by_category(
     k_each: int = 5,
     top_k: int = 5,
     weights: Optional[Dict[str, float]] = None,
+    min_k: Optional[int] = None,
+    dedupe: bool = False,
 ) -> Dict[str, List[Document]]:
     """
     카테고리별로 문서를 검색합니다.
     날씨 카테고리는 DB 검색에서 제외되며, 호출측에서 별도 처리해야 합니다.
+    각 문서는 metadata[SCORE_KEY] 에 코사인 유사도를 담은 사본으로 반환됩니다 (가중치 적용 전 값).
+
+    min_k 를 주면 top_k 는 상한이 되고, 유사도 분포(점수 차이/엘보)를 보고 min_k~top_k 개만 남깁니다.
+    dedupe=True 이면 같은 장소가 여러 카테고리에 나올 때 한 곳에만 남깁니다 (잘라내기 전에 적용).
     """
     if not query or not isinstance(query, str):
         logging.error("Invalid query: query must be a non-empty string")
@@ -127,6 +341,19 @@ def multiretrieve_by_category(
         return {}
 
     results: Dict[str, List[Document]] = {}
+    # (유사도, 문서 또는 docstore ID). ID 는 잘라낸 뒤 남은 것만 lookup 으로 Document 를 조회
+    ranked_by_cat: Dict[str, List[Tuple[float, object]]] = {}
+    lookup: Dict[str, Callable[[object], Document]] = {}
+
+    # 통합 인덱스에 있는 카테고리는 한 번의 조회로 검색하고, 나머지만 카테고리별 DB 로 검색
+    unified = get_unified_index()
+    unified_hits: Dict[str, List[Tuple[float, Document]]] = {}
+    if unified is not None:
+        try:
+            unified_hits = unified.search(embed_query(query), [c for c in db_categories if c in category_to_db], k_each)
+        except Exception as e:
+            logging.error(f"Error searching unified index, using per-category DBs: {str(e)}")
+
     for cat in db_categories:
         try:
             if cat not in category_to_db:
@@ -134,24 +361,73 @@ def multiretrieve_by_category(
                 continue
                 
             logging.info(f"Searching for category: {cat}")
-            db = load_db(category_to_db[cat])
-            docs_scores: List[Tuple[Document, float]] = db.similarity_search_with_score(query, k=k_each)
+            if cat in unified_hits:
+                scored = [(to_similarity(unified, score), doc) for score, doc in unified_hits[cat]]
+                lookup[cat] = lambda doc: doc
+            else:
+                name = category_to_db[cat]
+                scored = [(similarity, doc_id) for doc_id, similarity in search_ids(name, embed_query(query), k_each)]
+                lookup[cat] = load_db(name).docstore.search
 
             w = 1.0 if weights is None else weights.get(cat, 1.0)
-            ranked = sorted(
-                (((1 - score) * w, doc) for doc, score in docs_scores),
-                key=lambda x: x[0],
+            ranked_by_cat[cat] = sorted(
+                scored,
+                key=lambda x: x[0] * w,
                 reverse=True,
-            )[:top_k]
-
-            results[cat] = [doc for _, doc in ranked]
-            logging.info(f"Found {len(results[cat])} results for category: {cat}")
+            )
             
         except Exception as e:
             logging.error(f"Error processing category {cat}: {str(e)}")
             results[cat] = []
 
-    return results
+    if dedupe:
+        # 장소명 비교에 메타데이터가 필요하므로 후보 전체를 조회
+        ranked_by_cat = {cat: [(similarity, lookup[cat](ref)) for similarity, ref in ranked]
+                         for cat, ranked in ranked_by_cat.items()}
+        lookup = {cat: (lambda doc: doc) for cat in ranked_by_cat}
+        removed = _dedupe_places(ranked_by_cat)
+        if removed:
+            logging.info(f"Removed {removed} duplicate places across categories")
+
+    for cat, ranked in ranked_by_cat.items():
+        if min_k is None:
+            keep = top_k
+        else:
+            keep = adaptive_cutoff([similarity for similarity, _ in ranked], min_k, top_k)
+        # docstore 의 원본 Document 는 요청 간 공유되므로 사본에 유사도 기록
+        results[cat] = []
+        for similarity, ref in ranked[:keep]:
+            doc = lookup[cat](ref)
+            results[cat].append(
+                Document(id=doc.id, page_content=doc.page_content, metadata={**doc.metadata, SCORE_KEY: similarity})
+            )
+        logging.info(f"Found {len(results[cat])} results for category: {cat} (of {len(ranked)} candidates)")
+
+    return {cat: results[cat] for cat in db_categories if cat in results}
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """임베딩/검색 전용 스레드 풀 (이벤트 루프 기본 풀과 분리해 동시 실행 수 제한)"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=VECTOR_EXECUTOR_WORKERS,
+                                               thread_name_prefix="vector")
+    return _executor
+
+async def run_in_executor(fn, *args, **kwargs):
+    """CPU 작업을 get_executor() 에서 실행하고 결과를 기다립니다."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(fn, *args, **kwargs))
+
+async def aembed_query(query: str) -> List[float]:
+    """embed_query 의 비동기 버전"""
+    return await run_in_executor(embed_query, query)
+
+async def amultiretrieve_by_category(query: str, categories: Sequence[str] | str, **kwargs) -> Dict[str, List[Document]]:
+    """multiretrieve_by_category 의 비동기 버전"""
+    return await run_in_executor(multiretrieve_by_category, query, categories, **kwargs)
 
 
 def list_loaded() -> List[str]:
@@ -1,6 +1,7 @@
 import os
 import json
 import logging
+import threading
 from typing import List, Dict, Any
 from datetime import datetime
 from pathlib import Path
@@ -8,9 +9,21 @@ from langchain.schema import Document
 from langchain_community.vectorstores import FAISS
 from langchain_huggingface.embeddings import HuggingFaceEmbeddings
 import vector_manger as vm
+from weather import attach_weather_grid
 
 logger = logging.getLogger(__name__)
 
+# One writer per VectorDB across updater instances and threads (background/foreground augment)
+_db_write_locks: Dict[str, threading.Lock] = {}
+_db_write_locks_guard = threading.Lock()
+
+
+def _get_db_write_lock(db_name: str) -> threading.Lock:
+    """Lock serializing add_texts / unified index sync / save for one VectorDB"""
+    with _db_write_locks_guard:
+        return _db_write_locks.setdefault(db_name, threading.Lock())
+
+
 class VectorDBUpdater:
     """
     Handles dynamic updates to VectorDB with new external data
@@ -46,18 +59,24 @@ class VectorDBUpdater:
                 
             db_name = self.category_to_db[category]
             
-            # Load existing database
-            existing_db = vm.load_db(db_name)
-            
             # Create texts and metadatas for new documents
             texts = [doc.page_content for doc in documents]
             metadatas = [doc.metadata for doc in documents]
             
-            # Add documents to existing database
-            existing_db.add_texts(texts=texts, metadatas=metadatas)
-            
-            # Save updated database
-            self._save_updated_db(existing_db, db_name)
+            # Concurrent augment jobs for the same DB must not interleave add/sync/save
+            with _get_db_write_lock(db_name):
+                # Load existing database
+                existing_db = vm.load_db(db_name)
+                
+                # Add documents to existing database
+                start = existing_db.index.ntotal
+                existing_db.add_texts(texts=texts, metadatas=metadatas)
+                
+                # Keep the unified index (VECTOR_INDEX_MODE=unified) in sync
+                vm.add_to_unified_index(category, existing_db, start)
+                
+                # Save updated database
+                self._save_updated_db(existing_db, db_name)
             
             # Log the update
             self._log_update(category, len(documents), db_name)
@@ -211,6 +230,9 @@ class VectorDBUpdater:
             
             documents.append(Document(page_content=content, metadata=metadata))
         
+        # 날씨 조회용 격자/지역을 수집 시점에 미리 계산 (mapx/mapy 가 있는 경우)
+        attach_weather_grid([doc.metadata for doc in documents])
+        
         return documents
     
     def cleanup_old_external_data(self, days_old: int = 30) -> int:
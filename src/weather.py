@@ -1,11 +1,21 @@
 import os
 import json
+import asyncio
 import math
+import bisect
+import threading
+import httpx
+import numpy as np
 import requests
 import xml.etree.ElementTree as ET
-from datetime import datetime, timedelta
+from scipy.spatial import cKDTree
+from api_client import get_api_client, redact_url
+from weather_cache import get_weather_cache, get_forecast_cache, PUBLISH_MINUTE
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
 from dotenv import load_dotenv
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 
 load_dotenv()
 open_data = os.getenv('OPEN_DATA')
@@ -32,102 +42,250 @@ PTY_MAP = {
     '4': '소나기'
 }
 
+# 하늘상태 코드 매핑 (단기예보)
+SKY_MAP = {
+    '1': '맑음',
+    '3': '구름많음',
+    '4': '흐림'
+}
+
+# 단기예보 발표 시각 (API 제공은 발표 10분 이후)
+FORECAST_BASE_HOURS = (2, 5, 8, 11, 14, 17, 20, 23)
+FORECAST_PUBLISH_MINUTE = 10
+# 단기예보 제공 범위 (발표일 포함 4일)
+FORECAST_HORIZON_DAYS = 3
+
+# 기상청 격자 Lambert Conformal Conic 투영 상수 (모듈 로드 시 한 번만 계산)
+RE = 6371.00877  # Earth radius (km)
+GRID = 5.0       # Grid spacing (km)
+SLAT1 = 30.0     # Projection latitude 1 (degree)
+SLAT2 = 60.0     # Projection latitude 2 (degree)
+OLON = 126.0     # Reference longitude (degree)
+OLAT = 38.0      # Reference latitude (degree)
+XO = 43          # Reference point X (GRID)
+YO = 136         # Reference point Y (GRID)
+DEGRAD = math.pi / 180.0
+
+_re = RE / GRID
+_slat1 = SLAT1 * DEGRAD
+_slat2 = SLAT2 * DEGRAD
+_olon = OLON * DEGRAD
+_olat = OLAT * DEGRAD
+_sn = math.log(math.cos(_slat1) / math.cos(_slat2)) / math.log(
+    math.tan(math.pi * 0.25 + _slat2 * 0.5) / math.tan(math.pi * 0.25 + _slat1 * 0.5))
+_sf = math.pow(math.tan(math.pi * 0.25 + _slat1 * 0.5), _sn) * math.cos(_slat1) / _sn
+_ro = _re * _sf / math.pow(math.tan(math.pi * 0.25 + _olat * 0.5), _sn)
+
 # 위경도 → nx, ny 변환 함수
 def latlon_to_grid(lat, lon):
     """
     Converts latitude/longitude to KMA grid coordinates (nx, ny).
     """
-    RE = 6371.00877  # Earth radius (km)
-    GRID = 5.0       # Grid spacing (km)
-    SLAT1 = 30.0     # Projection latitude 1 (degree)
-    SLAT2 = 60.0     # Projection latitude 2 (degree)
-    OLON = 126.0     # Reference longitude (degree)
-    OLAT = 38.0      # Reference latitude (degree)
-    XO = 43          # Reference point X (GRID)
-    YO = 136         # Reference point Y (GRID)
-    DEGRAD = math.pi / 180.0
-    re = RE / GRID
-    slat1 = SLAT1 * DEGRAD
-    slat2 = SLAT2 * DEGRAD
-    olon = OLON * DEGRAD
-    olat = OLAT * DEGRAD
-    sn = math.tan(math.pi * 0.25 + slat2 * 0.5) / math.tan(math.pi * 0.25 + slat1 * 0.5)
-    sn = math.log(math.cos(slat1) / math.cos(slat2)) / math.log(sn)
-    sf = math.tan(math.pi * 0.25 + slat1 * 0.5)
-    sf = math.pow(sf, sn) * math.cos(slat1) / sn
-    ro = math.tan(math.pi * 0.25 + olat * 0.5)
-    ro = re * sf / math.pow(ro, sn)
     ra = math.tan(math.pi * 0.25 + lat * DEGRAD * 0.5)
-    ra = re * sf / math.pow(ra, sn)
-    theta = lon * DEGRAD - olon
+    ra = _re * _sf / math.pow(ra, _sn)
+    theta = lon * DEGRAD - _olon
     if theta > math.pi:
         theta -= 2.0 * math.pi
     if theta < -math.pi:
         theta += 2.0 * math.pi
-    theta *= sn
+    theta *= _sn
     x = ra * math.sin(theta) + XO + 0.5
-    y = ro - ra * math.cos(theta) + YO + 0.5
+    y = _ro - ra * math.cos(theta) + YO + 0.5
     return int(x), int(y)
 
+def latlon_to_grid_xy(lats, lons) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    latlon_to_grid 의 NumPy 벡터화 버전 (정수 변환 전의 연속 격자 좌표)
+    수천 개 좌표를 한 번에 변환할 때 사용합니다.
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    ra = _re * _sf / np.power(np.tan(math.pi * 0.25 + lats * DEGRAD * 0.5), _sn)
+    theta = lons * DEGRAD - _olon
+    theta = np.where(theta > math.pi, theta - 2.0 * math.pi, theta)
+    theta = np.where(theta < -math.pi, theta + 2.0 * math.pi, theta)
+    theta *= _sn
+    x = ra * np.sin(theta) + XO + 0.5
+    y = _ro - ra * np.cos(theta) + YO + 0.5
+    return x, y
+
+def latlon_to_grid_array(lats, lons) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    위경도 배열 → (nx, ny) 정수 배열
+    결과는 원소별로 latlon_to_grid 와 동일합니다.
+    """
+    x, y = latlon_to_grid_xy(lats, lons)
+    return np.trunc(x).astype(np.int64), np.trunc(y).astype(np.int64)
+
 # 기상청 API용 날짜/시간 계산
-def get_base_date_time():
-    now = datetime.now()
-    base_date = now.strftime('%Y%m%d')
-    base_time = now.strftime('%H') + '00'
-    if now.minute < 40:
-        prev_hour = (now - timedelta(hours=1)).strftime('%H')
-        base_time = prev_hour + '00'
-    return base_date, base_time
+def get_base_date_time(now: Optional[datetime] = None):
+    now = now or datetime.now()
+    base = now if now.minute >= PUBLISH_MINUTE else now - timedelta(hours=1)
+    # 자정 직후(00:00~00:39)에는 전날 23시 발표분을 사용해야 하므로 날짜도 base 기준
+    return base.strftime('%Y%m%d'), base.strftime('%H') + '00'
 
-# 날씨 정보 조회 함수
-def get_weather(city, city_info_path=None):
+DEFAULT_CITY_INFO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'json', 'region_only_city_info.json')
+
+class RegionIndex:
     """
-    Returns weather info for a given region name (e.g. '서울', '부산', '수원', '기장').
-    Finds the first key in city_info JSON that contains the input string if exact match is not found.
-    Returns dict: {city, temperature, humidity, precipitation_type, wind_speed}
-    If an error occurs, returns dict with 'error' key and message.
+    region_only_city_info.json 지역 인덱스
+
+    파일을 한 번만 읽고 모든 지역의 기상청 격자 좌표(nx, ny)를 미리 계산해 둡니다.
+    완전 일치 / 접두어 / 부분 문자열 조회를 모두 딕셔너리 또는 이진 탐색으로 처리하고,
+    좌표 → 가장 가까운 지역 조회는 지역 중심점 KD-tree 로 처리합니다.
+
+    Args:
+        city_data: {지역명: {"lat": ..., "lon": ...}} 형태의 딕셔너리 (파일 순서 유지)
     """
-    # Use absolute path if not provided
-    if city_info_path is None:
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        city_info_path = os.path.join(current_dir, '..', 'data', 'json', 'region_only_city_info.json')
-    
-    try:
+
+    def __init__(self, city_data: Dict[str, Dict[str, Any]]):
+        self.regions: Dict[str, Dict[str, Any]] = {}
+        coords: Dict[str, Tuple[float, float]] = {}
+        for name, info in city_data.items():
+            try:
+                coords[name] = (float(info['lat']), float(info['lon']))
+            except (KeyError, ValueError, TypeError):
+                # 좌표가 잘못된 지역도 이름 조회는 가능해야 오류 메시지를 그대로 돌려줄 수 있음
+                coords[name] = None
+
+        # 좌표가 있는 지역만 한 번에 투영하고 KD-tree 구성 (격자 평면 = km/5 단위 거리)
+        self._tree_names: List[str] = [name for name, c in coords.items() if c is not None]
+        lat_lon = np.array([coords[name] for name in self._tree_names], dtype=np.float64).reshape(-1, 2)
+        x, y = latlon_to_grid_xy(lat_lon[:, 0], lat_lon[:, 1])
+        self._tree = cKDTree(np.column_stack([x, y])) if self._tree_names else None
+        grid_of = {name: (int(gx), int(gy)) for name, gx, gy in zip(self._tree_names, np.trunc(x), np.trunc(y))}
+
+        for name, c in coords.items():
+            if c is None:
+                self.regions[name] = {'lat': None, 'lon': None, 'nx': None, 'ny': None}
+            else:
+                nx, ny = grid_of[name]
+                self.regions[name] = {'lat': c[0], 'lon': c[1], 'nx': nx, 'ny': ny}
+
+        self._sorted_names: List[str] = sorted(self.regions)
+        # 부분 문자열 → 해당 문자열을 포함하는 (파일 순서상) 첫 번째 지역명
+        self._substring_map: Dict[str, str] = {}
+        for name in self.regions:
+            for i in range(len(name)):
+                for j in range(i + 1, len(name) + 1):
+                    self._substring_map.setdefault(name[i:j], name)
+
+    @classmethod
+    def from_file(cls, city_info_path: str) -> "RegionIndex":
         with open(city_info_path, 'r', encoding='utf-8') as f:
-            city_data = json.load(f)
-    except FileNotFoundError:
-        return {'error': f"city info file not found: {city_info_path}"}
-    except json.JSONDecodeError:
-        return {'error': f"city info file is not valid JSON: {city_info_path}"}
+            return cls(json.load(f))
 
-    region_key = city if city in city_data else next((k for k in city_data if city in k), None)
-    if not region_key:
-        return {'error': f"'{city}'에 해당하는 지역이 region_only_city_info.json에 없습니다."}
-    try:
-        lat = float(city_data[region_key]['lat'])
-        lon = float(city_data[region_key]['lon'])
-    except (KeyError, ValueError, TypeError):
-        return {'error': f"Invalid lat/lon for region: {region_key}"}
-    nx, ny = latlon_to_grid(lat, lon)
-    base_date, base_time = get_base_date_time()
-    url = 'http://apis.data.go.kr/1360000/VilageFcstInfoService_2.0/getUltraSrtNcst'
-    params = {
+    def __len__(self) -> int:
+        return len(self.regions)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.regions
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """완전 일치 조회"""
+        return self.regions.get(name)
+
+    def find_prefix(self, prefix: str) -> List[str]:
+        """prefix 로 시작하는 지역명 목록 (가나다순)"""
+        start = bisect.bisect_left(self._sorted_names, prefix)
+        end = bisect.bisect_left(self._sorted_names, prefix + '\uffff')
+        return self._sorted_names[start:end]
+
+    def find_substring(self, text: str) -> Optional[str]:
+        """text 를 포함하는 첫 번째 지역명"""
+        return self._substring_map.get(text)
+
+    def resolve(self, city: str) -> Optional[str]:
+        """
+        지역명을 인덱스 키로 변환합니다.
+        완전 일치가 없으면 입력 문자열을 포함하는 첫 번째 키를 사용합니다.
+        """
+        if city in self.regions:
+            return city
+        return self.find_substring(city)
+
+    def grid(self, name: str) -> Optional[Tuple[int, int]]:
+        """지역의 미리 계산된 (nx, ny)"""
+        region = self.regions.get(name)
+        if not region or region['nx'] is None:
+            return None
+        return region['nx'], region['ny']
+
+    def nearest_many(self, lats, lons) -> List[Optional[str]]:
+        """
+        각 좌표에서 가장 가까운 지역명 (KD-tree 조회)
+
+        Args:
+            lats: 위도 배열
+            lons: 경도 배열
+
+        Returns:
+            List: 좌표별 가장 가까운 지역명 (좌표가 NaN 이면 None)
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        if self._tree is None or lats.size == 0:
+            return [None] * int(lats.size)
+        x, y = latlon_to_grid_xy(lats, lons)
+        valid = np.isfinite(x) & np.isfinite(y)
+        names: List[Optional[str]] = [None] * int(lats.size)
+        if valid.any():
+            _, idx = self._tree.query(np.column_stack([x[valid], y[valid]]))
+            for pos, i in zip(np.flatnonzero(valid), np.atleast_1d(idx)):
+                names[pos] = self._tree_names[i]
+        return names
+
+    def nearest(self, lat: float, lon: float) -> Optional[str]:
+        """좌표에서 가장 가까운 지역명"""
+        return self.nearest_many([lat], [lon])[0]
+
+
+_region_index_cache: Dict[str, RegionIndex] = {}
+_region_index_lock = threading.Lock()
+
+def get_region_index(city_info_path: Optional[str] = None) -> RegionIndex:
+    """
+    지역 인덱스를 로드합니다. 경로별로 한 번만 로드하고 이후에는 캐시된 인덱스를 반환합니다.
+
+    Raises:
+        FileNotFoundError: 파일이 없을 때
+        json.JSONDecodeError: JSON 형식이 잘못되었을 때
+    """
+    path = os.path.abspath(city_info_path or DEFAULT_CITY_INFO_PATH)
+    index = _region_index_cache.get(path)
+    if index is None:
+        with _region_index_lock:
+            index = _region_index_cache.get(path)
+            if index is None:
+                index = RegionIndex.from_file(path)
+                _region_index_cache[path] = index
+    return index
+
+NOWCAST_URL = 'http://apis.data.go.kr/1360000/VilageFcstInfoService_2.0/getUltraSrtNcst'
+FORECAST_URL = 'http://apis.data.go.kr/1360000/VilageFcstInfoService_2.0/getVilageFcst'
+# Tour API 와 같은 apis.data.go.kr 호스트이므로 서킷 브레이커는 서비스 이름으로 구분
+KMA_SERVICE = "kma"
+# 단기예보 페이지당 행 수 (totalCount 가 더 크면 다음 페이지를 이어서 조회)
+FORECAST_ROWS_PER_PAGE = 1000
+
+
+def _kma_params(nx: int, ny: int, base_date: str, base_time: str, num_of_rows: int,
+                page_no: int = 1) -> Dict[str, str]:
+    return {
         'serviceKey': open_data,
-        'pageNo': '1',
-        'numOfRows': '1000',
+        'pageNo': str(page_no),
+        'numOfRows': str(num_of_rows),
         'dataType': 'XML',
         'base_date': base_date,
         'base_time': base_time,
         'nx': str(nx),
         'ny': str(ny)
     }
+
+
+def _parse_nowcast(content: bytes) -> Dict[str, Any]:
     try:
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-    except requests.RequestException as e:
-        return {'error': f"Weather API request failed: {e}"}
-    try:
-        root = ET.fromstring(response.content)
+        root = ET.fromstring(content)
         weather = {item.find('category').text: item.find('obsrValue').text for item in root.iter('item')}
     except ET.ParseError:
         return {'error': "Weather API response is not valid XML."}
@@ -135,6 +293,58 @@ def get_weather(city, city_info_path=None):
         return {'error': f"Error parsing weather data: {e}"}
     if not weather:
         return {'error': "No weather data found for the given region."}
+    return weather
+
+
+def _fetch_nowcast(nx: int, ny: int, base_date: str, base_time: str) -> Dict[str, Any]:
+    """
+    초단기실황 API 호출
+    Returns dict of {category: obsrValue}, or dict with 'error' key on failure.
+    """
+    # 실황은 격자당 8개 항목
+    params = _kma_params(nx, ny, base_date, base_time, num_of_rows=10)
+    try:
+        response = get_api_client().get(NOWCAST_URL, params=params, api_key=open_data, service=KMA_SERVICE)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        return {'error': f"Weather API request failed: {redact_url(str(e))}"}
+    return _parse_nowcast(response.content)
+
+
+async def _afetch_nowcast(nx: int, ny: int, base_date: str, base_time: str) -> Dict[str, Any]:
+    """_fetch_nowcast 의 비동기 버전"""
+    params = _kma_params(nx, ny, base_date, base_time, num_of_rows=10)
+    try:
+        response = await get_api_client().aget(NOWCAST_URL, params=params, api_key=open_data, service=KMA_SERVICE)
+        response.raise_for_status()
+    except (requests.RequestException, httpx.HTTPError) as e:
+        return {'error': f"Weather API request failed: {redact_url(str(e))}"}
+    return _parse_nowcast(response.content)
+
+
+def _resolve_city(city: str, city_info_path: Optional[str] = None) -> Dict[str, Any]:
+    """지역명 → {'city': 지역 키, 'grid': (nx, ny)} 또는 {'error'}"""
+    if city_info_path is None:
+        city_info_path = DEFAULT_CITY_INFO_PATH
+    try:
+        region_index = get_region_index(city_info_path)
+    except FileNotFoundError:
+        return {'error': f"city info file not found: {city_info_path}"}
+    except json.JSONDecodeError:
+        return {'error': f"city info file is not valid JSON: {city_info_path}"}
+
+    region_key = region_index.resolve(city)
+    if not region_key:
+        return {'error': f"'{city}'에 해당하는 지역이 region_only_city_info.json에 없습니다."}
+    grid = region_index.grid(region_key)
+    if grid is None:
+        return {'error': f"Invalid lat/lon for region: {region_key}"}
+    return {'city': region_key, 'grid': grid}
+
+
+def _format_current(region_key: str, weather: Dict[str, Any]) -> Dict[str, Any]:
+    if 'error' in weather:
+        return weather
     return {
         'city': region_key,
         'temperature': weather.get('T1H'),
@@ -142,4 +352,362 @@ def get_weather(city, city_info_path=None):
         'precipitation_type': PTY_MAP.get(weather.get('PTY', '0'), '알수없음'),
         'wind_speed': weather.get('WSD')
     }
-    
+
+# 날씨 정보 조회 함수
+def get_weather(city, city_info_path=None):
+    """
+    Returns weather info for a given region name (e.g. '서울', '부산', '수원', '기장').
+    Finds the first key in city_info JSON that contains the input string if exact match is not found.
+    Returns dict: {city, temperature, humidity, precipitation_type, wind_speed}
+    If an error occurs, returns dict with 'error' key and message.
+    """
+    resolved = _resolve_city(city, city_info_path)
+    if 'error' in resolved:
+        return resolved
+    nx, ny = resolved['grid']
+    base_date, base_time = get_base_date_time()
+    weather = get_weather_cache().get_or_fetch(
+        (nx, ny, base_date, base_time),
+        lambda: _fetch_nowcast(nx, ny, base_date, base_time),
+    )
+    return _format_current(resolved['city'], weather)
+
+
+async def aget_weather(city, city_info_path=None):
+    """get_weather 의 비동기 버전 (같은 캐시 사용)"""
+    resolved = _resolve_city(city, city_info_path)
+    if 'error' in resolved:
+        return resolved
+    nx, ny = resolved['grid']
+    base_date, base_time = get_base_date_time()
+    weather = await get_weather_cache().aget_or_fetch(
+        (nx, ny, base_date, base_time),
+        lambda: _afetch_nowcast(nx, ny, base_date, base_time),
+    )
+    return _format_current(resolved['city'], weather)
+
+
+# 단기예보용 날짜/시간 계산
+def get_forecast_base_date_time(now: Optional[datetime] = None) -> Tuple[str, str]:
+    now = now or datetime.now()
+    for hour in reversed(FORECAST_BASE_HOURS):
+        if (now.hour, now.minute) >= (hour, FORECAST_PUBLISH_MINUTE):
+            return now.strftime('%Y%m%d'), f"{hour:02d}00"
+    # 02:10 이전에는 전날 23시 발표분
+    return (now - timedelta(days=1)).strftime('%Y%m%d'), '2300'
+
+
+def _parse_forecast(content: bytes) -> Dict[str, Any]:
+    try:
+        root = ET.fromstring(content)
+        forecast: Dict[str, Dict[str, Dict[str, str]]] = {}
+        for item in root.iter('item'):
+            slot = forecast.setdefault(item.find('fcstDate').text, {}).setdefault(item.find('fcstTime').text, {})
+            slot[item.find('category').text] = item.find('fcstValue').text
+    except ET.ParseError:
+        return {'error': "Forecast API response is not valid XML."}
+    except Exception as e:
+        return {'error': f"Error parsing forecast data: {e}"}
+    if not forecast:
+        return {'error': "No forecast data found for the given region."}
+    return forecast
+
+
+def _forecast_pages(content: bytes) -> int:
+    """응답의 totalCount 기준 전체 페이지 수 (0200 발표는 12개 항목 x 70시간 이상이라 1000행을 넘을 수 있음)"""
+    try:
+        total = int(ET.fromstring(content).findtext('.//totalCount'))
+    except (ET.ParseError, TypeError, ValueError):
+        return 1
+    return max(1, math.ceil(total / FORECAST_ROWS_PER_PAGE))
+
+
+def _merge_forecast_pages(pages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """페이지별 파싱 결과를 합침 (한 페이지라도 실패하면 그 오류 - 일부만 캐시되지 않도록)"""
+    forecast: Dict[str, Dict[str, Dict[str, str]]] = {}
+    for page in pages:
+        if 'error' in page:
+            return page
+        for fcst_date, times in page.items():
+            for fcst_time, values in times.items():
+                forecast.setdefault(fcst_date, {}).setdefault(fcst_time, {}).update(values)
+    return forecast
+
+
+def _fetch_forecast_page(nx: int, ny: int, base_date: str, base_time: str,
+                         page_no: int) -> Tuple[Optional[bytes], Dict[str, Any]]:
+    """단기예보 한 페이지 (응답 원문, 파싱 결과)"""
+    params = _kma_params(nx, ny, base_date, base_time, num_of_rows=FORECAST_ROWS_PER_PAGE, page_no=page_no)
+    try:
+        response = get_api_client().get(FORECAST_URL, params=params, api_key=open_data, service=KMA_SERVICE)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        return None, {'error': f"Forecast API request failed: {redact_url(str(e))}"}
+    return response.content, _parse_forecast(response.content)
+
+
+async def _afetch_forecast_page(nx: int, ny: int, base_date: str, base_time: str,
+                                page_no: int) -> Tuple[Optional[bytes], Dict[str, Any]]:
+    params = _kma_params(nx, ny, base_date, base_time, num_of_rows=FORECAST_ROWS_PER_PAGE, page_no=page_no)
+    try:
+        response = await get_api_client().aget(FORECAST_URL, params=params, api_key=open_data, service=KMA_SERVICE)
+        response.raise_for_status()
+    except (requests.RequestException, httpx.HTTPError) as e:
+        return None, {'error': f"Forecast API request failed: {redact_url(str(e))}"}
+    return response.content, _parse_forecast(response.content)
+
+
+def _fetch_forecast(nx: int, ny: int, base_date: str, base_time: str) -> Dict[str, Any]:
+    """
+    단기예보 API 호출 (totalCount 가 numOfRows 보다 크면 다음 페이지도 조회)
+    Returns dict of {fcstDate: {fcstTime: {category: fcstValue}}}, or dict with 'error' key on failure.
+    """
+    content, first = _fetch_forecast_page(nx, ny, base_date, base_time, 1)
+    if 'error' in first:
+        return first
+    pages = [first] + [_fetch_forecast_page(nx, ny, base_date, base_time, page_no)[1]
+                       for page_no in range(2, _forecast_pages(content) + 1)]
+    return _merge_forecast_pages(pages)
+
+
+async def _afetch_forecast(nx: int, ny: int, base_date: str, base_time: str) -> Dict[str, Any]:
+    """_fetch_forecast 의 비동기 버전 (나머지 페이지는 동시에 조회)"""
+    content, first = await _afetch_forecast_page(nx, ny, base_date, base_time, 1)
+    if 'error' in first:
+        return first
+    rest = await asyncio.gather(*(_afetch_forecast_page(nx, ny, base_date, base_time, page_no)
+                                  for page_no in range(2, _forecast_pages(content) + 1)))
+    return _merge_forecast_pages([first] + [page for _, page in rest])
+
+
+def _forecast_key() -> Tuple[str, str, float]:
+    """(base_date, base_time, 만료 시각) - 다음 발표 시각까지 캐시"""
+    base_date, base_time = get_forecast_base_date_time()
+    expires_at = (datetime.strptime(base_date + base_time, '%Y%m%d%H%M')
+                  + timedelta(hours=3, minutes=FORECAST_PUBLISH_MINUTE)).timestamp()
+    return base_date, base_time, expires_at
+
+
+def get_forecast(nx: int, ny: int) -> Dict[str, Any]:
+    """격자의 최신 단기예보 (다음 발표 시각까지 캐시)"""
+    base_date, base_time, expires_at = _forecast_key()
+    return get_forecast_cache().get_or_fetch(
+        (nx, ny, base_date, base_time),
+        lambda: _fetch_forecast(nx, ny, base_date, base_time),
+        expires_at=expires_at,
+    )
+
+
+async def aget_forecast(nx: int, ny: int) -> Dict[str, Any]:
+    """get_forecast 의 비동기 버전"""
+    base_date, base_time, expires_at = _forecast_key()
+    return await get_forecast_cache().aget_or_fetch(
+        (nx, ny, base_date, base_time),
+        lambda: _afetch_forecast(nx, ny, base_date, base_time),
+        expires_at=expires_at,
+    )
+
+
+def _to_float(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def summarize_forecast_day(day_forecast: Dict[str, Dict[str, str]]) -> Dict[str, Any]:
+    """
+    하루치 단기예보({fcstTime: {category: value}})를 요약합니다.
+    Returns dict: {min_temp, max_temp, sky, precipitation_type, precipitation_probability, humidity, wind_speed}
+    """
+    slots = [day_forecast[t] for t in sorted(day_forecast)]
+    temps = [v for v in (_to_float(s.get('TMP')) for s in slots) if v is not None]
+    tmn = next((_to_float(s['TMN']) for s in slots if 'TMN' in s), None)
+    tmx = next((_to_float(s['TMX']) for s in slots if 'TMX' in s), None)
+    pops = [v for v in (_to_float(s.get('POP')) for s in slots) if v is not None]
+    rehs = [v for v in (_to_float(s.get('REH')) for s in slots) if v is not None]
+    wsds = [v for v in (_to_float(s.get('WSD')) for s in slots) if v is not None]
+    # 낮 시간대(06~21시) 기준 하늘상태/강수형태
+    daytime = [s for t, s in sorted(day_forecast.items()) if '0600' <= t <= '2100'] or slots
+    sky = Counter(s['SKY'] for s in daytime if 'SKY' in s).most_common(1)
+    rain = Counter(s['PTY'] for s in daytime if s.get('PTY', '0') != '0').most_common(1)
+    return {
+        'min_temp': tmn if tmn is not None else (min(temps) if temps else None),
+        'max_temp': tmx if tmx is not None else (max(temps) if temps else None),
+        'sky': SKY_MAP.get(sky[0][0], '알수없음') if sky else '알수없음',
+        'precipitation_type': PTY_MAP.get(rain[0][0], '알수없음') if rain else '없음',
+        'precipitation_probability': max(pops) if pops else None,
+        'humidity': round(sum(rehs) / len(rehs)) if rehs else None,
+        'wind_speed': max(wsds) if wsds else None,
+    }
+
+
+def _resolve_batch(regions: Iterable[str], city_info_path: Optional[str]
+                   ) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Tuple[str, Tuple[int, int]]]]:
+    """지역명 → 격자 (해석 실패한 지역은 error 결과로)"""
+    results: Dict[str, Dict[str, Any]] = {}
+    region_cells: Dict[str, Tuple[str, Tuple[int, int]]] = {}
+    try:
+        region_index = get_region_index(city_info_path)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        return {region: {'error': f"city info file could not be loaded: {e}"} for region in regions}, region_cells
+
+    for region in regions:
+        region_key = region_index.resolve(region)
+        if not region_key:
+            results[region] = {'error': f"'{region}'에 해당하는 지역이 region_only_city_info.json에 없습니다."}
+            continue
+        grid = region_index.grid(region_key)
+        if grid is None:
+            results[region] = {'error': f"Invalid lat/lon for region: {region_key}"}
+            continue
+        region_cells[region] = (region_key, grid)
+    return results, region_cells
+
+
+def _batch_dates(start_date: Optional[date], days: int) -> Tuple[date, List[date]]:
+    today = date.today()
+    start_date = start_date or today
+    return today, [start_date + timedelta(days=i) for i in range(max(1, days))]
+
+
+def _assemble_batch(results: Dict[str, Dict[str, Any]], region_cells: Dict[str, Tuple[str, Tuple[int, int]]],
+                    forecasts: Dict[Tuple[int, int], Dict[str, Any]], nowcasts: Dict[Tuple[int, int], Dict[str, Any]],
+                    today: date, dates: List[date]) -> Dict[str, Dict[str, Any]]:
+    """격자별 예보/실황 → 지역별 날짜 요약"""
+    horizon = today + timedelta(days=FORECAST_HORIZON_DAYS)
+    for region, (region_key, cell) in region_cells.items():
+        forecast = forecasts[cell]
+        day_summaries = []
+        for day in dates:
+            entry: Dict[str, Any] = {'date': day.isoformat()}
+            if 'error' in forecast:
+                entry['error'] = forecast['error']
+            elif day > horizon or day.strftime('%Y%m%d') not in forecast:
+                entry['error'] = "단기예보 제공 범위를 벗어난 날짜입니다."
+            else:
+                entry.update(summarize_forecast_day(forecast[day.strftime('%Y%m%d')]))
+            day_summaries.append(entry)
+
+        region_result: Dict[str, Any] = {'city': region_key, 'days': day_summaries}
+        nowcast = nowcasts.get(cell)
+        if nowcast is not None and 'error' not in nowcast:
+            region_result['current'] = {
+                'temperature': nowcast.get('T1H'),
+                'humidity': nowcast.get('REH'),
+                'precipitation_type': PTY_MAP.get(nowcast.get('PTY', '0'), '알수없음'),
+                'wind_speed': nowcast.get('WSD')
+            }
+        results[region] = region_result
+    return results
+
+
+def get_weather_batch(regions: Iterable[str], start_date: Optional[date] = None, days: int = 1,
+                      city_info_path: Optional[str] = None, max_workers: int = 8) -> Dict[str, Dict[str, Any]]:
+    """
+    여러 지역 x 여러 날짜의 날씨를 한 번에 조회합니다.
+
+    지역을 격자(nx, ny) 단위로 묶어 격자당 한 번만, 병렬로 요청합니다.
+    오늘 날짜에는 초단기실황(current)을 함께 넣고, 날짜별 요약은 단기예보로 만듭니다.
+
+    Args:
+        regions: 지역명 목록 (get_weather 와 같은 규칙으로 해석)
+        start_date: 시작 날짜 (None 이면 오늘)
+        days: 조회할 일수
+        city_info_path: 지역 정보 JSON 경로
+        max_workers: 동시 요청 수
+
+    Returns:
+        Dict: {입력 지역명: {'city', 'days': [{'date', ...요약}], 'current'}} 또는 {입력 지역명: {'error'}}
+    """
+    results, region_cells = _resolve_batch(regions, city_info_path)
+    cells = sorted({grid for _, grid in region_cells.values()})
+    if not cells:
+        return results
+    today, dates = _batch_dates(start_date, days)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(cells) * 2)) as executor:
+        forecast_futures = {cell: executor.submit(get_forecast, *cell) for cell in cells}
+        base_date, base_time = get_base_date_time()
+        nowcast_futures = {
+            cell: executor.submit(
+                get_weather_cache().get_or_fetch,
+                (cell[0], cell[1], base_date, base_time),
+                lambda cell=cell: _fetch_nowcast(cell[0], cell[1], base_date, base_time),
+            )
+            for cell in cells
+        } if today in dates else {}
+        forecasts = {cell: f.result() for cell, f in forecast_futures.items()}
+        nowcasts = {cell: f.result() for cell, f in nowcast_futures.items()}
+
+    return _assemble_batch(results, region_cells, forecasts, nowcasts, today, dates)
+
+
+async def aget_weather_batch(regions: Iterable[str], start_date: Optional[date] = None, days: int = 1,
+                             city_info_path: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """get_weather_batch 의 비동기 버전 (격자별 요청을 asyncio.gather 로 동시에)"""
+    results, region_cells = _resolve_batch(regions, city_info_path)
+    cells = sorted({grid for _, grid in region_cells.values()})
+    if not cells:
+        return results
+    today, dates = _batch_dates(start_date, days)
+
+    base_date, base_time = get_base_date_time()
+    forecast_list = asyncio.gather(*(aget_forecast(*cell) for cell in cells))
+    nowcast_list = asyncio.gather(*(
+        get_weather_cache().aget_or_fetch(
+            (cell[0], cell[1], base_date, base_time),
+            lambda cell=cell: _afetch_nowcast(cell[0], cell[1], base_date, base_time),
+        )
+        for cell in (cells if today in dates else [])
+    ))
+    forecast_values, nowcast_values = await asyncio.gather(forecast_list, nowcast_list)
+    forecasts = dict(zip(cells, forecast_values))
+    nowcasts = dict(zip(cells, nowcast_values))
+    return _assemble_batch(results, region_cells, forecasts, nowcasts, today, dates)
+
+
+def format_daily_forecast(day_summaries: List[Dict[str, Any]]) -> str:
+    """get_weather_batch 의 날짜별 요약을 프롬프트용 텍스트로 변환"""
+    lines = []
+    for day in day_summaries:
+        if 'error' in day:
+            lines.append(f"- {day['date']}: 예보 없음 ({day['error']})")
+            continue
+        lines.append(
+            f"- {day['date']}: {day['sky']}, 최저 {day['min_temp']}°C / 최고 {day['max_temp']}°C, "
+            f"강수확률 {day['precipitation_probability']}%, 강수형태 {day['precipitation_type']}, "
+            f"습도 {day['humidity']}%, 최대풍속 {day['wind_speed']} m/s"
+        )
+    return "\n".join(lines)
+
+
+def attach_weather_grid(places: List[Dict[str, Any]], city_info_path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Tour API 결과(mapx=경도, mapy=위도)에 기상청 격자와 가장 가까운 지역명을 붙입니다.
+    모든 장소를 한 번에 변환하므로 수집 시점에 호출해 두면 요청 시에는 계산이 필요 없습니다.
+
+    Adds keys: 'nx', 'ny', 'weather_region' (좌표가 없는 장소는 건드리지 않음)
+    """
+    coords = []
+    for place in places:
+        try:
+            coords.append((float(place['mapy']), float(place['mapx'])))
+        except (KeyError, ValueError, TypeError):
+            coords.append((np.nan, np.nan))
+    if not coords:
+        return places
+
+    lat_lon = np.array(coords, dtype=np.float64)
+    valid = np.isfinite(lat_lon).all(axis=1) & (lat_lon[:, 0] != 0)
+    if not valid.any():
+        return places
+    nx, ny = latlon_to_grid_array(lat_lon[valid, 0], lat_lon[valid, 1])
+    try:
+        regions = get_region_index(city_info_path).nearest_many(lat_lon[valid, 0], lat_lon[valid, 1])
+    except (FileNotFoundError, json.JSONDecodeError):
+        regions = [None] * len(nx)
+    for pos, gx, gy, region in zip(np.flatnonzero(valid), nx, ny, regions):
+        places[pos].update({'nx': int(gx), 'ny': int(gy), 'weather_region': region})
+    return places
+
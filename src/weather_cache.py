@@ -0,0 +1,297 @@
+"""
+기상청 초단기실황/단기예보 캐시
+
+초단기실황(getUltraSrtNcst)은 get_base_date_time 기준으로 한 시간에 한 번만 바뀌고,
+여러 지역이 같은 격자(nx, ny)를 공유합니다. 그래서 (nx, ny, base_date, base_time)을 키로
+다음 발표 시각까지 결과를 캐시합니다.
+
+- 메모리 캐시: 프로세스 내부
+- 공유 캐시(선택): WEATHER_CACHE_DIR 디렉토리에 JSON 파일로 저장해 워커 프로세스끼리 공유
+- single-flight: 같은 격자에 대한 동시 캐시 미스는 한 번만 요청
+
+공유 캐시에 새 결과를 쓸 때(최대 SHARED_PRUNE_INTERVAL 초에 한 번) 만료된 캐시 파일과 그 락 파일을 지워
+발표 시각마다 파일이 쌓이지 않게 합니다.
+
+단기예보(getVilageFcst)는 발표 주기가 3시간이라 get_or_fetch 에 만료 시각을 직접 넘겨 사용합니다.
+비동기 호출(aget_or_fetch)은 이벤트 루프를 막지 않도록 공유 캐시 파일 락 없이 읽기/쓰기만 합니다.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from api_client import AsyncSingleFlight, SingleFlight
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# 초단기실황은 매시 정각 관측, 40분 이후 API 제공
+PUBLISH_MINUTE = 40
+
+CacheKey = Tuple[int, int, str, str]
+
+# 공유 캐시 디렉토리에서 만료 파일을 정리하는 최소 간격 (초)
+SHARED_PRUNE_INTERVAL = float(os.getenv("WEATHER_CACHE_PRUNE_INTERVAL", "600"))
+# 캐시 파일 없이 남은 락 파일(에러 응답 등)을 지우기까지의 시간 (초)
+ORPHAN_LOCK_TTL = 2 * 3600
+
+
+def next_publication_time(base_date: str, base_time: str) -> datetime:
+    """
+    (base_date, base_time) 다음 발표 시각을 계산합니다.
+
+    Example:
+        ('20250603', '0900') → 2025-06-03 10:40
+    """
+    base = datetime.strptime(base_date + base_time, '%Y%m%d%H%M')
+    return base + timedelta(hours=1, minutes=PUBLISH_MINUTE)
+
+
+class WeatherCache:
+    """
+    격자 단위 날씨 캐시
+
+    Args:
+        shared_dir: 프로세스 간 공유 캐시 디렉토리 (None 이면 메모리 캐시만 사용)
+        max_entries: 메모리 캐시 최대 항목 수
+        namespace: 공유 캐시 파일명 접두어 (실황/예보 캐시가 같은 디렉토리를 쓸 때 구분용)
+    """
+
+    def __init__(self, shared_dir: Optional[str] = None, max_entries: int = 1024, namespace: str = "ncst"):
+        self.namespace = namespace
+        self.shared_dir = Path(shared_dir) if shared_dir else None
+        if self.shared_dir:
+            self.shared_dir.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._entries: Dict[CacheKey, Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._async_flight = AsyncSingleFlight()
+        self._next_prune = 0.0
+        self.stats = {"hits": 0, "shared_hits": 0, "misses": 0, "fetches": 0, "pruned": 0}
+
+    def _bump(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _get_memory(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if time.time() >= expires_at:
+                del self._entries[key]
+                return None
+            return value
+
+    def _set_memory(self, key: CacheKey, value: Dict[str, Any], expires_at: float):
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                now = time.time()
+                for k in [k for k, (exp, _) in self._entries.items() if exp <= now]:
+                    del self._entries[k]
+                if len(self._entries) >= self.max_entries:
+                    # 만료 시각이 가장 빠른 항목부터 제거
+                    oldest = min(self._entries, key=lambda k: self._entries[k][0])
+                    del self._entries[oldest]
+            self._entries[key] = (expires_at, value)
+
+    def _shared_path(self, key: CacheKey) -> Path:
+        nx, ny, base_date, base_time = key
+        return self.shared_dir / f"{self.namespace}_{nx}_{ny}_{base_date}{base_time}.json"
+
+    def _get_shared(self, key: CacheKey) -> Optional[Tuple[float, Dict[str, Any]]]:
+        path = self._shared_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if time.time() >= entry["expires_at"]:
+            return None
+        return entry["expires_at"], entry["value"]
+
+    def _set_shared(self, key: CacheKey, value: Dict[str, Any], expires_at: float):
+        path = self._shared_path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"expires_at": expires_at, "value": value}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write shared weather cache: {e}")
+        self._prune_shared()
+
+    def _prune_shared(self):
+        """만료된 캐시 파일과 락 파일 삭제 (락 파일은 발표 시각마다 새로 생기므로 지우지 않으면 계속 쌓임)"""
+        now = time.time()
+        with self._lock:
+            if now < self._next_prune:
+                return
+            self._next_prune = now + SHARED_PRUNE_INTERVAL
+        removed = 0
+        for path in self.shared_dir.glob(f"{self.namespace}_*.json"):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    expired = now >= json.load(f)["expires_at"]
+            except (OSError, ValueError, KeyError, TypeError):
+                continue
+            if expired:
+                for stale in (path, path.with_suffix(".lock")):
+                    try:
+                        stale.unlink()
+                        removed += 1
+                    except FileNotFoundError:
+                        pass
+                    except OSError as e:
+                        logger.warning(f"Failed to remove {stale}: {e}")
+        for lock_path in self.shared_dir.glob(f"{self.namespace}_*.lock"):
+            try:
+                if not lock_path.with_suffix(".json").exists() and now - lock_path.stat().st_mtime >= ORPHAN_LOCK_TTL:
+                    lock_path.unlink()
+                    removed += 1
+            except OSError:
+                continue
+        if removed:
+            with self._lock:
+                self.stats["pruned"] += removed
+
+    def _fetch_shared(self, key: CacheKey, expires_at: float,
+                      fetch: Callable[[], Dict[str, Any]]) -> Tuple[Dict[str, Any], float]:
+        """공유 캐시 확인 → (파일 락 안에서) 재확인 → 요청"""
+        entry = self._get_shared(key)
+        if entry is not None:
+            self._bump("shared_hits")
+            return entry[1], entry[0]
+
+        lock_file = None
+        if fcntl is not None:
+            lock_file = open(self._shared_path(key).with_suffix(".lock"), 'w')
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            # 다른 프로세스가 락을 잡고 있는 동안 채워 넣었을 수 있음
+            entry = self._get_shared(key)
+            if entry is not None:
+                self._bump("shared_hits")
+                return entry[1], entry[0]
+            self._bump("fetches")
+            value = fetch()
+            if "error" not in value:
+                self._set_shared(key, value, expires_at)
+            return value, expires_at
+        finally:
+            if lock_file is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+                lock_file.close()
+
+    def get_or_fetch(self, key: CacheKey, fetch: Callable[[], Dict[str, Any]],
+                     expires_at: Optional[float] = None) -> Dict[str, Any]:
+        """
+        캐시된 값을 반환하거나, 없으면 fetch() 로 가져와 다음 발표 시각까지 저장합니다.
+        'error' 키가 있는 결과는 캐시하지 않습니다.
+
+        Args:
+            key: (nx, ny, base_date, base_time)
+            fetch: 캐시 미스 시 호출할 함수
+            expires_at: 만료 시각(timestamp). None 이면 초단기실황 다음 발표 시각
+
+        Returns:
+            Dict: 캐시된 값 또는 fetch() 결과
+        """
+        value = self._get_memory(key)
+        if value is not None:
+            self._bump("hits")
+            return value
+        self._bump("misses")
+
+        if expires_at is None:
+            expires_at = next_publication_time(key[2], key[3]).timestamp()
+
+        def load():
+            if self.shared_dir:
+                loaded, loaded_expires_at = self._fetch_shared(key, expires_at, fetch)
+            else:
+                self._bump("fetches")
+                loaded, loaded_expires_at = fetch(), expires_at
+            if "error" not in loaded:
+                self._set_memory(key, loaded, loaded_expires_at)
+            return loaded
+
+        return self._flight.do(key, load)
+
+    async def aget_or_fetch(self, key: CacheKey, afetch: Callable[[], Awaitable[Dict[str, Any]]],
+                            expires_at: Optional[float] = None) -> Dict[str, Any]:
+        """get_or_fetch 의 비동기 버전 (afetch 는 코루틴 함수)"""
+        value = self._get_memory(key)
+        if value is not None:
+            self._bump("hits")
+            return value
+        self._bump("misses")
+
+        if expires_at is None:
+            expires_at = next_publication_time(key[2], key[3]).timestamp()
+
+        async def load():
+            if self.shared_dir:
+                entry = self._get_shared(key)
+                if entry is not None:
+                    self._bump("shared_hits")
+                    self._set_memory(key, entry[1], entry[0])
+                    return entry[1]
+            self._bump("fetches")
+            loaded = await afetch()
+            if "error" not in loaded:
+                self._set_memory(key, loaded, expires_at)
+                if self.shared_dir:
+                    self._set_shared(key, loaded, expires_at)
+            return loaded
+
+        return await self._async_flight.do(key, load)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+        stats["coalesced"] = self._flight.stats["shared"] + self._async_flight.stats["shared"]
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+# Global instance
+_cache: Optional[WeatherCache] = None
+_forecast_cache: Optional[WeatherCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_weather_cache() -> WeatherCache:
+    """프로세스 공용 WeatherCache (WEATHER_CACHE_DIR 가 설정되면 프로세스 간 공유)"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = WeatherCache(shared_dir=os.getenv('WEATHER_CACHE_DIR'))
+    return _cache
+
+
+def get_forecast_cache() -> WeatherCache:
+    """단기예보(getVilageFcst)용 공용 캐시"""
+    global _forecast_cache
+    if _forecast_cache is None:
+        with _cache_lock:
+            if _forecast_cache is None:
+                _forecast_cache = WeatherCache(shared_dir=os.getenv('WEATHER_CACHE_DIR'), namespace="fcst")
+    return _forecast_cache